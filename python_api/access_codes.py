@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Live Session Access Codes
+=========================
+Collision-free allocation of ``QZ-XXXXX`` codes in O(1), without random
+draws and retries against the store.
+
+Code space: ``length`` characters from ``alphabet`` behind ``prefix``. The
+default alphabet drops look-alike characters (0/O, 1/I/L), so 5 characters
+give 31^5 ~ 28.6M codes instead of the 10k of ``QZ-DDDD``.
+
+Allocation:
+  1. a shared counter (``store.next_code_ticket``: INCR in Redis, one
+     transaction in SQLite) numbers every allocation of the code space;
+  2. the ticket goes through a keyed Feistel permutation of
+     [0, size) (cycle-walking), so consecutive sessions get unrelated codes
+     and a code is never handed out twice while the counter runs;
+  3. released codes (``store.delete``/``release_code``) join a FIFO pool.
+     Once more than ``reuse_after`` codes wait there, or when the counter
+     has used the whole space, codes come from the pool, oldest first: a
+     code is reused only after ``reuse_after`` other releases.
+
+Every step is a single atomic store operation, so workers sharing a store
+never hand out the same code. The permutation key comes from
+LIVE_CODE_SECRET or, failing that, a random secret kept in the store.
+"""
+
+import hashlib
+import logging
+import math
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ALPHABET = "23456789ABCDEFGHJKMNPQRSTUVWXYZ"
+DEFAULT_PREFIX = "QZ-"
+DEFAULT_LENGTH = 5
+
+
+class CodeSpace:
+    """Bijection between [0, size) and ``prefix`` + ``length`` alphabet characters."""
+
+    def __init__(self, alphabet: str = DEFAULT_ALPHABET, length: int = DEFAULT_LENGTH,
+                 prefix: str = DEFAULT_PREFIX):
+        alphabet = alphabet.upper()
+        if len(set(alphabet)) != len(alphabet) or len(alphabet) < 2:
+            raise ValueError(f"Invalid access code alphabet: {alphabet!r}")
+        if length < 1:
+            raise ValueError(f"Invalid access code length: {length}")
+        self.alphabet = alphabet
+        self.length = length
+        self.prefix = prefix.upper()
+        self.size = len(alphabet) ** length
+        self._digit = {char: value for value, char in enumerate(alphabet)}
+
+    @property
+    def name(self) -> str:
+        """Identifies the space, so a configuration change starts a new counter."""
+        return f"{self.prefix}{self.alphabet}:{self.length}"
+
+    def encode(self, index: int) -> str:
+        base = len(self.alphabet)
+        chars = []
+        for _ in range(self.length):
+            index, digit = divmod(index, base)
+            chars.append(self.alphabet[digit])
+        return self.prefix + "".join(reversed(chars))
+
+    def decode(self, code: str) -> Optional[int]:
+        """Index of a code of this space, None for anything else."""
+        code = self.normalize(code)
+        body = code[len(self.prefix):]
+        if not code.startswith(self.prefix) or len(body) != self.length:
+            return None
+        index = 0
+        for char in body:
+            digit = self._digit.get(char)
+            if digit is None:
+                return None
+            index = index * len(self.alphabet) + digit
+        return index
+
+    def normalize(self, code: str) -> str:
+        """Upper-case, without spaces; the prefix may be omitted when typing."""
+        code = "".join((code or "").split()).upper()
+        if self.prefix and not code.startswith(self.prefix) and len(code) == self.length:
+            code = self.prefix + code
+        return code
+
+
+class FeistelPermutation:
+    """Keyed bijection of [0, size): balanced Feistel network + cycle-walking.
+
+    The network permutes the smallest even-bit domain >= size (at most 4x
+    larger); values falling outside [0, size) are permuted again, which
+    takes a few rounds on average.
+    """
+
+    def __init__(self, size: int, key: bytes, rounds: int = 4):
+        self.size = size
+        self.rounds = rounds
+        self.key = key
+        self.half_bits = max(1, math.ceil(math.log2(max(2, size)) / 2))
+        self.mask = (1 << self.half_bits) - 1
+
+    def _round(self, value: int, round_index: int) -> int:
+        digest = hashlib.blake2b(
+            value.to_bytes(8, "big"), digest_size=8, key=self.key, person=bytes([round_index]) * 16
+        ).digest()
+        return int.from_bytes(digest, "big") & self.mask
+
+    def _encrypt(self, value: int) -> int:
+        left, right = value >> self.half_bits, value & self.mask
+        for round_index in range(self.rounds):
+            left, right = right, left ^ self._round(right, round_index)
+        return (left << self.half_bits) | right
+
+    def __call__(self, index: int) -> int:
+        if not 0 <= index < self.size:
+            raise ValueError(f"Index {index} outside [0, {self.size})")
+        value = self._encrypt(index)
+        while value >= self.size:
+            value = self._encrypt(value)
+        return value
+
+
+class AccessCodeAllocator:
+    """Hands out unused access codes of ``space`` from ``store``."""
+
+    def __init__(self, store, space: Optional[CodeSpace] = None, reuse_after: int = 1000,
+                 secret: Optional[str] = None):
+        self.store = store
+        self.space = space or CodeSpace()
+        self.reuse_after = max(0, reuse_after)
+        key = secret.encode("utf-8") if secret else store.code_secret()
+        self.permutation = FeistelPermutation(
+            self.space.size, hashlib.blake2b(key + self.space.name.encode("utf-8"), digest_size=32).digest()
+        )
+        self.issued = 0
+        self.reused = 0
+
+    def allocate(self) -> str:
+        """Next free code (not yet claimed: see ``store.claim_code``)."""
+        code = self._pop_free(self.reuse_after)
+        if code is None:
+            ticket = self.store.next_code_ticket(self.space.name)
+            if ticket < self.space.size:
+                self.issued += 1
+                return self.space.encode(self.permutation(ticket))
+            code = self._pop_free(0)
+        if code is None:
+            raise RuntimeError(f"All {self.space.size} access codes are in use")
+        self.reused += 1
+        return code
+
+    def _pop_free(self, keep: int) -> Optional[str]:
+        while True:
+            code = self.store.pop_free_code(keep)
+            # Codes of a previous configuration are dropped
+            if code is None or self.space.decode(code) is not None:
+                return code
+
+    def normalize(self, code: str) -> str:
+        return self.space.normalize(code)
+
+    def stats(self):
+        return {
+            "codeSpace": self.space.size,
+            "prefix": self.space.prefix,
+            "length": self.space.length,
+            "issued": self.issued,
+            "reused": self.reused,
+            "reuseAfter": self.reuse_after,
+        }
@@ -1,14 +1,30 @@
 # -*- coding: utf-8 -*-
 import os
+from dotenv import load_dotenv
+
+# Charger les variables d'environnement
+load_dotenv()
+load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
+
+# Mode de service SocketIO: threading (defaut) ou gevent.
+# Le mode cooperatif doit patcher la stdlib avant tout autre import
+# pour que les sockets live et les appels LLM lents ne bloquent pas le worker.
+SOCKETIO_ASYNC_MODE = os.getenv("SOCKETIO_ASYNC_MODE", "threading").strip().lower()
+if SOCKETIO_ASYNC_MODE == "gevent":
+    from gevent import monkey
+    monkey.patch_all()
+elif SOCKETIO_ASYNC_MODE != "threading":
+    SOCKETIO_ASYNC_MODE = "threading"
+
+import itertools
 import json
 import logging
-import requests
 import re
+import sqlite3
+import threading
+import time
 from functools import wraps
-from pypdf import PdfReader
-import docx
-import io
-from flask import Flask, request, jsonify, g
+from flask import Flask, Response, request, jsonify, g, stream_with_context
 from flask_cors import CORS
 try:
     from flask_socketio import SocketIO, emit, join_room, leave_room
@@ -17,15 +33,25 @@ except ImportError:
     SOCKETIO_AVAILABLE = False
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-from dotenv import load_dotenv
 from werkzeug.utils import secure_filename
 import google.generativeai as genai
 import firebase_admin
 from firebase_admin import credentials, auth as firebase_auth
-
-# Charger les variables d'environnement
-load_dotenv()
-load_dotenv(os.path.join(os.path.dirname(__file__), ".env"))
+from provider_http import ProviderHTTPError, get_provider_http_client
+from chunked_generation import ChunkedGenerator, build_course_excerpt, plan_chunks
+from question_bank import create_question_bank
+from question_dedup import NearDuplicateFilter, NearDuplicateIndex
+from firebase_token_cache import VerifiedTokenCache, install_certificate_cache
+from generation_jobs import GenerationJobQueue, JobQueueFullError, job_room
+from provider_clients import get_provider_clients
+from provider_health import get_provider_health
+from prompt_budget import get_prompt_budget
+from provider_race import ProviderRace
+import rate_limit_storage  # noqa: F401 - enregistre le schema sqlite:// aupres de limits
+from response_parser import StreamingQuestionParser, parse_json_response
+from result_cache import cache_key, create_result_cache
+from single_flight import SingleFlight, create_lease_store
+from text_extraction import ExtractionResult, TextExtractor, content_digest
 
 app = Flask(__name__)
 MAX_UPLOAD_SIZE_MB = int(os.getenv("MAX_UPLOAD_SIZE_MB", "10"))
@@ -33,6 +59,73 @@ MAX_AI_QUESTIONS_PER_QUIZ = int(os.getenv("MAX_AI_QUESTIONS_PER_QUIZ", "20"))
 ALLOWED_UPLOAD_EXTENSIONS = {".pdf", ".docx", ".txt"}
 app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_SIZE_MB * 1024 * 1024
 
+# --- Extraction de texte des fichiers ---
+# Les pages au-dela du budget de caracteres ne sont pas extraites; pool de
+# processus optionnel pour les gros PDF (EXTRACTION_PROCESS_WORKERS > 0)
+text_extractor = TextExtractor(
+    max_chars=int(os.getenv("EXTRACTION_MAX_CHARS", "120000")),
+    process_workers=int(os.getenv("EXTRACTION_PROCESS_WORKERS", "0")),
+    parallel_min_pages=int(os.getenv("EXTRACTION_PARALLEL_MIN_PAGES", "40")),
+)
+
+# Cache des extractions, indexe par l'empreinte du fichier depose: un meme
+# support re-depose (extract-text puis generate, polycopie partage) n'est
+# plus reanalyse. EXTRACTION_CACHE_URL: memory:// (LRU par worker) ou
+# sqlite:////data/extraction_cache.db (LRU memoire devant le disque partage)
+EXTRACTION_CACHE_MEMORY_ENTRIES = int(os.getenv("EXTRACTION_CACHE_MEMORY_ENTRIES", "64"))
+_extraction_cache_url = os.getenv("EXTRACTION_CACHE_URL", "memory://")
+extraction_cache = create_result_cache(
+    _extraction_cache_url,
+    "extraction_cache",
+    max_entries=(int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "2000"))
+                 if _extraction_cache_url.strip().startswith("sqlite:///") else EXTRACTION_CACHE_MEMORY_ENTRIES),
+    ttl=float(os.getenv("EXTRACTION_CACHE_TTL", str(30 * 24 * 3600))),
+    memory_entries=EXTRACTION_CACHE_MEMORY_ENTRIES,
+)
+
+# --- Cache des quiz generes ---
+# GENERATION_CACHE_URL: memory:// (par worker), sqlite:////data/generation_cache.db
+# (partage par les workers, survit aux redemarrages) ou none:// pour desactiver
+generation_cache = create_result_cache(
+    os.getenv("GENERATION_CACHE_URL", "memory://"),
+    "generation_cache",
+    max_entries=int(os.getenv("GENERATION_CACHE_MAX_ENTRIES", "500")),
+    ttl=float(os.getenv("GENERATION_CACHE_TTL", str(7 * 24 * 3600))),
+)
+
+# --- Banque de questions (reutilisation des questions deja generees) ---
+# QUESTION_BANK_URL: none:// (desactivee) ou sqlite:////data/question_bank.db
+question_bank = create_question_bank(
+    os.getenv("QUESTION_BANK_URL", "none://"),
+    min_coverage=float(os.getenv("QUESTION_BANK_MIN_COVERAGE", "0.6")),
+)
+
+# --- Regroupement des generations identiques en cours (single-flight) ---
+# GENERATION_SINGLE_FLIGHT_STORE: memory:// (par worker), sqlite:////data/single_flight.db
+# (workers d'un hote) ou redis://... (plusieurs hotes)
+GENERATION_SINGLE_FLIGHT = os.getenv("GENERATION_SINGLE_FLIGHT", "1") == "1"
+generation_single_flight = SingleFlight(
+    lease_store=create_lease_store(os.getenv("GENERATION_SINGLE_FLIGHT_STORE", "memory://")),
+    wait_timeout=float(os.getenv("GENERATION_SINGLE_FLIGHT_WAIT", "150")),
+)
+
+# --- Jobs de generation asynchrones (POST /api/generate/jobs) ---
+# GENERATION_JOBS_STORE: memory:// (suivi par le worker qui a recu le job) ou
+# sqlite:////data/generation_jobs.db (suivi depuis n'importe quel worker)
+generation_jobs = GenerationJobQueue(
+    create_result_cache(
+        os.getenv("GENERATION_JOBS_STORE", "memory://"),
+        "generation_jobs",
+        max_entries=int(os.getenv("GENERATION_JOBS_MAX_ENTRIES", "2000")),
+        ttl=float(os.getenv("GENERATION_JOB_TTL", "3600")),
+    ),
+    max_workers=int(os.getenv("GENERATION_JOB_WORKERS", "2")),
+    max_pending=int(os.getenv("GENERATION_JOB_MAX_PENDING", "20")),
+    job_timeout=float(os.getenv("GENERATION_JOB_TIMEOUT", "600")),
+    notify=lambda record: notify_generation_job(record),
+    error_payload=lambda error: generation_error_payload(error),
+)
+
 # --- Firebase Admin SDK Initialization ---
 _firebase_app = None
 service_account_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
@@ -49,12 +142,36 @@ else:
         "La verification des tokens Firebase sera desactivee."
     )
 
+# Tokens verifies gardes jusqu'a leur expiration (AUTH_CHECK_REVOKED=1: revocation
+# reverifiee toutes les AUTH_REVOCATION_CHECK_INTERVAL secondes)
+verified_tokens = VerifiedTokenCache(
+    lambda token, check_revoked: firebase_auth.verify_id_token(token, app=_firebase_app, check_revoked=check_revoked),
+    max_entries=int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000")),
+    check_revoked=os.getenv("AUTH_CHECK_REVOKED", "0") == "1",
+    revocation_interval=float(os.getenv("AUTH_REVOCATION_CHECK_INTERVAL", "300")),
+)
+firebase_certificates = None
+if _firebase_app is not None:
+    firebase_certificates = install_certificate_cache(firebase_auth, _firebase_app)
+    if firebase_certificates is not None:
+        threading.Thread(target=firebase_certificates.warm, name="firebase-certs", daemon=True).start()
+
 # --- Rate Limiter ---
+# RATELIMIT_STORAGE_URI: memory:// (par worker), sqlite:////data/rate_limits.db
+# (workers d'un hote, voir rate_limit_storage) ou redis://host:6379/0 (plusieurs hotes)
+RATELIMIT_STORAGE_URI = os.getenv("RATELIMIT_STORAGE_URI", "memory://").strip()
 limiter = Limiter(
     app=app,
     key_func=get_remote_address,
     default_limits=["100 per minute"],
-    storage_uri="memory://",
+    storage_uri=RATELIMIT_STORAGE_URI,
+    storage_options=(
+        {"purge_interval": float(os.getenv("RATELIMIT_PURGE_INTERVAL", "60"))}
+        if RATELIMIT_STORAGE_URI.startswith("sqlite:") else {}
+    ),
+    strategy=os.getenv("RATELIMIT_STRATEGY", "moving-window"),
+    # Stockage partage indisponible: limites par worker plutot que des 500
+    in_memory_fallback_enabled=not RATELIMIT_STORAGE_URI.startswith("memory:"),
 )
 
 # --- CORS ---
@@ -121,7 +238,7 @@ def require_auth(f):
 
         token = auth_header.replace('Bearer ', '')
         try:
-            decoded_token = firebase_auth.verify_id_token(token)
+            decoded_token = verified_tokens.verify(token)
             g.user_uid = decoded_token.get('uid')
             return f(*args, **kwargs)
         except firebase_auth.InvalidIdTokenError:
@@ -150,6 +267,26 @@ DEFAULT_GROQ_MODEL = GROQ_MODEL
 SUPPORTED_MODELS = {"gemini", "openrouter", "groq"}
 PROVIDER_FALLBACK_ORDER = ["gemini", "openrouter", "groq"]
 
+# Course entre fournisseurs: sequential (un a la fois) ou hedged (le suivant
+# est lance en parallele si le precedent n'a pas repondu apres le delai)
+GENERATION_HEDGED = os.getenv("GENERATION_MODE", "sequential").strip().lower() == "hedged"
+GENERATION_RACE_BUDGET = float(os.getenv("GENERATION_RACE_BUDGET_MS", "120000")) / 1000
+provider_race = ProviderRace(
+    hedge_delay=float(os.getenv("GENERATION_HEDGE_DELAY_MS", "8000")) / 1000,
+    adaptive=os.getenv("GENERATION_HEDGE_ADAPTIVE", "0") == "1",
+)
+
+# Documents longs: generation par morceaux en parallele au lieu de text[:5000]
+GENERATION_CHUNKING = os.getenv("GENERATION_CHUNKING", "1") == "1"
+GENERATION_CHUNK_CHARS = int(os.getenv("GENERATION_CHUNK_CHARS", "5000"))
+GENERATION_MAX_CHUNKS = int(os.getenv("GENERATION_MAX_CHUNKS", "6"))
+# Quasi doublons (paraphrases) retires des quiz generes, tous fournisseurs
+question_dedup = NearDuplicateFilter(threshold=float(os.getenv("GENERATION_DEDUP_THRESHOLD", "0.8")))
+chunked_generator = ChunkedGenerator(
+    max_workers=int(os.getenv("GENERATION_CHUNK_WORKERS", "6")),
+    dedup=question_dedup,
+)
+
 
 def sanitize_error_message(message):
     """Remove API key values from provider errors before logging or returning them."""
@@ -165,7 +302,11 @@ def sanitize_error_message(message):
 
 # Configuration de l'API Gemini
 if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
+    # gRPC n'est pas compatible avec les greenlets: REST en mode cooperatif
+    genai.configure(
+        api_key=GEMINI_API_KEY,
+        transport="rest" if SOCKETIO_ASYNC_MODE != "threading" else None,
+    )
     logger.info("API Gemini configurée avec succès")
 else:
     logger.warning("GEMINI_API_KEY n'est pas configurée - la génération avec Gemini sera désactivée")
@@ -189,37 +330,54 @@ def assert_allowed_upload(file):
     return safe_name, extension
 
 
-def extract_text_from_file(file):
-    """Extrait le texte des fichiers PDF/DOCX/TXT"""
+def extraction_cache_key(data, extension):
+    """Cle du cache d'extraction: empreinte du contenu + format + budget."""
+    return cache_key("extract", content_digest(data), extension, text_extractor.max_chars)
+
+
+def extract_document(file, bypass_cache=False):
+    """Extrait le texte des fichiers PDF/DOCX/TXT avec les statistiques d'extraction."""
     filename, extension = assert_allowed_upload(file)
+    return extract_upload(filename, extension, file.read(), bypass_cache)
+
+
+def extract_upload(filename, extension, data, bypass_cache=False):
+    """Extraction du contenu d'un fichier deja lu (requete ou job de generation)."""
     logger.debug(f"Début de l'extraction du texte pour le fichier: {filename}")
-    
-    try:
-        if extension == '.pdf':
-            logger.info(f"Extraction du texte du PDF: {filename}")
-            pdf_reader = PdfReader(io.BytesIO(file.read()))
-            logger.debug(f"PDF chargé avec {len(pdf_reader.pages)} pages")
-            text = '\n'.join([page.extract_text() for page in pdf_reader.pages])
-            logger.debug(f"Extraction PDF terminée: {len(text)} caractères extraits")
-            return text if text.strip() else "Aucun texte détecté dans le PDF"
-        
-        elif extension == '.docx':
-            logger.info(f"Extraction du texte du document Word: {filename}")
-            doc = docx.Document(io.BytesIO(file.read()))
-            logger.debug(f"Document Word chargé avec {len(doc.paragraphs)} paragraphes")
-            text = '\n'.join([para.text for para in doc.paragraphs if para.text])
-            logger.debug(f"Extraction Word terminée: {len(text)} caractères extraits")
-            return text
-        
-        elif extension == '.txt':
-            logger.info(f"Extraction du texte brut: {filename}")
-            text = file.read().decode('utf-8', errors='ignore')
-            logger.debug(f"Extraction TXT terminée: {len(text)} caractères extraits")
-            return text
-            
-    except Exception as e:
-        logger.error(f"Erreur lors de l'extraction du texte: {str(e)}")
-        raise ValueError(f"Échec de l'extraction: {str(e)}")
+
+    key = extraction_cache_key(data, extension)
+    lookup_start = time.perf_counter()
+    cached = extraction_cache.get(key, bypass=bypass_cache)
+    if cached is not None:
+        result = ExtractionResult.from_dict(cached)
+        result.cached = True
+        result.elapsed_ms = (time.perf_counter() - lookup_start) * 1000
+        logger.info(f"Extraction {filename} servie par le cache ({len(result.text)} caractères)")
+    else:
+        try:
+            result = text_extractor.extract(data, extension)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'extraction du texte: {str(e)}")
+            raise ValueError(f"Échec de l'extraction: {str(e)}")
+        extraction_cache.set(key, result.to_dict())
+
+    if not result.cached and extension == '.pdf':
+        slowest = max(result.page_timings_ms, default=0)
+        logger.info(
+            f"Extraction PDF {filename}: {result.pages_extracted}/{result.pages_total} pages, "
+            f"{len(result.text)} caractères en {result.elapsed_ms:.0f} ms (page la plus lente: {slowest:.0f} ms)"
+            + (" - budget de caractères atteint" if result.truncated else "")
+        )
+    elif not result.cached:
+        logger.info(f"Extraction {extension} {filename}: {len(result.text)} caractères en {result.elapsed_ms:.0f} ms")
+    if extension == '.pdf' and not result.text.strip():
+        result.text = "Aucun texte détecté dans le PDF"
+    return result
+
+
+def extract_text_from_file(file):
+    """Extrait le texte des fichiers PDF/DOCX/TXT"""
+    return extract_document(file).text
 
 
 @app.route('/api/extract-text', methods=['POST', 'OPTIONS'])
@@ -243,13 +401,15 @@ def handle_text_extraction():
             return jsonify({'error': 'Nom de fichier vide'}), 400
 
         logger.info(f"Début de l'extraction pour le fichier: {file.filename}")
-        text = extract_text_from_file(file)
+        extraction = extract_document(file, bypass_cache=is_cache_bypass_requested({}))
+        text = extraction.text
         logger.info(f"Extraction réussie: {len(text)} caractères extraits")
         
         return jsonify({
             'text': text,
             'filename': file.filename,
-            'characters': len(text)
+            'characters': len(text),
+            'extraction': extraction.to_stats(),
         })
 
     except ValueError as e:
@@ -343,7 +503,7 @@ DIFFICULTE: {difficulty}
 NOMBRE DE PROPOSITIONS: {num_questions}
 
 COURS:
-{course_text[:7000]}
+{build_course_excerpt(course_text, 7000)}
 
 QUESTION ACTUELLE EVENTUELLE:
 {json.dumps(current_question, ensure_ascii=False)[:2500]}
@@ -417,16 +577,18 @@ def manual_assistant():
             "difficulty": difficulty,
             "numQuestions": num_questions,
         })
-        content = generate_with_openrouter(prompt)
-
-        json_match = re.search(r'\{.*\}', content, re.DOTALL)
-        if not json_match:
-            raise ValueError("Aucun JSON trouve dans la reponse OpenRouter")
+        # Propositions + resume et problemes releves: une question de plus
+        content = generate_with_openrouter(
+            prompt, max_tokens=get_prompt_budget().output_tokens(OPENROUTER_MODEL, num_questions + 1)
+        )
 
-        payload = json.loads(json_match.group())
+        payload = parse_json_response(content, array_key="suggestions").data
         raw_suggestions = payload.get("suggestions", [])
         if not isinstance(raw_suggestions, list):
             raw_suggestions = []
+        raw_suggestions, _ = question_dedup.filter([
+            question for question in raw_suggestions if isinstance(question, dict)
+        ])
 
         suggestions = [
             normalized
@@ -438,6 +600,12 @@ def manual_assistant():
         if not suggestions:
             raise ValueError("OpenRouter n'a pas retourne de proposition QCM valide")
 
+        if question_bank is not None:
+            try:
+                question_bank.add(suggestions, course_text, origin='manual-assistant')
+            except sqlite3.Error as e:
+                logger.warning(f"Ecriture dans la banque de questions impossible: {e}")
+
         issues = payload.get("issues", [])
         if not isinstance(issues, list):
             issues = []
@@ -479,73 +647,78 @@ def manual_assistant():
         }), 500
 
 
-@app.route('/api/generate', methods=['POST', 'OPTIONS'])
-@limiter.limit("20 per minute")
-@require_auth
-def generate_quiz():
-    """Endpoint principal pour la génération de quiz"""
-    if request.method == 'OPTIONS':
-        return '', 204
-    
-    try:
-        logger.info("Requête de génération de quiz reçue")
-        
-        # Gestion des entrées multiples
-        data = {}
-        if 'file' in request.files:
-            file = request.files['file']
-            logger.info(f"Extraction du texte à partir du fichier: {file.filename}")
-            text = extract_text_from_file(file)
-            data = {
-                'numQuestions': request.form.get('numQuestions'),
-                'difficulty': request.form.get('difficulty'),
-                'modelType': request.form.get('modelType'),
-            }
-        else:
-            data = request.get_json() or {}
-            text = data.get('text', '')
-            logger.info(f"Texte reçu directement: {len(text)} caractères")
+def normalize_generated_question(q, position, difficulty):
+    """Normalise une question generee (IDs, options, une seule bonne reponse).
 
-        # Validation des paramètres
-        if not text or not text.strip():
-            logger.warning("Aucun contenu textuel fourni pour la génération")
-            return jsonify({'error': 'Aucun contenu fourni'}), 400
+    ``position`` est le nombre de questions valides deja retenues: il sert a
+    construire les IDs ``gen_q<n>`` / ``q<n>_<lettre>``.
+    """
+    # Normaliser et vérifier la validité minimale
+    if not isinstance(q, dict) or 'text' not in q or 'options' not in q:
+        return None
 
-        try:
-            num_questions = int(data.get('numQuestions', 5))
-            if num_questions < 1 or num_questions > MAX_AI_QUESTIONS_PER_QUIZ:
-                return jsonify({
-                    'error': f'Le nombre de questions doit etre entre 1 et {MAX_AI_QUESTIONS_PER_QUIZ}'
-                }), 400
-        except (ValueError, TypeError):
-            return jsonify({'error': 'Nombre de questions invalide'}), 400
-
-        difficulty = data.get('difficulty', 'medium')
-        if difficulty not in ['easy', 'medium', 'hard']:
-            difficulty = 'medium'
-
-        model_type = (data.get('modelType') or 'gemini').strip().lower()
-        if model_type not in SUPPORTED_MODELS:
-            return jsonify({
-                'error': f"Modele IA non supporte: {model_type}",
-                'supportedModels': sorted(SUPPORTED_MODELS),
-            }), 400
+    q_text = str(q.get('text', '')).strip()
+    raw_options = q.get('options', [])
 
-        api_key = data.get('apiKey', '')
-        
-        logger.info(f"Paramètres de génération: {num_questions} questions, difficulté {difficulty}, modèle {model_type}")
+    if not q_text or not isinstance(raw_options, list) or len(raw_options) < 2:
+        return None
+
+    # Valider les options et injecter les IDs
+    options = []
+    for option_index, opt in enumerate(raw_options[:4]):
+        if not isinstance(opt, dict):
+            continue
+        opt_text = str(opt.get('text', '')).strip()
+        if not opt_text:
+            continue
+        options.append({
+            'id': f"q{position + 1}_{chr(97 + option_index)}",
+            'text': opt_text,
+            'isCorrect': bool(opt.get('isCorrect', False))
+        })
+
+    if len(options) < 2:
+        return None
+
+    # S'assurer qu'au moins une réponse est correcte
+    if not any(opt['isCorrect'] for opt in options):
+        options[0]['isCorrect'] = True
+
+    # S'assurer d'une seule réponse correcte
+    if sum(1 for opt in options if opt['isCorrect']) > 1:
+        first_correct = False
+        for opt in options:
+            if opt['isCorrect'] and not first_correct:
+                first_correct = True
+            else:
+                opt['isCorrect'] = False
+
+    return {
+        'id': f"gen_q{position + 1}",
+        'text': q_text,
+        'options': options,
+        'explanation': str(q.get('explanation') or 'Explication à retenir.').strip(),
+        'difficulty': q.get('difficulty') if q.get('difficulty') in ['easy', 'medium', 'hard'] else difficulty
+    }
 
-        # Vérifier que la clé API nécessaire est disponible
-        if model_type == 'gemini' and not GEMINI_API_KEY:
-            return jsonify({'error': 'Clé API Gemini non configurée dans python_api/.env'}), 503
 
-        # Construction du prompt
-        logger.debug(f"Construction du prompt avec {len(text[:5000])} caractères de texte")
-        prompt = f"""
+def build_generation_prompt(text, num_questions, difficulty, additional_info=None, provider=None):
+    """Prompt QCM de /api/generate, texte source ajuste a la fenetre du modele du fournisseur."""
+    model = get_provider_model(provider)
+    budget = get_prompt_budget()
+    instructions_tokens = budget.count_tokens(
+        model, format_generation_prompt("", num_questions, difficulty, additional_info)
+    )
+    source_text = budget.fit_source(text, model, num_questions, instructions_tokens)
+    return format_generation_prompt(source_text, num_questions, difficulty, additional_info)
+
+
+def format_generation_prompt(source_text, num_questions, difficulty, additional_info=None):
+    return f"""
         Généree {num_questions} questions QCM complexes en français selon ces règles STRICTES :
 
         TEXTE SOURCE :
-        {text[:5000]}
+        {source_text}
 
         FORMAT JSON REQUIS :
         {{
@@ -569,120 +742,498 @@ def generate_quiz():
         - Les options doivent être plausibles
         - Les explications doivent citer le texte
         - Ne pas inclure de markdown
-        {f"- Contraintes supplementaires: {data.get('additionalInfo')}" if data.get('additionalInfo') else ""}
+        {f"- Contraintes supplementaires: {additional_info}" if additional_info else ""}
         """
-        logger.debug("Prompt construit avec succès")
 
-        content = None
-        used_provider = model_type
-        provider_errors = []
-        for provider in get_provider_attempt_order(model_type):
+
+def generation_cache_key(text, num_questions, difficulty, model_type, additional_info=None):
+    """Cle du cache de generation: texte normalise + parametres."""
+    normalized_text = " ".join(text.split())
+    return cache_key(
+        "generate",
+        normalized_text,
+        num_questions,
+        difficulty,
+        (additional_info or "").strip(),
+        model_type,
+        get_provider_model(model_type),
+    )
+
+
+def is_cache_bypass_requested(data):
+    """noCache dans le corps/formulaire ou en-tete Cache-Control: no-cache."""
+    flag = str(data.get('noCache') or request.form.get('noCache') or '').strip().lower()
+    if flag in ('1', 'true', 'yes'):
+        return True
+    return 'no-cache' in request.headers.get('Cache-Control', '').lower()
+
+
+def parse_generated_questions(content, num_questions, difficulty):
+    """Extrait et normalise les questions d'une reponse IA (ValueError si inexploitable)."""
+    if not content:
+        raise ValueError("Reponse vide de l'IA")
+
+    logger.debug(f"Contenu brut reçu: {len(content)} caractères")
+    logger.debug(f"Aperçu du contenu: {content[:200]}")
+
+    # Objet JSON de la reponse (blocs ```json```, texte autour, sortie tronquee)
+    try:
+        parsed = parse_json_response(content)
+    except ValueError:
+        logger.error("Aucun JSON trouvé dans la réponse")
+        logger.error(f"Contenu complet: {content}")
+        raise
+    quiz_data = parsed.data
+    if parsed.truncated:
+        logger.warning(f"Réponse IA tronquée: {parsed.recovered} questions complètes récupérées")
+
+    # Validation et formatage des questions
+    questions = quiz_data.get('questions', [])
+    if not isinstance(questions, list) or len(questions) == 0:
+        logger.warning("Aucune question trouvée dans le JSON généré")
+        raise ValueError("Le JSON de l'IA ne contient pas de liste de questions")
+
+    valid_questions = []
+    for q in questions:
+        normalized = normalize_generated_question(q, len(valid_questions), difficulty)
+        if normalized is not None:
+            valid_questions.append(normalized)
+
+    valid_questions, duplicates = question_dedup.filter(valid_questions)
+    if duplicates:
+        # IDs renumerotes apres retrait des quasi doublons
+        valid_questions = [
+            normalize_generated_question(question, position, difficulty)
+            for position, question in enumerate(valid_questions)
+        ]
+
+    logger.info(f"Génération terminée: {len(valid_questions)} questions valides sur {num_questions} demandées")
+
+    if len(valid_questions) == 0:
+        raise ValueError("L'IA n'a produit aucune question syntaxiquement correcte.")
+    return valid_questions
+
+
+def get_race_options(data):
+    """Options de course par requete: hedged, raceBudgetMs (plafonne), hedgeDelayMs."""
+    options = {}
+    hedged = data.get('hedged')
+    if hedged is not None:
+        options['hedged'] = str(hedged).strip().lower() in ('1', 'true', 'yes')
+    if data.get('raceBudgetMs') is not None:
+        budget = float(data['raceBudgetMs']) / 1000
+        if budget <= 0:
+            raise ValueError("raceBudgetMs doit etre positif")
+        options['budget'] = min(budget, GENERATION_RACE_BUDGET)
+    if data.get('hedgeDelayMs') is not None:
+        options['hedge_delay'] = max(0.0, float(data['hedgeDelayMs']) / 1000)
+    return options
+
+
+def run_quiz_generation(text, num_questions, difficulty, model_type, api_key='', additional_info=None,
+                        hedged=None, budget=None, hedge_delay=None):
+    """Genere un quiz (fournisseurs IA puis repli local) et retourne le corps de reponse.
+
+    Le premier fournisseur qui renvoie un quiz exploitable l'emporte; en mode
+    hedged les suivants sont lances en parallele apres le delai de couverture.
+    """
+    if hedged is None:
+        hedged = GENERATION_HEDGED
+
+    def generate_part(part_text, part_questions):
+        prompt_budget = get_prompt_budget()
+
+        def attempt(provider):
+            # Prompt et max_tokens dimensionnes pour le modele de ce fournisseur
+            model = get_provider_model(provider)
+            prompt = build_generation_prompt(part_text, part_questions, difficulty, additional_info, provider)
+            content = generate_with_provider(
+                provider, prompt, api_key, max_tokens=prompt_budget.output_tokens(model, part_questions)
+            )
+            questions = parse_generated_questions(content, part_questions, difficulty)
+            prompt_budget.observe(model, len(questions), content)
+            return questions
+
+        provider, questions, _ = provider_race.run(
+            get_provider_attempt_order(model_type),
+            attempt,
+            hedged=hedged,
+            budget=budget or GENERATION_RACE_BUDGET,
+            hedge_delay=hedge_delay,
+        )
+        return provider, questions
+
+    plan = []
+    if GENERATION_CHUNKING and len(text) > GENERATION_CHUNK_CHARS:
+        plan = plan_chunks(text, num_questions, GENERATION_CHUNK_CHARS, GENERATION_MAX_CHUNKS)
+
+    if len(plan) > 1:
+        logger.info(f"Document long ({len(text)} caractères): {len(plan)} morceaux, "
+                    f"répartition {[count for _, count in plan]}")
+        merged, providers, errors = chunked_generator.run(plan, generate_part)
+        if not merged:
+            raise ValueError("Service IA indisponible: " + sanitize_error_message(" | ".join(errors)))
+        # Identifiants renumerotes dans l'ordre du document fusionne
+        valid_questions = [
+            normalize_generated_question(question, position, difficulty)
+            for position, question in enumerate(merged[:num_questions])
+        ]
+        used_provider = max(set(providers), key=providers.count)
+    else:
+        try:
+            used_provider, valid_questions = generate_part(text, num_questions)
+        except ValueError as e:
+            raise ValueError(f"Service IA indisponible: {sanitize_error_message(str(e))}")
+
+    # Compléter si insuffisant
+    warning = None
+    if len(valid_questions) < num_questions:
+        warning = f"Seulement {len(valid_questions)} questions valides ont été générées sur {num_questions} demandées."
+        logger.warning(warning)
+        # Génération locale fallback
+        fallback = generate_fallback_questions(num_questions - len(valid_questions), difficulty, text)
+        valid_questions.extend(fallback)
+
+    result = {
+        'questions': valid_questions[:num_questions],
+        'warning': warning,
+        'provider': used_provider,
+        'fallback_used': len(valid_questions) > num_questions
+    }
+    if len(plan) > 1:
+        result['chunks'] = len(plan)
+    return result
+
+
+def stream_quiz_generation(text, num_questions, difficulty, model_type, api_key='', additional_info=None):
+    """Genere les evenements (nom, donnees) d'une generation en flux.
+
+    Chaque question est normalisee et emise des que son objet JSON est
+    complet dans le flux du fournisseur; l'evenement final ``done`` porte le
+    resultat complet (meme forme que run_quiz_generation).
+    """
+    prompt_budget = get_prompt_budget()
+    questions = []
+    used_provider = None
+    provider_errors = []
+
+    for provider in get_provider_attempt_order(model_type):
+        model = get_provider_model(provider)
+        prompt = build_generation_prompt(text, num_questions, difficulty, additional_info, provider)
+        try:
+            chunks = open_provider_stream(
+                provider, prompt, api_key, max_tokens=prompt_budget.output_tokens(model, num_questions)
+            )
+        except ValueError as e:
+            safe_error = sanitize_error_message(str(e))
+            provider_errors.append(f"{provider}: {safe_error}")
+            logger.warning(f"Provider {provider} indisponible: {safe_error}")
+            continue
+
+        used_provider = provider
+        yield 'provider', {'provider': provider, 'model': get_provider_model(provider)}
+        parser = StreamingQuestionParser()
+        seen = NearDuplicateIndex(question_dedup)
+        raw_chunks = []
+        try:
+            for chunk in chunks:
+                raw_chunks.append(chunk)
+                for item in parser.feed(chunk):
+                    if len(questions) >= num_questions:
+                        continue
+                    normalized = normalize_generated_question(item, len(questions), difficulty)
+                    if normalized is not None and seen.add(normalized):
+                        questions.append(normalized)
+                        yield 'question', normalized
+        except ValueError as e:
+            # Flux coupe en cours de route: on garde les questions deja emises
+            safe_error = sanitize_error_message(str(e))
+            provider_errors.append(f"{provider}: {safe_error}")
+            logger.warning(f"Flux {provider} interrompu apres {len(questions)} questions: {safe_error}")
+
+        if not questions:
+            # Reponse hors du format attendu: analyse classique du texte complet
             try:
-                logger.info(f"Tentative de generation avec {provider}")
-                content = generate_with_provider(provider, prompt, api_key)
-                used_provider = provider
-                break
+                parsed = parse_generated_questions("".join(raw_chunks), num_questions, difficulty)
             except ValueError as e:
-                safe_error = sanitize_error_message(str(e))
-                provider_errors.append(f"{provider}: {safe_error}")
-                logger.warning(f"Provider {provider} indisponible: {safe_error}")
+                provider_errors.append(f"{provider}: {sanitize_error_message(str(e))}")
+                continue
+            for question in parsed[:num_questions]:
+                questions.append(question)
+                yield 'question', question
+        prompt_budget.observe(model, len(questions), "".join(raw_chunks))
+        break
 
-        if not content:
-            raise ValueError("Service IA indisponible: " + " | ".join(provider_errors))
+    if not questions:
+        raise ValueError("Service IA indisponible: " + " | ".join(provider_errors))
+
+    logger.info(f"Génération en flux terminée: {len(questions)} questions valides sur {num_questions} demandées")
+
+    warning = None
+    if len(questions) < num_questions:
+        warning = f"Seulement {len(questions)} questions valides ont été générées sur {num_questions} demandées."
+        logger.warning(warning)
+        for question in generate_fallback_questions(num_questions - len(questions), difficulty, text):
+            questions.append(question)
+            yield 'question', question
+
+    yield 'done', {
+        'questions': questions,
+        'warning': warning,
+        'provider': used_provider,
+        'fallback_used': warning is not None,
+    }
 
-        logger.debug(f"Contenu brut reçu: {len(content)} caractères")
-        logger.debug(f"Aperçu du contenu: {content[:200]}")
-        
-        # Chercher le JSON dans la réponse
-        json_match = re.search(r'\{.*\}', content, re.DOTALL)
-        if not json_match:
-            logger.error("Aucun JSON trouvé dans la réponse")
-            logger.error(f"Contenu complet: {content}")
-            raise ValueError("Aucun JSON trouvé dans la réponse de l'IA")
-        
+
+def format_sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def read_generation_request(defer_extraction=False):
+    """Lit et valide les parametres de generation (JSON ou formulaire avec fichier).
+
+    Retourne (parametres, None) ou (None, reponse d'erreur). Avec
+    ``defer_extraction``, le fichier est seulement lu (``params['upload']``)
+    et l'extraction est laissee au job de generation.
+    """
+    # Gestion des entrées multiples
+    data = {}
+    upload = None
+    if 'file' in request.files:
+        file = request.files['file']
+        if defer_extraction:
+            filename, extension = assert_allowed_upload(file)
+            upload = {'filename': filename, 'extension': extension, 'data': file.read()}
+            text = None
+        else:
+            logger.info(f"Extraction du texte à partir du fichier: {file.filename}")
+            text = extract_text_from_file(file)
+        data = {
+            'numQuestions': request.form.get('numQuestions'),
+            'difficulty': request.form.get('difficulty'),
+            'modelType': request.form.get('modelType'),
+            'hedged': request.form.get('hedged'),
+            'raceBudgetMs': request.form.get('raceBudgetMs'),
+            'hedgeDelayMs': request.form.get('hedgeDelayMs'),
+        }
+    else:
+        data = request.get_json() or {}
+        text = data.get('text', '')
+        logger.info(f"Texte reçu directement: {len(text)} caractères")
+
+    # Validation des paramètres
+    if upload is None and (not text or not text.strip()):
+        logger.warning("Aucun contenu textuel fourni pour la génération")
+        return None, (jsonify({'error': 'Aucun contenu fourni'}), 400)
+
+    try:
+        num_questions = int(data.get('numQuestions', 5))
+        if num_questions < 1 or num_questions > MAX_AI_QUESTIONS_PER_QUIZ:
+            return None, (jsonify({
+                'error': f'Le nombre de questions doit etre entre 1 et {MAX_AI_QUESTIONS_PER_QUIZ}'
+            }), 400)
+    except (ValueError, TypeError):
+        return None, (jsonify({'error': 'Nombre de questions invalide'}), 400)
+
+    difficulty = data.get('difficulty', 'medium')
+    if difficulty not in ['easy', 'medium', 'hard']:
+        difficulty = 'medium'
+
+    model_type = (data.get('modelType') or 'gemini').strip().lower()
+    if model_type not in SUPPORTED_MODELS:
+        return None, (jsonify({
+            'error': f"Modele IA non supporte: {model_type}",
+            'supportedModels': sorted(SUPPORTED_MODELS),
+        }), 400)
+
+    api_key = data.get('apiKey', '')
+
+    try:
+        race_options = get_race_options(data)
+    except (ValueError, TypeError):
+        return None, (jsonify({'error': 'Parametres de course invalides (raceBudgetMs, hedgeDelayMs)'}), 400)
+    
+    logger.info(f"Paramètres de génération: {num_questions} questions, difficulté {difficulty}, modèle {model_type}")
+
+    # Vérifier que la clé API nécessaire est disponible
+    if model_type == 'gemini' and not GEMINI_API_KEY:
+        return None, (jsonify({'error': 'Clé API Gemini non configurée dans python_api/.env'}), 503)
+
+    return {
+        'text': text,
+        'upload': upload,
+        'num_questions': num_questions,
+        'difficulty': difficulty,
+        'model_type': model_type,
+        'api_key': api_key,
+        'additional_info': data.get('additionalInfo'),
+        'race_options': race_options,
+        'bypass_cache': is_cache_bypass_requested(data),
+    }, None
+
+
+def get_or_generate_quiz(params):
+    """Quiz depuis le cache, sinon genere (et mis en cache s'il est complet).
+
+    Les requetes identiques concurrentes partagent une seule generation.
+    Retourne (resultat, origine) avec origine 'cache', 'shared' ou 'generated'.
+    """
+    text = params['text']
+    key = generation_cache_key(
+        text, params['num_questions'], params['difficulty'], params['model_type'], params['additional_info']
+    )
+    cached = generation_cache.get(key, bypass=params['bypass_cache'])
+    if cached is not None:
+        logger.info(f"Quiz servi depuis le cache ({cached.get('provider')})")
+        return cached, 'cache'
+
+    def generate():
+        result = generate_with_question_bank(params)
+        # Un resultat complete par le repli local n'est pas mis en cache:
+        # une nouvelle tentative peut obtenir un quiz complet du fournisseur
+        if not result['warning']:
+            generation_cache.set(key, result)
+        return result
+
+    # noCache demande une generation fraiche: pas de partage avec une requete en cours
+    if not GENERATION_SINGLE_FLIGHT or params['bypass_cache']:
+        return generate(), 'generated'
+    result, shared = generation_single_flight.do(key, generate)
+    if shared:
+        logger.info(f"Quiz partage avec une generation identique en cours ({result.get('provider')})")
+    return result, 'shared' if shared else 'generated'
+
+
+def generate_with_question_bank(params):
+    """run_quiz_generation, en reprenant d'abord les questions pertinentes de la banque.
+
+    Le modele ne genere que les questions manquantes; les questions qu'il
+    produit sont ajoutees a la banque.
+    """
+    text = params['text']
+    num_questions = params['num_questions']
+    difficulty = params['difficulty']
+    if question_bank is None:
+        return run_quiz_generation(
+            text, num_questions, difficulty, params['model_type'], params['api_key'],
+            params['additional_info'], **params['race_options']
+        )
+
+    reused = []
+    if not params['bypass_cache']:
         try:
-            quiz_data = json.loads(json_match.group())
-        except json.JSONDecodeError as e:
-            logger.error(f"Erreur de décodage JSON: {e}")
-            logger.error(f"Contenu extrait: {json_match.group()}")
-            raise ValueError(f"JSON mal formé retourné par l'IA: {e}")
-
-        # Validation et formatage des questions
-        questions = quiz_data.get('questions', [])
-        if not isinstance(questions, list) or len(questions) == 0:
-            logger.warning("Aucune question trouvée dans le JSON généré")
-            raise ValueError("Le JSON de l'IA ne contient pas de liste de questions")
-
-        valid_questions = []
-        for index, q in enumerate(questions):
-            # Normaliser et vérifier la validité minimale
-            if not isinstance(q, dict) or 'text' not in q or 'options' not in q:
-                continue
+            reused = question_bank.search(text, difficulty, num_questions)
+        except sqlite3.Error as e:
+            logger.warning(f"Banque de questions indisponible: {e}")
+        reused, _ = question_dedup.filter(reused)
+
+    if len(reused) >= num_questions:
+        logger.info(f"Quiz entierement servi par la banque de questions ({len(reused)} questions)")
+        return {
+            'questions': [
+                normalize_generated_question(question, position, difficulty)
+                for position, question in enumerate(reused[:num_questions])
+            ],
+            'warning': None,
+            'provider': 'question-bank',
+            'fallback_used': False,
+            'reused': num_questions,
+        }
 
-            q_text = str(q.get('text', '')).strip()
-            raw_options = q.get('options', [])
+    additional_info = params['additional_info']
+    if reused:
+        logger.info(f"{len(reused)} question(s) reprise(s) de la banque, {num_questions - len(reused)} a generer")
+        # Le modele ne doit pas reproduire les questions reprises
+        already = "\n".join(f"- {question['text']}" for question in reused)
+        additional_info = f"{additional_info or ''}\nNe repete pas ces questions deja posees:\n{already}".strip()
 
-            if not q_text or not isinstance(raw_options, list) or len(raw_options) < 2:
-                continue
+    try:
+        result = run_quiz_generation(
+            text, num_questions - len(reused), difficulty, params['model_type'], params['api_key'],
+            additional_info, **params['race_options']
+        )
+    except ValueError as e:
+        if not reused:
+            raise
+        # Fournisseurs indisponibles: les questions de la banque sont rendues
+        # seules plutot que perdues (quiz partiel, non mis en cache)
+        logger.warning(f"Generation des questions manquantes impossible, {len(reused)} question(s) de la banque rendues: {e}")
+        return {
+            'questions': [
+                normalize_generated_question(question, position, difficulty)
+                for position, question in enumerate(reused)
+            ],
+            'warning': f"Service IA indisponible: seulement {len(reused)} questions sur {num_questions} demandées, reprises de la banque.",
+            'provider': 'question-bank',
+            'fallback_used': False,
+            'reused': len(reused),
+            'partial': True,
+        }
+    # Questions du fournisseur (IDs gen_q*), par opposition au repli local (q*)
+    generated = [question for question in result['questions'] if str(question.get('id', '')).startswith('gen_q')]
+    if generated:
+        try:
+            question_bank.add(generated, text, origin='generate')
+        except sqlite3.Error as e:
+            logger.warning(f"Ecriture dans la banque de questions impossible: {e}")
+    if not reused:
+        return result
+
+    merged, _ = question_dedup.filter(reused + generated)
+    fallback = [question for question in result['questions'] if question not in generated]
+    merged = (merged + fallback)[:num_questions]
+    warning = result['warning']
+    if len(merged) < num_questions:
+        missing = num_questions - len(merged)
+        warning = f"Seulement {len(merged)} questions valides ont été générées sur {num_questions} demandées."
+        merged.extend(generate_fallback_questions(missing, difficulty, text))
+    return {
+        **result,
+        'questions': [
+            normalize_generated_question(question, position, difficulty)
+            for position, question in enumerate(merged)
+        ],
+        'warning': warning,
+        'reused': len(reused),
+    }
 
-            # Valider les options et injecter les IDs
-            options = []
-            for option_index, opt in enumerate(raw_options[:4]):
-                if not isinstance(opt, dict):
-                    continue
-                opt_text = str(opt.get('text', '')).strip()
-                if not opt_text:
-                    continue
-                options.append({
-                    'id': f"q{len(valid_questions) + 1}_{chr(97 + option_index)}",
-                    'text': opt_text,
-                    'isCorrect': bool(opt.get('isCorrect', False))
-                })
-
-            if len(options) < 2:
-                continue
 
-            # S'assurer qu'au moins une réponse est correcte
-            if not any(opt['isCorrect'] for opt in options):
-                options[0]['isCorrect'] = True
-
-            # S'assurer d'une seule réponse correcte
-            if sum(1 for opt in options if opt['isCorrect']) > 1:
-                first_correct = False
-                for opt in options:
-                    if opt['isCorrect'] and not first_correct:
-                        first_correct = True
-                    else:
-                        opt['isCorrect'] = False
-
-            valid_questions.append({
-                'id': f"gen_q{len(valid_questions) + 1}",
-                'text': q_text,
-                'options': options,
-                'explanation': str(q.get('explanation') or 'Explication à retenir.').strip(),
-                'difficulty': q.get('difficulty') if q.get('difficulty') in ['easy', 'medium', 'hard'] else difficulty
-            })
+def generation_response(result, origin):
+    return {**result, 'cached': origin == 'cache', 'coalesced': origin == 'shared'}
 
-        logger.info(f"Génération terminée: {len(valid_questions)} questions valides sur {num_questions} demandées")
 
-        if len(valid_questions) == 0:
-            raise ValueError("L'IA n'a produit aucune question syntaxiquement correcte.")
+def generation_error_payload(error):
+    """Corps d'erreur de generation (memes messages que /api/generate)."""
+    safe_error = sanitize_error_message(str(error))
+    if isinstance(error, ValueError):
+        return {
+            'error': 'Impossible de générer le quiz à partir de ce texte.',
+            'details': safe_error,
+            'status': 422,
+        }
+    return {
+        "error": "Une erreur inattendue s'est produite lors de la génération des questions. Veuillez réessayer.",
+        "details": safe_error,
+        'status': 500,
+    }
 
-        # Compléter si insuffisant
-        warning = None
-        if len(valid_questions) < num_questions:
-            warning = f"Seulement {len(valid_questions)} questions valides ont été générées sur {num_questions} demandées."
-            logger.warning(warning)
-            # Génération locale fallback
-            fallback = generate_fallback_questions(num_questions - len(valid_questions), difficulty, text)
-            valid_questions.extend(fallback)
 
-        return jsonify({
-            'questions': valid_questions[:num_questions],
-            'warning': warning,
-            'provider': used_provider,
-            'fallback_used': len(valid_questions) > num_questions
-        })
+@app.route('/api/generate', methods=['POST', 'OPTIONS'])
+@limiter.limit("20 per minute")
+@require_auth
+def generate_quiz():
+    """Endpoint principal pour la génération de quiz"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    
+    try:
+        logger.info("Requête de génération de quiz reçue")
+        
+        params, error_response = read_generation_request()
+        if error_response is not None:
+            return error_response
+        result, origin = get_or_generate_quiz(params)
+        return jsonify(generation_response(result, origin))
 
     except ValueError as e:
         safe_error = sanitize_error_message(str(e))
@@ -700,21 +1251,255 @@ def generate_quiz():
         }), 500
 
 
-def generate_with_gemini(prompt):
+@app.route('/api/generate/stream', methods=['POST', 'OPTIONS'])
+@limiter.limit("20 per minute")
+@require_auth
+def generate_quiz_stream():
+    """Generation de quiz en flux SSE (text/event-stream).
+
+    Evenements: ``provider`` (fournisseur retenu), ``question`` (une question
+    normalisee, des qu'elle est complete), ``done`` (warning, provider,
+    cached, count) ou ``error``. Memes parametres que /api/generate.
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    try:
+        logger.info("Requête de génération de quiz en flux reçue")
+        params, error_response = read_generation_request()
+    except ValueError as e:
+        safe_error = sanitize_error_message(str(e))
+        return jsonify({
+            'error': 'Impossible de générer le quiz à partir de ce texte.',
+            'details': safe_error
+        }), 422
+    if error_response is not None:
+        return error_response
+
+    key = generation_cache_key(
+        params['text'], params['num_questions'], params['difficulty'], params['model_type'],
+        params['additional_info'],
+    )
+    cached = generation_cache.get(key, bypass=params['bypass_cache'])
+
+    def summary(result, from_cache):
+        return {
+            'count': len(result['questions']),
+            'warning': result['warning'],
+            'provider': result['provider'],
+            'fallback_used': result['fallback_used'],
+            'cached': from_cache,
+        }
+
+    def events():
+        if cached is not None:
+            logger.info(f"Quiz servi depuis le cache ({cached.get('provider')})")
+            for question in cached['questions']:
+                yield format_sse('question', question)
+            yield format_sse('done', summary(cached, True))
+            return
+        try:
+            for event, payload in stream_quiz_generation(
+                params['text'], params['num_questions'], params['difficulty'], params['model_type'],
+                params['api_key'], params['additional_info'],
+            ):
+                if event == 'done':
+                    if not payload['warning']:
+                        generation_cache.set(key, payload)
+                    yield format_sse('done', summary(payload, False))
+                else:
+                    yield format_sse(event, payload)
+        except ValueError as e:
+            safe_error = sanitize_error_message(str(e))
+            logger.error(f"Erreur fonctionnelle lors de la génération en flux: {safe_error}")
+            yield format_sse('error', {
+                'error': 'Impossible de générer le quiz à partir de ce texte.',
+                'details': safe_error
+            })
+        except Exception as e:
+            safe_error = sanitize_error_message(str(e))
+            logger.error(f"Erreur inattendue lors de la génération en flux: {safe_error}", exc_info=True)
+            yield format_sse('error', {
+                "error": "Une erreur inattendue s'est produite lors de la génération des questions. Veuillez réessayer.",
+                "details": safe_error
+            })
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+def public_job_view(record):
+    """Etat d'un job tel que renvoye au client (sans le proprietaire)."""
+    return {key: value for key, value in record.items() if key != 'owner'}
+
+
+def notify_generation_job(record):
+    """Emet l'etat du job dans sa salle SocketIO (rejointe via watch_generation_job)."""
+    if socketio is not None:
+        socketio.emit('generation_job', public_job_view(record), to=job_room(record['jobId']))
+
+
+@app.route('/api/generate/jobs', methods=['POST', 'OPTIONS'])
+@limiter.limit("20 per minute")
+@require_auth
+def create_generation_job():
+    """Generation en arriere-plan: renvoie un identifiant de job immediatement.
+
+    Memes parametres que /api/generate. Suivi par GET /api/generate/jobs/<id>
+    ou par l'evenement SocketIO ``generation_job`` (emettre
+    ``watch_generation_job`` avec ``{"jobId": ...}``).
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    try:
+        params, error_response = read_generation_request(defer_extraction=True)
+    except ValueError as e:
+        return jsonify(generation_error_payload(e)), 422
+    if error_response is not None:
+        return error_response
+
+    owner = g.get('user_uid')
+    if params['upload'] is None and not params['bypass_cache']:
+        # Quiz deja en cache: job termine sans passer par la file
+        cached = generation_cache.get(generation_cache_key(
+            params['text'], params['num_questions'], params['difficulty'], params['model_type'],
+            params['additional_info'],
+        ))
+        if cached is not None:
+            record = generation_jobs.complete({**cached, 'cached': True}, owner=owner)
+            return jsonify(public_job_view(record)), 200
+
+    def run_job():
+        upload = params.pop('upload')
+        if upload is not None:
+            params['text'] = extract_upload(upload['filename'], upload['extension'], upload['data']).text
+            if not params['text'].strip():
+                raise ValueError('Aucun contenu fourni')
+        result, origin = get_or_generate_quiz(params)
+        return generation_response(result, origin)
+
+    try:
+        record = generation_jobs.submit(run_job, owner=owner)
+    except JobQueueFullError as e:
+        logger.warning(f"Job de generation refuse: {e}")
+        return jsonify({'error': 'Trop de générations en cours, veuillez réessayer dans un instant.'}), 503, {
+            'Retry-After': '10'
+        }
+    logger.info(f"Job de generation {record['jobId']} en file ({params['num_questions']} questions, {params['model_type']})")
+    return jsonify(public_job_view(record)), 202, {'Location': f"/api/generate/jobs/{record['jobId']}"}
+
+
+@app.route('/api/generate/jobs/<job_id>', methods=['GET'])
+@require_auth
+def get_generation_job(job_id):
+    """Etat d'un job: queued, running, done (result) ou failed (error)."""
+    record = generation_jobs.get(job_id)
+    # Un job d'un autre utilisateur est rapporte comme inexistant
+    if record is None or (record.get('owner') and record['owner'] != g.get('user_uid')):
+        return jsonify({'error': 'Job non trouve'}), 404
+    return jsonify(public_job_view(record))
+
+
+def get_gemini_model():
+    """Modele Gemini construit une fois par processus (la cle est configuree par genai.configure)."""
+    model_name = get_provider_model("gemini")
+    return get_provider_clients().get("gemini", model_name, lambda: genai.GenerativeModel(model_name))
+
+
+def probe_provider(provider):
+    """Disponibilite d'un fournisseur par un appel sans cout (liste des modeles), en cache.
+
+    Les cles en circuit ouvert ne sont pas sondees: le fournisseur est
+    disponible si l'une de ses cles repond.
+    """
+    if not get_provider_configured_state().get(provider):
+        return False
+    clients = get_provider_clients()
+    if provider == "gemini":
+        return clients.is_available(
+            "gemini", GEMINI_API_KEY, lambda: genai.get_model(f"models/{get_provider_model('gemini')}")
+        )
+    settings = get_chat_provider_settings(provider)
+    endpoint = f"{settings['base_url'].rstrip('/')}/models"
+    try:
+        keys = get_provider_keys(provider)
+    except ValueError:
+        return False
+    return any(
+        clients.is_available(
+            provider, key,
+            lambda key=key: get_provider_http_client().get_json(
+                endpoint, {"Authorization": f"Bearer {key}", **(settings["extra_headers"] or {})}, read_timeout=10
+            ),
+        )
+        for key in keys
+    )
+
+
+def gemini_generation_config(max_tokens=None):
+    return {"max_output_tokens": max_tokens} if max_tokens else None
+
+
+def generate_with_gemini(prompt, max_tokens=None):
+    health = get_provider_health()
+    if not health.is_available("gemini", GEMINI_API_KEY):
+        raise ValueError("Service Gemini ecarte temporairement (circuit ouvert)")
+    start = time.perf_counter()
     try:
         logger.info("Utilisation de l'API Gemini avec le SDK officiel")
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        response = model.generate_content(prompt)
+        model = get_gemini_model()
+        response = model.generate_content(prompt, generation_config=gemini_generation_config(max_tokens))
         content = response.text
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            # Les tokens de reflexion sont factures (et plafonnes) avec la sortie
+            get_prompt_budget().record_usage(
+                get_provider_model("gemini"), prompt, content,
+                getattr(usage, "prompt_token_count", None),
+                (getattr(usage, "candidates_token_count", 0) or 0) + (getattr(usage, "thoughts_token_count", 0) or 0),
+            )
         logger.info(f"Contenu extrait de Gemini: {len(content)} caracteres")
+        health.record_success("gemini", GEMINI_API_KEY, time.perf_counter() - start)
         return content
     except Exception as e:
+        # Exceptions google.api_core: code = statut HTTP (429, 403, ...)
+        status_code = getattr(e, "code", None)
+        health.record_failure(
+            "gemini",
+            GEMINI_API_KEY,
+            status_code=status_code if isinstance(status_code, int) else None,
+            latency=time.perf_counter() - start,
+            # ValueError: reponse bloquee ou vide pour ce prompt, pas une panne
+            provider_fault=False if isinstance(e, ValueError) else None,
+        )
         safe_error = sanitize_error_message(str(e))
         logger.error(f"Erreur lors de l'appel a l'API Gemini: {safe_error}")
         raise ValueError(f"Service Gemini indisponible: {safe_error}")
 
 
-def generate_with_chat_completions_api(provider_name, base_url, api_key, model, prompt, extra_headers=None):
+def build_chat_completion_payload(model, prompt, max_tokens=None):
+    payload = {
+        "model": model,
+        "messages": [
+            {
+                "role": "system",
+                "content": "Tu es un expert en creation de quiz educatifs. Reponds uniquement avec un JSON valide.",
+            },
+            {"role": "user", "content": prompt},
+        ],
+        "temperature": 0.2,
+    }
+    if max_tokens:
+        payload["max_tokens"] = max_tokens
+    return payload
+
+
+def generate_with_chat_completions_api(provider_name, base_url, api_key, model, prompt, extra_headers=None,
+                                       max_tokens=None):
     """Genere du contenu avec une API de chat completions compatible."""
     if not api_key:
         raise ValueError(f"Cle API {provider_name} non configuree")
@@ -725,107 +1510,224 @@ def generate_with_chat_completions_api(provider_name, base_url, api_key, model,
         **(extra_headers or {}),
     }
     endpoint = f"{base_url.rstrip('/')}/chat/completions"
+    health = get_provider_health()
+    health_name = provider_name.lower()
+    start = time.perf_counter()
 
     try:
         logger.info(f"Envoi de la requete a {provider_name} avec le modele {model}")
-        response = requests.post(
-            endpoint,
-            headers=headers,
-            json={
-                "model": model,
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": "Tu es un expert en creation de quiz educatifs. Reponds uniquement avec un JSON valide.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                "temperature": 0.2,
-            },
-            timeout=90,
+        # Client partage: connexions keep-alive reutilisees entre tentatives
+        payload = get_provider_http_client().post_json(
+            endpoint, headers, build_chat_completion_payload(model, prompt, max_tokens)
+        )
+        content = payload["choices"][0]["message"]["content"]
+        usage = payload.get("usage") or {}
+        if usage:
+            get_prompt_budget().record_usage(
+                model, prompt, content, usage.get("prompt_tokens"), usage.get("completion_tokens")
+            )
+        health.record_success(health_name, api_key, time.perf_counter() - start)
+        return content
+    except ProviderHTTPError as e:
+        health.record_failure(
+            health_name, api_key, e.status_code, e.retry_after, time.perf_counter() - start
         )
-        response.raise_for_status()
-        payload = response.json()
-        return payload["choices"][0]["message"]["content"]
-    except requests.exceptions.RequestException as e:
         safe_error = sanitize_error_message(str(e))
-        if getattr(e, "response", None) is not None:
-            safe_error = f"{safe_error} | {sanitize_error_message(e.response.text[:800])}"
+        if e.body:
+            safe_error = f"{safe_error} | {sanitize_error_message(e.body[:800])}"
         logger.error(f"Erreur lors de l'appel a {provider_name}: {safe_error}")
         raise ValueError(f"Service {provider_name} indisponible: {safe_error}")
     except (KeyError, IndexError, TypeError, ValueError) as e:
+        # Reponse recue mais inexploitable: ne compte pas pour le disjoncteur
+        health.record_failure(health_name, api_key, latency=time.perf_counter() - start, provider_fault=False)
         safe_error = sanitize_error_message(str(e))
         logger.error(f"Reponse invalide de {provider_name}: {safe_error}")
         raise ValueError(f"Reponse invalide de {provider_name}: {safe_error}")
 
 
-def generate_with_openrouter(prompt, user_api_key=None):
-    BACKUP_OPENROUTER_KEYS = [
-        k.strip() for k in os.getenv("BACKUP_OPENROUTER_KEYS", "").split(",") if k.strip()
+def get_chat_provider_settings(provider):
+    """Parametres d'appel des fournisseurs compatibles chat completions."""
+    if provider == "openrouter":
+        return {
+            "provider_name": "OpenRouter",
+            "base_url": "https://openrouter.ai/api/v1",
+            "model": OPENROUTER_MODEL,
+            "extra_headers": {
+                "HTTP-Referer": os.getenv("APP_PUBLIC_URL", "http://localhost:5173"),
+                "X-Title": "QUIZO",
+            },
+        }
+    if provider == "groq":
+        return {
+            "provider_name": "Groq",
+            "base_url": GROQ_BASE_URL,
+            "model": GROQ_MODEL,
+            "extra_headers": None,
+        }
+    raise ValueError(f"Fournisseur IA inconnu: {provider}")
+
+
+def get_provider_keys(provider, user_api_key=None):
+    """Cles a essayer: cle utilisateur, cle principale puis cles de secours (BACKUP_*_KEYS).
+
+    Les cles en circuit ouvert (429, 401, echecs repetes) sont ecartees, les
+    plus saines d'abord.
+    """
+    if provider == "openrouter":
+        primary_key, placeholder, backup_env = OPENROUTER_API_KEY, "your_openrouter_api_key_here", "BACKUP_OPENROUTER_KEYS"
+    else:
+        primary_key, placeholder, backup_env = GROQ_API_KEY, "your_groq_api_key_here", "BACKUP_GROQ_KEYS"
+    backup_keys = [
+        k.strip() for k in os.getenv(backup_env, "").split(",") if k.strip()
     ]
     keys_to_try = []
     if user_api_key:
         keys_to_try.append(user_api_key)
-    if OPENROUTER_API_KEY and OPENROUTER_API_KEY != "your_openrouter_api_key_here":
-        keys_to_try.append(OPENROUTER_API_KEY)
-    for key in BACKUP_OPENROUTER_KEYS:
+    if primary_key and primary_key != placeholder:
+        keys_to_try.append(primary_key)
+    for key in backup_keys:
         if key not in keys_to_try:
             keys_to_try.append(key)
-            
+
+    healthy_keys = get_provider_health().order_keys(provider, keys_to_try)
+    if keys_to_try and not healthy_keys:
+        provider_name = get_chat_provider_settings(provider)["provider_name"]
+        raise ValueError(f"Toutes les clés {provider_name} sont temporairement écartées (circuit ouvert)")
+    return healthy_keys
+
+
+def generate_with_chat_provider(provider, prompt, user_api_key=None, max_tokens=None):
+    """Essaie les cles d'un fournisseur chat completions jusqu'a la premiere reponse."""
+    settings = get_chat_provider_settings(provider)
+    provider_name = settings["provider_name"]
+    health = get_provider_health()
     errors = []
-    for i, key in enumerate(keys_to_try):
+    for i, key in enumerate(get_provider_keys(provider, user_api_key)):
+        if not health.is_available(provider, key):
+            continue
         try:
-            logger.info(f"OpenRouter: Tentative avec la clé index {i}")
+            logger.info(f"{provider_name}: Tentative avec la clé index {i}")
             return generate_with_chat_completions_api(
-                "OpenRouter",
-                "https://openrouter.ai/api/v1",
+                provider_name,
+                settings["base_url"],
                 key,
-                OPENROUTER_MODEL,
+                settings["model"],
                 prompt,
-                {
-                    "HTTP-Referer": os.getenv("APP_PUBLIC_URL", "http://localhost:5173"),
-                    "X-Title": "QUIZO",
-                },
+                settings["extra_headers"],
+                max_tokens,
             )
         except Exception as e:
-            logger.warning(f"Clé OpenRouter index {i} a échoué: {sanitize_error_message(str(e))}")
+            logger.warning(f"Clé {provider_name} index {i} a échoué: {sanitize_error_message(str(e))}")
             errors.append(f"Key {i}: {str(e)}")
-            
-    raise ValueError("Toutes les clés OpenRouter ont échoué. Détails: " + " | ".join(errors))
 
+    raise ValueError(f"Toutes les clés {provider_name} ont échoué. Détails: " + " | ".join(errors))
+
+
+def stream_with_gemini(prompt, max_tokens=None):
+    """Fragments de texte de Gemini au fil de la generation."""
+    health = get_provider_health()
+    if not health.is_available("gemini", GEMINI_API_KEY):
+        raise ValueError("Service Gemini ecarte temporairement (circuit ouvert)")
+    start = time.perf_counter()
+    try:
+        model = get_gemini_model()
+        for chunk in model.generate_content(
+            prompt, stream=True, generation_config=gemini_generation_config(max_tokens)
+        ):
+            if chunk.text:
+                yield chunk.text
+        health.record_success("gemini", GEMINI_API_KEY, time.perf_counter() - start)
+    except Exception as e:
+        status_code = getattr(e, "code", None)
+        health.record_failure(
+            "gemini",
+            GEMINI_API_KEY,
+            status_code=status_code if isinstance(status_code, int) else None,
+            latency=time.perf_counter() - start,
+            # ValueError: reponse bloquee ou vide pour ce prompt, pas une panne
+            provider_fault=False if isinstance(e, ValueError) else None,
+        )
+        safe_error = sanitize_error_message(str(e))
+        logger.error(f"Erreur lors du flux Gemini: {safe_error}")
+        raise ValueError(f"Service Gemini indisponible: {safe_error}")
+
+
+def stream_with_chat_completions_api(provider_name, base_url, api_key, model, prompt, extra_headers=None,
+                                     max_tokens=None):
+    """Fragments de texte d'une API chat completions en streaming (SSE)."""
+    if not api_key:
+        raise ValueError(f"Cle API {provider_name} non configuree")
+
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+        **(extra_headers or {}),
+    }
+    endpoint = f"{base_url.rstrip('/')}/chat/completions"
+    health = get_provider_health()
+    health_name = provider_name.lower()
+    start = time.perf_counter()
+
+    try:
+        logger.info(f"Ouverture du flux {provider_name} avec le modele {model}")
+        yield from get_provider_http_client().stream_chat_completion(
+            endpoint, headers, build_chat_completion_payload(model, prompt, max_tokens)
+        )
+        health.record_success(health_name, api_key, time.perf_counter() - start)
+    except ProviderHTTPError as e:
+        health.record_failure(
+            health_name, api_key, e.status_code, e.retry_after, time.perf_counter() - start
+        )
+        safe_error = sanitize_error_message(str(e))
+        if e.body:
+            safe_error = f"{safe_error} | {sanitize_error_message(e.body[:800])}"
+        logger.error(f"Erreur lors du flux {provider_name}: {safe_error}")
+        raise ValueError(f"Service {provider_name} indisponible: {safe_error}")
+
+
+def open_provider_stream(provider, prompt, api_key=None, max_tokens=None):
+    """Ouvre le flux d'un fournisseur et retourne un iterateur de fragments.
+
+    Le premier fragment est lu ici: une cle qui echoue avant de produire du
+    texte (quota, cle refusee, erreur reseau) laisse la place a la suivante.
+    """
+    assert_provider_ready(provider)
+    if provider == "gemini":
+        attempts = [("Gemini", lambda: stream_with_gemini(prompt, max_tokens))]
+    else:
+        settings = get_chat_provider_settings(provider)
+        health = get_provider_health()
+        attempts = [
+            (f"Key {i}", lambda key=key: stream_with_chat_completions_api(
+                settings["provider_name"], settings["base_url"], key,
+                settings["model"], prompt, settings["extra_headers"], max_tokens,
+            ))
+            for i, key in enumerate(get_provider_keys(provider, api_key))
+            if health.is_available(provider, key, consume_probe=False)
+        ]
 
-def generate_with_groq(prompt, user_api_key=None):
-    BACKUP_GROQ_KEYS = [
-        k.strip() for k in os.getenv("BACKUP_GROQ_KEYS", "").split(",") if k.strip()
-    ]
-    keys_to_try = []
-    if user_api_key:
-        keys_to_try.append(user_api_key)
-    if GROQ_API_KEY and GROQ_API_KEY != "your_groq_api_key_here":
-        keys_to_try.append(GROQ_API_KEY)
-    for key in BACKUP_GROQ_KEYS:
-        if key not in keys_to_try:
-            keys_to_try.append(key)
-            
     errors = []
-    for i, key in enumerate(keys_to_try):
+    for label, open_stream in attempts:
+        stream = open_stream()
         try:
-            logger.info(f"Groq: Tentative avec la clé index {i}")
-            return generate_with_chat_completions_api(
-                "Groq",
-                GROQ_BASE_URL,
-                key,
-                GROQ_MODEL,
-                prompt,
-            )
-        except Exception as e:
-            logger.warning(f"Clé Groq index {i} a échoué: {sanitize_error_message(str(e))}")
-            errors.append(f"Key {i}: {str(e)}")
-            
-    raise ValueError("Toutes les clés Groq ont échoué. Détails: " + " | ".join(errors))
+            first_chunk = next(stream)
+        except StopIteration:
+            errors.append(f"{label}: reponse vide")
+            continue
+        except ValueError as e:
+            errors.append(f"{label}: {e}")
+            continue
+        return itertools.chain([first_chunk], stream)
+
+    raise ValueError(f"Aucun flux {provider} disponible. Détails: " + " | ".join(errors))
+
 
+def generate_with_openrouter(prompt, user_api_key=None, max_tokens=None):
+    return generate_with_chat_provider("openrouter", prompt, user_api_key, max_tokens)
 
 
+def generate_with_groq(prompt, user_api_key=None, max_tokens=None):
+    return generate_with_chat_provider("groq", prompt, user_api_key, max_tokens)
 
 
 def generate_fallback_questions(num, difficulty, source_text=""):
@@ -902,12 +1804,14 @@ def get_provider_model(provider):
 
 
 def get_provider_attempt_order(requested_model):
-    """Return provider attempts in the free-beta fallback order."""
+    """Return provider attempts in the free-beta fallback order, unhealthy providers last."""
     if requested_model in PROVIDER_FALLBACK_ORDER:
-        return [requested_model] + [
+        order = [requested_model] + [
             provider for provider in PROVIDER_FALLBACK_ORDER if provider != requested_model
         ]
-    return list(PROVIDER_FALLBACK_ORDER)
+    else:
+        order = list(PROVIDER_FALLBACK_ORDER)
+    return get_provider_health().order_providers(order)
 
 
 def assert_provider_ready(provider_name):
@@ -918,15 +1822,15 @@ def assert_provider_ready(provider_name):
         raise ValueError(f"Le fournisseur {provider_name} n'est pas configuré (clé manquante)")
 
 
-def generate_with_provider(model_type, prompt, api_key=None):
+def generate_with_provider(model_type, prompt, api_key=None, max_tokens=None):
     """Call one configured provider without exposing provider credentials."""
     assert_provider_ready(model_type)
     if model_type == "gemini":
-        return generate_with_gemini(prompt)
+        return generate_with_gemini(prompt, max_tokens)
     if model_type == "openrouter":
-        return generate_with_openrouter(prompt, api_key)
+        return generate_with_openrouter(prompt, api_key, max_tokens)
     if model_type == "groq":
-        return generate_with_groq(prompt, api_key)
+        return generate_with_groq(prompt, api_key, max_tokens)
     raise ValueError(f"Modele IA non supporte: {model_type}")
 
 
@@ -962,22 +1866,43 @@ def status_check():
         "environment": os.getenv("FLASK_ENV", "development"),
         "rate_limiting": True,
         "auth_verification": _firebase_app is not None,
+        "auth_tokens": {
+            **verified_tokens.stats(),
+            "certificates": firebase_certificates.stats() if firebase_certificates is not None else None,
+        },
+        "provider_http": get_provider_http_client().get_metrics(),
+        "generation_cache": generation_cache.stats(),
+        "generation_jobs": generation_jobs.stats(),
+        "generation_single_flight": generation_single_flight.stats(),
+        "extraction_cache": extraction_cache.stats(),
+        "question_bank": question_bank.stats() if question_bank is not None else None,
+        "provider_race": provider_race.get_metrics(),
+        "prompt_budget": get_prompt_budget().stats(),
+        "provider_health": get_provider_health().snapshot(),
+        "provider_clients": get_provider_clients().stats(),
+        "live_sessions": live_session_reaper.stats() if live_session_reaper is not None else None,
+        "live_access_codes": session_manager.codes.stats() if session_manager is not None else None,
     })
 
 
 @app.route('/api/providers', methods=['GET'])
 def providers_check():
-    """Expose les fournisseurs IA connus sans divulguer les secrets."""
+    """Expose les fournisseurs IA connus sans divulguer les secrets.
+
+    ``?probe=1`` ajoute ``available``: sonde sans cout en tokens, en cache
+    PROVIDER_PROBE_TTL secondes.
+    """
     services = get_provider_configured_state()
-    return jsonify({
-        "providers": {
-            provider: {
-                "configured": services.get(provider, False),
-                "model": get_provider_model(provider),
-            }
-            for provider in sorted(SUPPORTED_MODELS)
+    probe = str(request.args.get('probe', '')).strip().lower() in ('1', 'true', 'yes')
+    providers = {}
+    for provider in sorted(SUPPORTED_MODELS):
+        providers[provider] = {
+            "configured": services.get(provider, False),
+            "model": get_provider_model(provider),
         }
-    })
+        if probe:
+            providers[provider]["available"] = probe_provider(provider)
+    return jsonify({"providers": providers})
 
 
 # --- Request logging middleware ---
@@ -996,25 +1921,88 @@ def _log_request_end(response):
 
 
 # --- Live Session (Multiplayer Quiz) ---
+# LIVE_SESSION_STORE: memory:// (1 worker), sqlite:////data/live_sessions.db
+# (plusieurs workers sur un hote) ou redis://host:6379/0 (plusieurs hotes)
+LIVE_SESSION_STORE = os.getenv("LIVE_SESSION_STORE", "memory://")
 try:
+    from access_codes import DEFAULT_ALPHABET, AccessCodeAllocator, CodeSpace
     from live_session import LiveSessionManager
-    session_manager = LiveSessionManager()
-    logger.info("LiveSessionManager charge avec succes")
+    from live_store import create_session_store
+    _live_store = create_session_store(LIVE_SESSION_STORE)
+    # Codes QZ-XXXXX: LIVE_CODE_LENGTH caracteres de LIVE_CODE_ALPHABET (sans 0/O, 1/I/L)
+    _live_codes = AccessCodeAllocator(
+        _live_store,
+        CodeSpace(
+            alphabet=os.getenv("LIVE_CODE_ALPHABET", "").strip() or DEFAULT_ALPHABET,
+            length=int(os.getenv("LIVE_CODE_LENGTH", "5")),
+            prefix=os.getenv("LIVE_CODE_PREFIX", "QZ-"),
+        ),
+        reuse_after=int(os.getenv("LIVE_CODE_REUSE_AFTER", "1000")),
+        secret=os.getenv("LIVE_CODE_SECRET") or None,
+    )
+    session_manager = LiveSessionManager(store=_live_store, codes=_live_codes)
+    logger.info(f"LiveSessionManager charge avec succes (store: {LIVE_SESSION_STORE.split(':', 1)[0]})")
 except ImportError:
     session_manager = None
     logger.warning("live_session module non disponible")
 
 if SOCKETIO_AVAILABLE:
+    # SOCKETIO_MESSAGE_QUEUE (ex: redis://...) relaie les emits entre workers/hotes
     socketio = SocketIO(
         app,
         cors_allowed_origins=ALLOWED_ORIGINS,
-        async_mode='threading',
+        async_mode=SOCKETIO_ASYNC_MODE,
+        message_queue=os.getenv("SOCKETIO_MESSAGE_QUEUE") or None,
         logger=False,
         engineio_logger=False,
     )
 else:
     socketio = None
 
+# Diffusion groupee des reponses live: LIVE_BROADCAST_INTERVAL_MS=0 pour
+# revenir a un evenement 'answer_submitted' par reponse
+LIVE_BROADCAST_INTERVAL_MS = int(os.getenv("LIVE_BROADCAST_INTERVAL_MS", "250"))
+LIVE_BROADCAST_LEADERBOARD_SIZE = int(os.getenv("LIVE_BROADCAST_LEADERBOARD_SIZE", "5"))
+from live_broadcast import AnswerBroadcaster, host_room
+
+answer_broadcaster = None
+if socketio and session_manager:
+    answer_broadcaster = AnswerBroadcaster(
+        socketio.emit,
+        interval=LIVE_BROADCAST_INTERVAL_MS / 1000,
+        leaderboard_size=LIVE_BROADCAST_LEADERBOARD_SIZE,
+        leaderboard_provider=lambda session_id, size: session_manager.get_leaderboard(session_id, limit=size),
+        start_task=socketio.start_background_task,
+        sleep=socketio.sleep,
+    )
+
+# Expiration des sessions live (terminees, salle d'attente inactive,
+# abandonnees): le code d'acces est libere, LIVE_ARCHIVE_DIR garde les resultats
+from live_reaper import LiveSessionReaper
+
+
+def _on_live_session_expired(session, reason):
+    if answer_broadcaster:
+        answer_broadcaster.forget(session.session_id)
+    if socketio:
+        socketio.emit('session_expired', {'sessionId': session.session_id, 'reason': reason},
+                      room=session.session_id)
+
+
+live_session_reaper = None
+if session_manager:
+    live_session_reaper = LiveSessionReaper(
+        session_manager,
+        completed_ttl=float(os.getenv("LIVE_COMPLETED_TTL", "3600")),
+        waiting_ttl=float(os.getenv("LIVE_WAITING_TTL", "3600")),
+        idle_ttl=float(os.getenv("LIVE_IDLE_TTL", "1800")),
+        interval=float(os.getenv("LIVE_REAP_INTERVAL", "60")),
+        archive_dir=os.getenv("LIVE_ARCHIVE_DIR", "").strip() or None,
+        on_expire=_on_live_session_expired,
+        start_task=socketio.start_background_task if socketio else None,
+        sleep=socketio.sleep if socketio else time.sleep,
+    )
+
 
 @app.route('/api/live/create', methods=['POST', 'OPTIONS'])
 @require_auth
@@ -1038,6 +2026,8 @@ def create_live_session():
 
     try:
         session = session_manager.create_session(title, questions, creator_id)
+        if live_session_reaper:
+            live_session_reaper.ensure_running()
         return jsonify({
             'sessionId': session.session_id,
             'accessCode': session.access_code,
@@ -1070,6 +2060,8 @@ def join_live_session():
 
     try:
         session, player = session_manager.join_session(access_code, player_name)
+        if live_session_reaper:
+            live_session_reaper.ensure_running()
 
         if socketio:
             socketio.emit('player_joined', player.to_dict(), room=session.session_id)
@@ -1099,7 +2091,9 @@ def get_live_session(session_id):
     return jsonify({
         'session': session.to_dict(),
         'players': [p.to_dict() for p in session.players.values()],
-        'leaderboard': session_manager.get_leaderboard(session_id),
+        'leaderboard': session_manager.get_leaderboard(
+            session_id, limit=request.args.get('limit', type=int)
+        ),
     })
 
 
@@ -1137,14 +2131,19 @@ def next_live_question(session_id):
 
     if not question:
         # Quiz completed
+        leaderboard = session_manager.get_leaderboard(session_id)
+        if answer_broadcaster:
+            # Dernieres reponses bufferisees envoyees avant 'session_completed'
+            answer_broadcaster.flush(session_id)
+            answer_broadcaster.forget(session_id)
         if socketio and session:
             socketio.emit('session_completed', {
                 'session': session.to_dict(),
-                'leaderboard': session_manager.get_leaderboard(session_id),
+                'leaderboard': leaderboard,
             }, room=session_id)
         return jsonify({
             'completed': True,
-            'leaderboard': session_manager.get_leaderboard(session_id),
+            'leaderboard': leaderboard,
         })
 
     question_data = {
@@ -1190,8 +2189,15 @@ def submit_live_answer(session_id):
             'timeSpent': answer.time_spent,
         }
 
-        if socketio:
-            socketio.emit('answer_submitted', answer_data, room=session_id)
+        if answer_broadcaster:
+            progress = session_manager.get_answer_progress(session_id, answer.question_id)
+            answer_broadcaster.record(
+                session_id,
+                answer_data,
+                progress.get('answeredCount', 0),
+                progress.get('correctCount', 0),
+                progress.get('totalPlayers', 0),
+            )
 
         return jsonify(answer_data)
     except ValueError as e:
@@ -1204,9 +2210,47 @@ def get_live_leaderboard(session_id):
     if not session_manager:
         return jsonify({'error': 'Live sessions non disponibles'}), 503
 
-    return jsonify({
-        'leaderboard': session_manager.get_leaderboard(session_id),
-    })
+    limit = request.args.get('limit', type=int)
+    offset = request.args.get('offset', default=0, type=int)
+    payload = {
+        'leaderboard': session_manager.get_leaderboard(session_id, limit=limit, offset=offset),
+    }
+    player_id = request.args.get('playerId')
+    if player_id:
+        payload['player'] = session_manager.get_player_rank(session_id, player_id)
+    return jsonify(payload)
+
+
+@app.route('/api/live/session/<session_id>/question/<question_id>/results', methods=['GET'])
+def get_live_question_results(session_id, question_id):
+    """Obtenir les resultats d'une question (ecran de revelation)."""
+    if not session_manager:
+        return jsonify({'error': 'Live sessions non disponibles'}), 503
+
+    results = session_manager.get_question_results(
+        session_id, question_id, limit=request.args.get('limit', type=int)
+    )
+    if not results:
+        return jsonify({'error': 'Question non trouvee'}), 404
+    return jsonify(results)
+
+
+def socket_user(data):
+    """Verifie le token Firebase d'un evenement SocketIO (champ 'token'), comme require_auth.
+    Retourne (autorise, uid); sans Firebase Admin SDK, (True, None).
+    """
+    if not _firebase_app:
+        return True, None
+    token = str((data or {}).get('token') or '')
+    if token.startswith('Bearer '):
+        token = token[len('Bearer '):]
+    if not token:
+        return os.getenv('FLASK_ENV') == 'development', None
+    try:
+        return True, verified_tokens.verify(token).get('uid')
+    except Exception as e:
+        logger.warning(f"Token SocketIO refuse: {sanitize_error_message(str(e))}")
+        return False, None
 
 
 # --- SocketIO Event Handlers ---
@@ -1215,19 +2259,45 @@ if SOCKETIO_AVAILABLE and socketio:
     def handle_join_session(data):
         session_id = data.get('sessionId', '')
         join_room(session_id)
+        # L'hote recoit aussi le detail des reponses (answers_detail): reserve
+        # au createur de la session, identifie comme dans require_auth
+        if data.get('role') == 'host':
+            authorized, uid = socket_user(data)
+            session = session_manager.get_session(session_id) if session_manager else None
+            if not authorized or session is None or session.creator_id != (uid or 'anonymous'):
+                emit('host_denied', {'sessionId': session_id})
+            else:
+                join_room(host_room(session_id))
         emit('joined_room', {'sessionId': session_id})
 
+    @socketio.on('watch_generation_job')
+    def handle_watch_generation_job(data):
+        job_id = str(data.get('jobId', ''))
+        record = generation_jobs.get(job_id)
+        # Meme controle que GET /api/generate/jobs/<id>: job d'un autre
+        # utilisateur rapporte comme inexistant, salle non rejointe
+        authorized, uid = socket_user(data)
+        if not authorized or record is None or (record.get('owner') and record['owner'] != uid):
+            emit('generation_job_error', {'jobId': job_id, 'error': 'Job non trouve'})
+            return
+        join_room(job_room(job_id))
+        # Job deja termine avant l'abonnement: etat courant envoye directement
+        if record['status'] in ('done', 'failed'):
+            emit('generation_job', public_job_view(record))
+
     @socketio.on('leave_session')
     def handle_leave_session(data):
         session_id = data.get('sessionId', '')
         leave_room(session_id)
+        leave_room(host_room(session_id))
 
 
 if __name__ == '__main__':
     logger.info("Demarrage du serveur Flask sur le port 5000")
     if SOCKETIO_AVAILABLE and socketio:
-        logger.info("Flask-SocketIO actif - WebSocket disponible")
-        socketio.run(app, host='0.0.0.0', port=5000, debug=False, allow_unsafe_werkzeug=True)
+        logger.info(f"Flask-SocketIO actif - WebSocket disponible (mode {SOCKETIO_ASYNC_MODE})")
+        run_options = {'allow_unsafe_werkzeug': True} if SOCKETIO_ASYNC_MODE == 'threading' else {}
+        socketio.run(app, host='0.0.0.0', port=5000, debug=False, **run_options)
     else:
         logger.info("Mode REST uniquement (Flask-SocketIO non installe)")
         app.run(host='0.0.0.0', port=5000, debug=False)
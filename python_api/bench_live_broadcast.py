@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Live Answer Broadcast Benchmark
+===============================
+Compares per-answer ``answer_submitted`` fan-out with the coalesced
+``answers_progress`` frames of AnswerBroadcaster.
+
+P players answer the same question within a time window. A fake SocketIO
+server encodes one frame per room member for every emit (what a
+threading-mode server does when writing to each socket), so the frame
+count and the CPU time spent encoding are comparable between modes.
+
+Usage:
+    python bench_live_broadcast.py --players 500 --window 2 --interval-ms 250
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from live_broadcast import AnswerBroadcaster
+from live_session import LiveSessionManager
+
+
+class FakeSocketServer:
+    """Counts frames written to each room member."""
+
+    def __init__(self):
+        self.rooms = {}
+        self.frames = 0
+        self.bytes = 0
+
+    def emit(self, event, data, room=None):
+        for _ in range(self.rooms.get(room, 0)):
+            frame = json.dumps([event, data])
+            self.frames += 1
+            self.bytes += len(frame)
+
+
+def run(players: int, window: float, interval_ms: int) -> dict:
+    manager = LiveSessionManager()
+    questions = [{
+        "id": "q1",
+        "text": "Benchmark question",
+        "options": [{"id": o, "text": o.upper()} for o in "abcd"],
+        "correct_option_id": "a",
+    }]
+    session = manager.create_session("Benchmark", questions, "bench")
+    player_ids = [manager.join_session(session.access_code, f"p{i}")[1].id for i in range(players)]
+    manager.start_session(session.session_id)
+    manager.advance_to_question(session.session_id)
+
+    server = FakeSocketServer()
+    server.rooms[session.session_id] = players + 1  # players + host
+    server.rooms[f"{session.session_id}:host"] = 1
+    broadcaster = AnswerBroadcaster(
+        server.emit,
+        interval=interval_ms / 1000,
+        leaderboard_size=5,
+        leaderboard_provider=lambda sid, size: manager.get_leaderboard(sid, limit=size),
+    )
+
+    delay = window / players
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for index, player_id in enumerate(player_ids):
+        answer = manager.submit_answer(session.session_id, player_id, "q1", "abcd"[index % 4])
+        progress = manager.get_answer_progress(session.session_id, "q1")
+        broadcaster.record(
+            session.session_id,
+            {
+                "playerId": answer.player_id,
+                "questionId": answer.question_id,
+                "isCorrect": answer.is_correct,
+                "pointsEarned": answer.points_earned,
+                "timeSpent": answer.time_spent,
+            },
+            progress["answeredCount"],
+            progress["correctCount"],
+            progress["totalPlayers"],
+        )
+        target = wall_start + (index + 1) * delay
+        pause = target - time.perf_counter()
+        if pause > 0:
+            time.sleep(pause)
+    if broadcaster.coalescing:
+        time.sleep(broadcaster.interval * 1.5)  # let the last flush happen
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+
+    return {
+        "mode": f"coalesced {interval_ms}ms" if interval_ms > 0 else "per-answer",
+        "frames": server.frames,
+        "frames_per_sec": server.frames / wall,
+        "mbytes": server.bytes / 1e6,
+        "cpu_s": cpu,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=500)
+    parser.add_argument("--window", type=float, default=2.0, help="seconds over which everyone answers")
+    parser.add_argument("--interval-ms", type=int, default=250)
+    args = parser.parse_args()
+
+    print(f"{args.players} players answering within {args.window}s\n")
+    print(f"{'mode':<18}{'frames':>10}{'frames/s':>12}{'MB':>8}{'CPU s':>8}")
+    for interval_ms in (0, args.interval_ms):
+        result = run(args.players, args.window, interval_ms)
+        print(
+            f"{result['mode']:<18}{result['frames']:>10}{result['frames_per_sec']:>12.0f}"
+            f"{result['mbytes']:>8.1f}{result['cpu_s']:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
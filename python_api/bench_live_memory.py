@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Live Session Memory Benchmark
+=============================
+Measures with tracemalloc the memory held by one live session after P
+players answered Q questions through LiveSessionManager (players,
+answers, leaderboard and tallies included).
+
+Usage:
+    python bench_live_memory.py --players 5000 --questions 40
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from live_session import LiveSessionManager
+
+
+def build_questions(count: int):
+    return [{
+        "id": f"q{i + 1}",
+        "text": f"Benchmark question {i + 1}",
+        "options": [{"id": o, "text": o.upper()} for o in "abcd"],
+        "correct_option_id": "a",
+    } for i in range(count)]
+
+
+def run(players: int, questions: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    manager = LiveSessionManager()
+    quiz = build_questions(questions)
+
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+
+    session = manager.create_session("Benchmark", quiz, "bench")
+    player_ids = [manager.join_session(session.access_code, f"Player {i}")[1].id for i in range(players)]
+    gc.collect()
+    joined = tracemalloc.get_traced_memory()[0]
+
+    manager.start_session(session.session_id)
+    for _ in range(questions):
+        question = manager.advance_to_question(session.session_id)
+        for player_id in player_ids:
+            manager.submit_answer(session.session_id, player_id, question.id, rng.choice("abcd"))
+    manager.advance_to_question(session.session_id)
+
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    total = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    answers = players * questions
+    return {
+        "joined_mb": (joined - baseline) / 1e6,
+        "answers_mb": (total - (joined - baseline)) / 1e6,
+        "total_mb": total / 1e6,
+        "per_1k_players_mb": total / 1e6 * 1000 / players,
+        "bytes_per_answer": total / answers,
+        "us_per_answer": elapsed / answers * 1e6,
+        "session": session,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=5000)
+    parser.add_argument("--questions", type=int, default=40)
+    args = parser.parse_args()
+
+    result = run(args.players, args.questions)
+    print(f"{args.players} players x {args.questions} questions ({args.players * args.questions} answers)\n")
+    print(f"after joins         {result['joined_mb']:8.1f} MB")
+    print(f"added by answers    {result['answers_mb']:8.1f} MB")
+    print(f"session memory      {result['total_mb']:8.1f} MB")
+    print(f"per 1k players      {result['per_1k_players_mb']:8.2f} MB")
+    print(f"per answer (total)  {result['bytes_per_answer']:8.0f} bytes")
+    print(f"submit_answer       {result['us_per_answer']:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Near-Duplicate Question Detection Benchmark
+===========================================
+Times NearDuplicateFilter on merged batches of generated questions (the
+chunked / batched generation case) and checks what it catches compared
+with the previous exact MD5 match on the lowercased text.
+
+Each batch mixes unique questions with paraphrased copies (reworded stem,
+shuffled options, changed case and punctuation) and byte-identical copies.
+
+Usage:
+    python bench_question_dedup.py --sizes 50,200,500 --duplicate-ratio 0.2
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from question_dedup import NUMPY_AVAILABLE, NearDuplicateFilter
+
+SUBJECTS = [
+    "la mitochondrie", "le ribosome", "la photosynthese", "la revolution francaise",
+    "le theoreme de Pythagore", "la loi d'Ohm", "la tectonique des plaques", "le cycle de l'eau",
+    "la guerre de Cent Ans", "la respiration cellulaire", "la mondialisation", "le romantisme",
+]
+STEMS = [
+    "Quel est le role de {}", "Que decrit {}", "Quelle est la principale caracteristique de {}",
+    "Dans quel contexte etudie-t-on {}", "Quelle consequence a {}",
+]
+PARAPHRASES = [
+    "D'apres le cours, {}", "{} selon le document", "Selon vous, {}",
+]
+
+
+def random_term(rng):
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(5, 10)))
+
+
+def make_question(rng, index):
+    subject = f"{rng.choice(SUBJECTS)} {random_term(rng)}"
+    return {
+        "text": rng.choice(STEMS).format(subject) + " ?",
+        "options": [{"text": f"{random_term(rng)} {random_term(rng)}", "isCorrect": option == 0}
+                    for option in range(4)],
+    }
+
+
+def paraphrase(rng, question):
+    stem = question["text"].rstrip(" ?")
+    options = list(question["options"])
+    rng.shuffle(options)
+    return {"text": rng.choice(PARAPHRASES).format(stem).upper() + " ?", "options": options}
+
+
+def make_batch(rng, size, duplicate_ratio):
+    duplicates = int(size * duplicate_ratio)
+    questions = [make_question(rng, index) for index in range(size - duplicates)]
+    copies = []
+    for index in range(duplicates):
+        original = rng.choice(questions)
+        copies.append(dict(original) if index % 2 else paraphrase(rng, original))
+    batch = questions + copies
+    rng.shuffle(batch)
+    return batch, duplicates
+
+
+def md5_duplicates(questions):
+    """Previous GroqService behaviour: truncated MD5 of the lowercased text."""
+    seen, duplicates = set(), 0
+    for question in questions:
+        digest = hashlib.md5(question["text"].lower().strip().encode()).hexdigest()[:8]
+        duplicates += digest in seen
+        seen.add(digest)
+    return duplicates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="50,200,500")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.2)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    dedup = NearDuplicateFilter(threshold=args.threshold)
+    print(f"NumPy: {'yes' if NUMPY_AVAILABLE else 'no (exact fallback)'}, threshold {args.threshold}")
+    print(f"{'questions':>10} {'planted':>8} {'md5':>6} {'near-dup':>9} {'ms (best)':>10}")
+    for size in (int(value) for value in args.sizes.split(",")):
+        batch, planted = make_batch(rng, size, args.duplicate_ratio)
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            found = dedup.duplicate_indices(batch)
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{size:>10} {planted:>8} {md5_duplicates(batch):>6} {len(found):>9} {min(timings):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
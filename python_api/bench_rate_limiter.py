@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Rate Limiter Storage Benchmark
+==============================
+Measures the per-request cost of each flask-limiter storage/strategy pair
+and checks that a limit is enforced across worker processes.
+
+  - overhead: ``hit()`` calls on one key per client, spread over C clients,
+    for memory:// (fixed and moving window), sqlite:// (this repo's
+    SQLiteRateLimitStorage) and redis:// when --redis is given;
+  - shared limit: W processes hammer the same key with a limit of N per
+    minute. A shared storage admits N requests in total, memory:// admits
+    N per process.
+
+Usage:
+    python bench_rate_limiter.py --requests 20000 --clients 50 --workers 3
+    python bench_rate_limiter.py --redis redis://localhost:6379/0
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter, MovingWindowRateLimiter
+
+import rate_limit_storage  # noqa: F401 - registers sqlite://
+
+STRATEGIES = {"fixed-window": FixedWindowRateLimiter, "moving-window": MovingWindowRateLimiter}
+
+
+def measure(uri: str, strategy: str, requests: int, clients: int) -> dict:
+    storage = storage_from_string(uri)
+    storage.reset()
+    limiter = STRATEGIES[strategy](storage)
+    item = parse("100 per minute")
+    allowed = 0
+    start = time.perf_counter()
+    for i in range(requests):
+        allowed += limiter.hit(item, "bench", f"10.0.0.{i % clients}")
+    elapsed = time.perf_counter() - start
+    return {"allowed": allowed, "us_per_request": elapsed / requests * 1e6}
+
+
+def _worker(uri: str, limit: int, attempts: int, results):
+    limiter = MovingWindowRateLimiter(storage_from_string(uri))
+    item = parse(f"{limit} per minute")
+    results.put(sum(limiter.hit(item, "shared", "client") for _ in range(attempts)))
+
+
+def shared_limit(uri: str, workers: int, limit: int) -> list:
+    storage_from_string(uri).reset()
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=_worker, args=(uri, limit, limit * 2, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return sorted(results.get() for _ in processes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--redis", help="redis:// URI to include (requires the redis package)")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench-ratelimit-")
+    sqlite_uri = f"sqlite:///{os.path.join(tmp, 'rate_limits.db')}"
+    configs = [
+        ("memory://", "fixed-window"),
+        ("memory://", "moving-window"),
+        (sqlite_uri, "fixed-window"),
+        (sqlite_uri, "moving-window"),
+    ]
+    if args.redis:
+        configs += [(args.redis, "fixed-window"), (args.redis, "moving-window")]
+
+    print(f"Overhead: {args.requests} requests over {args.clients} clients, 100/minute each")
+    print(f"{'storage':<10} {'strategy':<14} {'allowed':>8} {'us/request':>11}")
+    for uri, strategy in configs:
+        result = measure(uri, strategy, args.requests, args.clients)
+        print(f"{uri.split(':')[0]:<10} {strategy:<14} {result['allowed']:>8} {result['us_per_request']:>11.1f}")
+
+    print(f"\nShared limit: {args.workers} processes, {args.limit}/minute on one key")
+    for uri in ["memory://", sqlite_uri] + ([args.redis] if args.redis else []):
+        allowed = shared_limit(uri, args.workers, args.limit)
+        print(f"{uri.split(':')[0]:<10} allowed per process {allowed} -> total {sum(allowed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+Generation par morceaux pour les documents longs (map-reduce).
+
+Au lieu de n'envoyer que les 5000 premiers caracteres au modele:
+  1. le texte est decoupe en morceaux aux frontieres naturelles
+     (paragraphes, puis phrases pour les paragraphes trop longs);
+  2. si le document depasse ``max_chunks`` morceaux, il est divise en
+     ``max_chunks`` sections contigues et le morceau le plus dense de
+     chaque section la represente (couverture du debut a la fin);
+  3. les questions sont reparties entre morceaux proportionnellement a leur
+     densite (termes informatifs distincts);
+  4. chaque morceau est genere en parallele (pool borne), puis les
+     questions sont fusionnees dans l'ordre du document, sans les quasi
+     doublons (paraphrases d'un morceau a l'autre, voir question_dedup).
+"""
+
+import logging
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from question_dedup import NearDuplicateFilter, strip_accents
+
+logger = logging.getLogger(__name__)
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n+")
+_SENTENCE_END = re.compile(r"(?<=[.!?؟])\s+")
+_WORD = re.compile(r"[^\W\d_]{4,}", re.UNICODE)
+
+# Mots frequents sans valeur pour mesurer la densite d'un passage
+_STOPWORDS = {
+    "avec", "dans", "pour", "plus", "cette", "sont", "elle", "elles", "leur", "leurs",
+    "mais", "comme", "tout", "tous", "toute", "toutes", "aussi", "donc", "ainsi", "entre",
+    "etre", "avoir", "fait", "faire", "peut", "peuvent", "nous", "vous", "ils", "dont",
+    "sous", "sans", "chez", "cela", "ceci", "celui", "celle", "ceux", "quel", "quelle",
+    "this", "that", "with", "from", "have", "were", "which", "their", "there", "these",
+    "those", "will", "would", "been", "into", "also", "than", "then", "such", "each",
+}
+
+
+def split_into_chunks(text: str, chunk_chars: int = 5000) -> List[str]:
+    """Decoupe le texte en morceaux d'au plus ``chunk_chars`` aux frontieres naturelles."""
+    pieces = []
+    for paragraph in _PARAGRAPH_BREAK.split(text or ""):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= chunk_chars:
+            pieces.append(paragraph)
+            continue
+        # Paragraphe trop long (PDF sans lignes vides): coupe par phrases
+        for sentence in _SENTENCE_END.split(paragraph):
+            while len(sentence) > chunk_chars:
+                pieces.append(sentence[:chunk_chars])
+                sentence = sentence[chunk_chars:]
+            if sentence.strip():
+                pieces.append(sentence.strip())
+
+    chunks = []
+    current = []
+    current_size = 0
+    for piece in pieces:
+        if current and current_size + len(piece) + 2 > chunk_chars:
+            chunks.append("\n\n".join(current))
+            current, current_size = [], 0
+        current.append(piece)
+        current_size += len(piece) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def chunk_density(chunk: str) -> int:
+    """Nombre de termes informatifs distincts (mots de 4 lettres ou plus, hors mots vides)."""
+    terms = set()
+    for word in _WORD.findall(chunk.lower()):
+        word = strip_accents(word)
+        if word not in _STOPWORDS:
+            terms.add(word)
+    return len(terms)
+
+
+def select_chunks(chunks: List[str], max_chunks: int) -> List[int]:
+    """Indices des morceaux retenus: le plus dense de chaque section contigue."""
+    if len(chunks) <= max_chunks:
+        return list(range(len(chunks)))
+    section_size = len(chunks) / max_chunks
+    selected = []
+    for section in range(max_chunks):
+        start = int(section * section_size)
+        end = max(start + 1, int((section + 1) * section_size))
+        selected.append(max(range(start, end), key=lambda index: chunk_density(chunks[index])))
+    return selected
+
+
+def allocate_questions(weights: List[float], total: int) -> List[int]:
+    """Repartit ``total`` questions proportionnellement aux poids (plus forts restes)."""
+    if not weights or total <= 0:
+        return [0] * len(weights)
+    weights = [max(weight, 1) for weight in weights]
+    if total <= len(weights):
+        # Moins de questions que de morceaux: une question pour les plus denses
+        ranked = sorted(range(len(weights)), key=lambda index: -weights[index])[:total]
+        return [1 if index in ranked else 0 for index in range(len(weights))]
+
+    # Au moins une question par morceau, le reste au prorata de la densite
+    remaining = total - len(weights)
+    weight_sum = sum(weights)
+    quotas = [remaining * weight / weight_sum for weight in weights]
+    allocation = [1 + math.floor(quota) for quota in quotas]
+    leftovers = total - sum(allocation)
+    by_remainder = sorted(range(len(weights)), key=lambda index: -(quotas[index] - math.floor(quotas[index])))
+    for index in by_remainder[:leftovers]:
+        allocation[index] += 1
+    return allocation
+
+
+def plan_chunks(text: str, total_questions: int, chunk_chars: int = 5000,
+                max_chunks: int = 6) -> List[Tuple[str, int]]:
+    """Liste (morceau, nombre de questions) dans l'ordre du document, sans morceau a 0."""
+    chunks = split_into_chunks(text, chunk_chars)
+    selected = [chunks[index] for index in select_chunks(chunks, max_chunks)]
+    allocation = allocate_questions([chunk_density(chunk) for chunk in selected], total_questions)
+    return [(chunk, count) for chunk, count in zip(selected, allocation) if count > 0]
+
+
+def build_course_excerpt(text: str, max_chars: int, chunk_chars: int = 1500) -> str:
+    """Extrait representatif d'au plus ``max_chars`` couvrant tout le document.
+
+    Pour les prompts a appel unique: plutot que ``text[:max_chars]``, un
+    morceau dense par section du document, dans l'ordre d'origine.
+    """
+    text = (text or "").strip()
+    if len(text) <= max_chars:
+        return text
+    chunks = split_into_chunks(text, chunk_chars)
+    average_size = sum(len(chunk) + 2 for chunk in chunks) / len(chunks)
+    count = max(1, int(max_chars // average_size))
+    excerpt = "\n\n".join(chunks[index] for index in select_chunks(chunks, count))
+    return excerpt[:max_chars]
+
+
+def merge_questions(results: List[List[Dict]], dedup: Optional[NearDuplicateFilter] = None) -> List[Dict]:
+    """Concatene les questions par morceau (ordre du document) sans quasi doublons."""
+    merged = [question for questions in results for question in questions]
+    kept, _ = (dedup or NearDuplicateFilter()).filter(merged)
+    return kept
+
+
+class ChunkedGenerator:
+    """Execute les generations par morceau sur un pool de threads borne."""
+
+    def __init__(self, max_workers: int = 4, dedup: Optional[NearDuplicateFilter] = None):
+        self.max_workers = max_workers
+        self.dedup = dedup or NearDuplicateFilter()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="quiz-chunk")
+
+    def run(self, plan: List[Tuple[str, int]],
+            generate: Callable[[str, int], Tuple[str, List[Dict]]]) -> Tuple[List[Dict], List[str], List[str]]:
+        """Retourne (questions fusionnees, fournisseurs par morceau, erreurs).
+
+        ``generate(morceau, nombre)`` retourne (fournisseur, questions) ou leve
+        ValueError; un morceau en echec n'empeche pas les autres.
+        """
+        futures = [self._executor.submit(generate, chunk, count) for chunk, count in plan]
+        results: List[List[Dict]] = []
+        providers: List[str] = []
+        errors: List[str] = []
+        for index, future in enumerate(futures):
+            try:
+                provider, questions = future.result()
+            except ValueError as e:
+                errors.append(f"morceau {index + 1}: {e}")
+                logger.warning(f"Morceau {index + 1}/{len(plan)} en echec: {e}")
+                continue
+            providers.append(provider)
+            # Un modele peut depasser le nombre demande: on s'en tient au quota
+            results.append(questions[:plan[index][1]])
+        return merge_questions(results, self.dedup), providers, errors
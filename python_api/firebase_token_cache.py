@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+Cache des tokens d'identification Firebase verifies (require_auth).
+
+Un meme token Bearer est rejoue des dizaines de fois par session live
+(/api/live/session/<id>/next, /start, /create). Au lieu d'une verification
+de signature RSA (et d'un eventuel telechargement des certificats Google) a
+chaque requete:
+
+  - VerifiedTokenCache garde les claims decodes, indexes par l'empreinte
+    BLAKE2 du token (jamais le token lui-meme), jusqu'a leur ``exp``. LRU
+    borne (AUTH_TOKEN_CACHE_SIZE entrees). Un token expire ou invalide
+    repasse par firebase_admin et leve ses exceptions habituelles;
+  - avec AUTH_CHECK_REVOKED=1 (revocation et comptes desactives verifies,
+    un appel reseau), une entree n'est gardee que
+    AUTH_REVOCATION_CHECK_INTERVAL secondes: une revocation est vue au plus
+    tard apres cet intervalle;
+  - CachedCertificateRequest garde les certificats publics Google selon leur
+    Cache-Control max-age; ils sont charges au demarrage (warm) pour que la
+    premiere requete authentifiee n'attende pas le telechargement.
+"""
+
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ID_TOKEN_CERT_URL = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+def token_digest(token: str) -> str:
+    return hashlib.blake2b(token.encode("utf-8"), digest_size=20).hexdigest()
+
+
+class CachedCertificateRequest:
+    """Transport google-auth: reponses GET gardees jusqu'a leur max-age.
+
+    Enveloppe le transport de firebase_admin (meme interface ``__call__``).
+    """
+
+    def __init__(self, delegate, default_ttl: float = 3600.0, min_ttl: float = 60.0):
+        self._delegate = delegate
+        self.default_ttl = default_ttl
+        self.min_ttl = min_ttl
+        self._responses: Dict[str, Tuple[Any, float]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.fetches = 0
+
+    def __call__(self, url, method="GET", body=None, headers=None, timeout=None, **kwargs):
+        if method != "GET" or body is not None:
+            return self._delegate(url, method=method, body=body, headers=headers, timeout=timeout, **kwargs)
+        with self._lock:
+            cached = self._responses.get(url)
+            if cached is not None and cached[1] > time.time():
+                self.hits += 1
+                return cached[0]
+        response = self._delegate(url, method=method, headers=headers, timeout=timeout, **kwargs)
+        with self._lock:
+            self.fetches += 1
+            if response.status == 200:
+                self._responses[url] = (response, time.time() + self._ttl(response.headers))
+        return response
+
+    def _ttl(self, headers) -> float:
+        match = _MAX_AGE.search((headers or {}).get("Cache-Control", ""))
+        return max(self.min_ttl, float(match.group(1))) if match else self.default_ttl
+
+    def warm(self, url: str = ID_TOKEN_CERT_URL):
+        try:
+            self(url)
+            logger.info("Certificats Firebase charges")
+        except Exception as e:
+            logger.warning(f"Prechargement des certificats Firebase impossible: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.time()
+            return {
+                "hits": self.hits,
+                "fetches": self.fetches,
+                "expiresIn": {url: round(expires - now) for url, (_, expires) in self._responses.items()},
+            }
+
+
+def install_certificate_cache(firebase_auth, app) -> Optional[CachedCertificateRequest]:
+    """Remplace le transport de verification de firebase_admin par CachedCertificateRequest.
+
+    S'appuie sur un attribut interne du SDK: si sa structure change, la
+    verification reste celle du SDK (cache HTTP cachecontrol) et None est rendu.
+    """
+    try:
+        verifier = firebase_auth._get_client(app)._token_verifier
+        certificates = CachedCertificateRequest(verifier.request)
+        verifier.request = certificates
+    except AttributeError as e:
+        logger.warning(f"Cache des certificats Firebase non installe: {e}")
+        return None
+    return certificates
+
+
+class VerifiedTokenCache:
+    """Claims des tokens verifies, par empreinte, jusqu'a leur expiration."""
+
+    def __init__(
+        self,
+        verify: Callable[..., Dict[str, Any]],
+        max_entries: int = 10000,
+        check_revoked: bool = False,
+        revocation_interval: float = 300.0,
+    ):
+        self._verify = verify
+        self.max_entries = max_entries
+        self.check_revoked = check_revoked
+        self.revocation_interval = revocation_interval
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        self.expired = 0
+        self.evicted = 0
+        self.verify_seconds = 0.0
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """Claims du token; leve les exceptions de ``verify`` si le token est refuse."""
+        key = token_digest(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self._entries[key]
+                self.expired += 1
+            self.misses += 1
+
+        start = time.perf_counter()
+        try:
+            claims = self._verify(token, check_revoked=self.check_revoked)
+        except Exception:
+            with self._lock:
+                self.failures += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.verify_seconds += elapsed
+
+        expires_at = float(claims.get("exp") or 0)
+        if self.check_revoked:
+            expires_at = min(expires_at, now + self.revocation_interval)
+        if self.max_entries > 0 and expires_at > time.time():
+            with self._lock:
+                self._entries[key] = (claims, expires_at)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evicted += 1
+        return claims
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / lookups, 3) if lookups else None,
+                "failures": self.failures,
+                "expired": self.expired,
+                "evicted": self.evicted,
+                "avgVerifyMs": round(self.verify_seconds * 1000 / self.misses, 2) if self.misses else None,
+                "checkRevoked": self.check_revoked,
+            }
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+File de generation asynchrone (mode job de /api/generate).
+
+POST /api/generate/jobs rend un identifiant immediatement; l'extraction et
+la generation tournent dans un pool borne (GENERATION_JOB_WORKERS) au lieu
+d'occuper le worker HTTP pendant tout l'aller-retour LLM. Au-dela de
+GENERATION_JOB_MAX_PENDING jobs en attente ou en cours, la file refuse.
+
+Les etats des jobs sont ecrits dans un cache de resultats (memory:// ou
+sqlite:////data/generation_jobs.db): avec le store SQLite, n'importe quel
+worker repond au suivi GET /api/generate/jobs/<id>. Chaque changement
+d'etat est aussi notifie (emit SocketIO dans la salle du job).
+
+Un job reste "running" si le worker qui l'execute meurt: ``job_timeout``
+secondes apres son demarrage (``startedAt``), il est rapporte en echec. Un
+job encore "queued" n'echoue qu'apres l'attente maximale de la file
+(``queue_timeout``: les ``max_pending`` jobs devant lui, ``max_workers`` a
+la fois, chacun borne par ``job_timeout``).
+"""
+
+import logging
+import math
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from result_cache import ResultCache
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobQueueFullError(RuntimeError):
+    """Trop de jobs en attente dans ce worker."""
+
+
+def job_room(job_id: str) -> str:
+    """Salle SocketIO des notifications d'un job."""
+    return f"job:{job_id}"
+
+
+class GenerationJobQueue:
+    """Pool borne + etats des jobs dans un ResultCache partageable."""
+
+    def __init__(
+        self,
+        store: ResultCache,
+        max_workers: int = 2,
+        max_pending: int = 20,
+        job_timeout: float = 600.0,
+        notify: Optional[Callable[[Dict[str, Any]], None]] = None,
+        error_payload: Optional[Callable[[Exception], Dict[str, Any]]] = None,
+    ):
+        self.store = store
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.job_timeout = job_timeout
+        self.queue_timeout = job_timeout * (math.ceil(max_pending / max(1, max_workers)) + 1)
+        self.notify = notify
+        self.error_payload = error_payload or (lambda exc: {"error": str(exc)})
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="quiz-job")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def submit(self, run: Callable[[], Dict[str, Any]], owner: Optional[str] = None) -> Dict[str, Any]:
+        """Enregistre un job ``queued`` et planifie ``run()``; leve JobQueueFullError si la file est pleine."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise JobQueueFullError(f"{self._pending} jobs de generation en attente")
+            self._pending += 1
+            self.submitted += 1
+        record = self._new_record(owner, QUEUED)
+        self._save(record)
+        try:
+            self._executor.submit(self._run, record, run)
+        except RuntimeError:
+            with self._lock:
+                self._pending -= 1
+            raise
+        return record
+
+    def complete(self, result: Dict[str, Any], owner: Optional[str] = None) -> Dict[str, Any]:
+        """Job deja termine (resultat servi par le cache): meme suivi, sans passer par le pool."""
+        record = self._new_record(owner, DONE)
+        record["startedAt"] = record["finishedAt"] = record["createdAt"]
+        record["result"] = result
+        self._save(record)
+        return record
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        record = self.store.get(job_id)
+        if record is None:
+            return None
+        if self._interrupted(record, time.time()):
+            # Worker arrete (redemarrage, crash) avant d'avoir conclu
+            record = {**record, "status": FAILED, "finishedAt": time.time(),
+                      "error": {"error": "Le job de generation a ete interrompu. Veuillez reessayer."}}
+            self.store.set(job_id, record)
+        return record
+
+    def _interrupted(self, record: Dict[str, Any], now: float) -> bool:
+        if record["status"] == RUNNING:
+            return now - (record["startedAt"] or record["createdAt"]) > self.job_timeout
+        if record["status"] == QUEUED:
+            return now - record["createdAt"] > self.queue_timeout
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "pending": self._pending,
+                "maxPending": self.max_pending,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "store": self.store.stats()["backend"],
+            }
+
+    @staticmethod
+    def _new_record(owner: Optional[str], status: str) -> Dict[str, Any]:
+        return {
+            "jobId": uuid.uuid4().hex,
+            "status": status,
+            "owner": owner,
+            "createdAt": time.time(),
+            "startedAt": None,
+            "finishedAt": None,
+            "result": None,
+            "error": None,
+        }
+
+    def _run(self, record: Dict[str, Any], run: Callable[[], Dict[str, Any]]):
+        record = {**record, "status": RUNNING, "startedAt": time.time()}
+        self._save(record)
+        try:
+            result = run()
+            record = {**record, "status": DONE, "result": result}
+            counter = "completed"
+        except Exception as e:
+            logger.warning(f"Job de generation {record['jobId']} en echec: {e}")
+            record = {**record, "status": FAILED, "error": self.error_payload(e)}
+            counter = "failed"
+        record["finishedAt"] = time.time()
+        with self._lock:
+            self._pending -= 1
+            setattr(self, counter, getattr(self, counter) + 1)
+        self._save(record)
+
+    def _save(self, record: Dict[str, Any]):
+        self.store.set(record["jobId"], record)
+        if self.notify is not None:
+            try:
+                self.notify(record)
+            except Exception as e:
+                logger.warning(f"Notification du job {record['jobId']} impossible: {e}")
@@ -4,13 +4,17 @@ https://console.groq.com/docs/quickstart
 """
 
 import os
-import json
 import logging
 import time
-import hashlib
 from typing import List, Dict, Any, Optional, Set
 from groq import Groq
 from dotenv import load_dotenv
+from question_dedup import NearDuplicateFilter
+from provider_clients import get_provider_clients
+from provider_health import get_provider_health
+from prompt_budget import get_prompt_budget
+from provider_http import parse_retry_after
+from response_parser import parse_json_response
 
 # Charger les variables d'environnement
 load_dotenv()
@@ -20,6 +24,7 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")  # Ultra-rapide (nouveau modèle 2025)
 MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "3"))
 RETRY_DELAY = float(os.getenv("GROQ_RETRY_DELAY", "1.0"))  # secondes
+DEDUP_THRESHOLD = float(os.getenv("GENERATION_DEDUP_THRESHOLD", "0.8"))
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -40,48 +45,40 @@ class GroqService:
         if not self.api_key:
             raise ValueError("GROQ_API_KEY must be set in environment or provided")
         
-        self.client = Groq(api_key=self.api_key)
+        # One Groq client (and connection pool) per key for the whole process
+        self.client = get_provider_clients().get("groq", self.api_key, lambda: Groq(api_key=self.api_key))
         self.model = model
+        self.dedup = NearDuplicateFilter(threshold=DEDUP_THRESHOLD)
         logger.info(f"✅ GroqService initialized with model: {model}")
     
     def is_available(self) -> bool:
-        """Check if Groq service is available"""
-        try:
-            # Test simple request
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": "test"}],
-                max_tokens=10,
-                temperature=0.1
-            )
-            return bool(response.choices[0].message.content)
-        except Exception as e:
-            logger.error(f"❌ Groq unavailable: {e}")
-            return False
+        """Check if Groq service is available (models list, cached; no completion tokens spent)"""
+        available = get_provider_clients().is_available("groq", self.api_key, self._probe)
+        if not available:
+            logger.error("❌ Groq unavailable")
+        return available
+
+    def _probe(self) -> bool:
+        models = self.client.models.list()
+        return any(model.id == self.model for model in models.data)
     
-    def _detect_duplicates(self, questions: List[Dict[str, Any]]) -> Set[str]:
-        """Detect duplicate questions by text similarity"""
-        seen_hashes = set()
-        duplicates = set()
-        
-        for i, q in enumerate(questions):
-            # Create hash from normalized question text
-            text_normalized = q.get('text', '').lower().strip()
-            text_hash = hashlib.md5(text_normalized.encode()).hexdigest()[:8]
-            
-            if text_hash in seen_hashes:
-                duplicates.add(i)
-                logger.warning(f"🔍 Duplicate detected: Question {i+1}")
-            else:
-                seen_hashes.add(text_hash)
-        
+    def _detect_duplicates(self, questions: List[Dict[str, Any]]) -> Set[int]:
+        """Detect near-duplicate questions (paraphrases, reordered options)"""
+        duplicates = set(self.dedup.duplicate_indices(questions))
+        for i in sorted(duplicates):
+            logger.warning(f"🔍 Duplicate detected: Question {i+1}")
         return duplicates
     
     def _call_groq_with_retry(self, messages: List[Dict], temperature: float, max_tokens: int) -> str:
-        """Call Groq API with exponential backoff retry"""
+        """Call Groq API with exponential backoff retry (skipped while the key's circuit is open)"""
         last_error = None
+        health = get_provider_health()
         
         for attempt in range(MAX_RETRIES):
+            if not health.is_available("groq", self.api_key):
+                logger.error("❌ Groq key circuit open (rate limited, rejected or failing), no retry")
+                raise last_error or ValueError("Groq key temporarily skipped (circuit open)")
+            start = time.time()
             try:
                 logger.debug(f"🔄 Attempt {attempt + 1}/{MAX_RETRIES}...")
                 
@@ -94,11 +91,32 @@ class GroqService:
                     response_format={"type": "json_object"}
                 )
                 
-                return response.choices[0].message.content
+                health.record_success("groq", self.api_key, time.time() - start)
+                content = response.choices[0].message.content
+                usage = getattr(response, "usage", None)
+                if usage is not None:
+                    get_prompt_budget().record_usage(
+                        self.model, messages[-1]["content"], content,
+                        getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None),
+                    )
+                return content
                 
             except Exception as e:
                 last_error = e
                 error_str = str(e).lower()
+                status_code = getattr(e, "status_code", None)
+                health.record_failure(
+                    "groq",
+                    self.api_key,
+                    status_code,
+                    parse_retry_after(getattr(getattr(e, "response", None), "headers", None)),
+                    time.time() - start,
+                )
+                
+                # Rate limit: backing off 1s/2s/4s won't outlast the quota reset
+                if status_code == 429:
+                    logger.error(f"❌ Rate limited, circuit opened, no retry")
+                    raise
                 
                 # Don't retry on certain errors
                 if 'authentication' in error_str or 'api_key' in error_str:
@@ -150,8 +168,10 @@ class GroqService:
             "hard": "difficile (niveau expert)"
         }
         
-        # Adapter la longueur du texte selon le nombre de questions
-        text_length = min(5000 if num_questions <= 10 else 8000, len(text))
+        # Texte ajuste a la fenetre du modele; pour un document plus long,
+        # extrait couvrant tout le document (pas seulement le debut)
+        budget = get_prompt_budget()
+        source_text = budget.fit_source(text, self.model, num_questions)
         
         prompt = f"""Tu es un expert en création de quiz éducatifs. Génère EXACTEMENT {num_questions} questions à choix multiples (QCM) basées sur le texte fourni.
 
@@ -167,7 +187,7 @@ class GroqService:
 7. **NOMBRE DE QUESTIONS REQUIS: {num_questions}**
 
 **TEXTE SOURCE:**
-{text[:text_length]}
+{source_text}
 
 **FORMAT JSON REQUIS:**
 {{
@@ -189,11 +209,8 @@ class GroqService:
 RÉPONDS UNIQUEMENT AVEC LE JSON, SANS AUTRE TEXTE."""
 
         try:
-            # Calculer max_tokens en fonction du nombre de questions
-            # 1 question ≈ 250 tokens (texte + 4 options + explication)
-            # Ajouter 20% de marge pour sécurité
-            estimated_tokens = int(num_questions * 250 * 1.2)
-            max_tokens_needed = max(4096, min(estimated_tokens, 8192))  # Entre 4096 et 8192
+            # max_tokens from the tokens per question observed for this model
+            max_tokens_needed = budget.output_tokens(self.model, num_questions)
             
             logger.info(f"📊 Token estimation: {num_questions} questions → {max_tokens_needed} max_tokens")
             
@@ -216,8 +233,12 @@ RÉPONDS UNIQUEMENT AVEC LE JSON, SANS AUTRE TEXTE."""
             logger.info(f"⚡ Generation completed in {generation_time:.2f}s")
             logger.debug(f"Raw response: {content[:200]}...")
             
-            # Parse JSON
-            data = json.loads(content)
+            # Parse JSON (truncated output keeps its complete questions)
+            parsed = parse_json_response(content)
+            data = parsed.data
+            if parsed.truncated:
+                logger.warning(f"⚠️ Truncated response: recovered {parsed.recovered} complete questions")
+            budget.observe(self.model, len(data.get("questions") or []), content)
             questions = data.get("questions", [])
             
             if not questions:
@@ -286,11 +307,6 @@ RÉPONDS UNIQUEMENT AVEC LE JSON, SANS AUTRE TEXTE."""
             
             return validated_questions
             
-        except json.JSONDecodeError as e:
-            logger.error(f"❌ JSON parsing error: {e}")
-            logger.error(f"Response content: {content[:500]}")
-            raise ValueError(f"Invalid JSON response from Groq: {e}")
-        
         except Exception as e:
             logger.error(f"❌ Groq generation error: {e}")
             raise
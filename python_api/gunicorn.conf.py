@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+Configuration gunicorn de l'API QUIZO.
+
+Le worker est choisi selon SOCKETIO_ASYNC_MODE (meme variable que app.py):
+  - threading : workers gthread (un thread OS par requete / WebSocket)
+  - gevent    : worker gevent-websocket, des milliers de sockets live et
+                d'appels LLM lents par processus (greenlets)
+
+En mode asynchrone un seul worker suffit par defaut. Pour plusieurs
+workers (WEB_CONCURRENCY > 1) ou plusieurs hotes, definir
+SOCKETIO_MESSAGE_QUEUE (ex: redis://...) afin que les emits SocketIO
+atteignent les clients connectes aux autres processus.
+"""
+
+import os
+
+ASYNC_MODE = os.getenv("SOCKETIO_ASYNC_MODE", "threading").strip().lower()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "300"))
+keepalive = 5
+max_requests = 1000
+max_requests_jitter = 50
+
+if ASYNC_MODE == "gevent":
+    worker_class = "geventwebsocket.gunicorn.workers.GeventWebSocketWorker"
+    worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "2000"))
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+else:
+    worker_class = "gthread"
+    threads = int(os.getenv("GUNICORN_THREADS", "8"))
+    workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+
+
+def when_ready(server):
+    if workers > 1 and not os.getenv("SOCKETIO_MESSAGE_QUEUE"):
+        server.log.warning(
+            "%s workers sans SOCKETIO_MESSAGE_QUEUE: les evenements live emis par un "
+            "worker n'atteindront pas les clients connectes aux autres.", workers
+        )
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Columnar Answer Storage for Live Sessions
+=========================================
+One AnswerTable per session holds every answer in flat arrays indexed by
+``player row x question column`` instead of one PlayerAnswer object (and
+its dict entry, with repeated id strings) per answer:
+
+  option      array('b')  option index in the question, -1 = unanswered
+  correct     array('b')
+  time_spent  array('f')  seconds, rounded to 2 decimals when read
+  points      array('i')
+  timestamp   array('d')
+
+That is 18 bytes per cell. ``Player.answers`` becomes a PlayerAnswers
+view over its row: a read-only mapping question id -> PlayerAnswer,
+materialized on access, so existing readers (``.get``, ``.values()``,
+``in``, ``len``) work unchanged. Answers are frozen values written only by
+LiveSession.record_answer, which keeps the player's score, time and streak
+aggregates, the tallies and the leaderboard in step with the table.
+
+Runtime-only like live_index: shared stores rebuild the table when a
+session snapshot is decoded (see LiveSession.from_state).
+"""
+
+from array import array
+from collections.abc import Mapping
+from typing import Callable, Dict, List, Tuple
+
+UNANSWERED = -1
+OTHER_OPTION = -2  # option id not in the question, kept in AnswerTable.other
+
+
+class AnswerTable:
+    """Answers of one session, one row per player and one column per question."""
+
+    def __init__(self, questions, answer_type: Callable):
+        self.answer_type = answer_type
+        self.question_ids: List[str] = [q.id for q in questions]
+        self.column: Dict[str, int] = {qid: i for i, qid in enumerate(self.question_ids)}
+        self.option_ids: List[List[str]] = [[opt["id"] for opt in q.options] for q in questions]
+        self.option_index: List[Dict[str, int]] = [
+            {option_id: i for i, option_id in enumerate(options)} for options in self.option_ids
+        ]
+        self.width = len(self.question_ids)
+        self.player_ids: List[str] = []
+        self.counts = array("I")
+        self.option = array("b")
+        self.correct = array("b")
+        self.time_spent = array("f")
+        self.points = array("i")
+        self.timestamp = array("d")
+        self.other: Dict[int, str] = {}
+        self._blank = (
+            array("b", [UNANSWERED]) * self.width,
+            array("b", [0]) * self.width,
+            array("f", [0.0]) * self.width,
+            array("i", [0]) * self.width,
+            array("d", [0.0]) * self.width,
+        )
+
+    def __len__(self) -> int:
+        return len(self.player_ids)
+
+    def add_player(self, player_id: str) -> int:
+        """Append an empty row; returns its index."""
+        self.player_ids.append(player_id)
+        self.counts.append(0)
+        for column, blank in zip(self._columns(), self._blank):
+            column.extend(blank)
+        return len(self.player_ids) - 1
+
+    def _columns(self) -> Tuple[array, ...]:
+        return self.option, self.correct, self.time_spent, self.points, self.timestamp
+
+    def _cell(self, row: int, question_id: str) -> int:
+        column = self.column.get(question_id)
+        if column is None:
+            raise KeyError(question_id)
+        return row * self.width + column
+
+    def get(self, row: int, question_id: str):
+        column = self.column.get(question_id)
+        if column is None:
+            return None
+        cell = row * self.width + column
+        option = self.option[cell]
+        if option == UNANSWERED:
+            return None
+        return self.answer_type(
+            self.player_ids[row],
+            self.question_ids[column],
+            self.other[cell] if option == OTHER_OPTION else self.option_ids[column][option],
+            bool(self.correct[cell]),
+            round(self.time_spent[cell], 2),
+            self.points[cell],
+            self.timestamp[cell],
+        )
+
+    def set(self, row: int, question_id: str, answer):
+        cell = self._cell(row, question_id)
+        option = self.option_index[cell % self.width].get(answer.selected_option_id, OTHER_OPTION)
+        if self.option[cell] == UNANSWERED:
+            self.counts[row] += 1
+        self.other.pop(cell, None)
+        if option == OTHER_OPTION:
+            self.other[cell] = answer.selected_option_id
+        self.option[cell] = option
+        self.correct[cell] = answer.is_correct
+        self.time_spent[cell] = answer.time_spent
+        self.points[cell] = answer.points_earned
+        self.timestamp[cell] = answer.timestamp
+
+    def answered(self, row: int, question_id: str) -> bool:
+        column = self.column.get(question_id)
+        return column is not None and self.option[row * self.width + column] != UNANSWERED
+
+    def answered_ids(self, row: int) -> List[str]:
+        start = row * self.width
+        return [
+            qid for qid, option in zip(self.question_ids, self.option[start:start + self.width])
+            if option != UNANSWERED
+        ]
+
+
+class PlayerAnswers(Mapping):
+    """A player's answers (question id -> PlayerAnswer), backed by an AnswerTable row.
+
+    Read-only: answers are recorded through LiveSession.record_answer.
+    """
+
+    __slots__ = ("table", "row")
+
+    def __init__(self, table: AnswerTable, row: int):
+        self.table = table
+        self.row = row
+
+    def __getitem__(self, question_id):
+        answer = self.table.get(self.row, question_id)
+        if answer is None:
+            raise KeyError(question_id)
+        return answer
+
+    def get(self, question_id, default=None):
+        answer = self.table.get(self.row, question_id)
+        return default if answer is None else answer
+
+    def __contains__(self, question_id):
+        return self.table.answered(self.row, question_id)
+
+    def __iter__(self):
+        return iter(self.table.answered_ids(self.row))
+
+    def __len__(self):
+        return self.table.counts[self.row]
+
+    def __repr__(self):
+        return f"PlayerAnswers({dict(self.items())!r})"
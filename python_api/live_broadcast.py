@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Live Answer Broadcast Aggregator
+================================
+Coalesces per-answer SocketIO events into periodic frames.
+
+Without coalescing every answer is emitted to the whole room, so P players
+answering the same question produce P x P frames. The aggregator instead
+buffers answers per session and, every ``interval`` seconds, emits:
+
+  - ``answers_progress`` to the session room: counts for the current
+    question, plus the top-K leaderboard when it changed
+  - ``answers_detail`` to the host sub-room (``<session_id>:host``): the
+    individual answers received since the last flush
+
+With ``interval <= 0`` the legacy per-answer ``answer_submitted`` event is
+emitted immediately (useful for debugging and for the benchmark).
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def host_room(session_id: str) -> str:
+    """Name of the SocketIO room reserved for the session host."""
+    return f"{session_id}:host"
+
+
+class _PendingProgress:
+    __slots__ = ("question_id", "answered_count", "correct_count", "total_players",
+                 "new_answers", "new_correct", "details")
+
+    def __init__(self):
+        self.question_id = None
+        self.answered_count = 0
+        self.correct_count = 0
+        self.total_players = 0
+        self.new_answers = 0
+        self.new_correct = 0
+        self.details: List[Dict] = []
+
+
+class AnswerBroadcaster:
+    """
+    Per-session answer event aggregator.
+
+    ``emit`` has the ``socketio.emit(event, data, room=...)`` signature.
+    ``start_task``/``sleep`` default to threads but should be
+    ``socketio.start_background_task``/``socketio.sleep`` so the flush loop
+    cooperates with gevent workers.
+    """
+
+    def __init__(
+        self,
+        emit: Callable,
+        interval: float = 0.25,
+        leaderboard_size: int = 0,
+        leaderboard_provider: Optional[Callable[[str, int], List[Dict]]] = None,
+        start_task: Optional[Callable] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.emit = emit
+        self.interval = interval
+        self.leaderboard_size = leaderboard_size
+        self.leaderboard_provider = leaderboard_provider
+        self._start_task = start_task
+        self._sleep = sleep
+        self._pending: Dict[str, _PendingProgress] = {}
+        self._last_top: Dict[str, List] = {}
+        self._lock = threading.Lock()
+        self._running = False
+        self.frames_emitted = 0
+
+    @property
+    def coalescing(self) -> bool:
+        return self.interval > 0
+
+    def record(self, session_id: str, answer_data: Dict, answered_count: int,
+               correct_count: int, total_players: int):
+        """Register one answer; emits immediately only when coalescing is off."""
+        if not self.coalescing:
+            self.emit("answer_submitted", answer_data, room=session_id)
+            self.frames_emitted += 1
+            return
+
+        with self._lock:
+            pending = self._pending.get(session_id)
+            if pending is None:
+                pending = self._pending[session_id] = _PendingProgress()
+            if pending.question_id != answer_data.get("questionId"):
+                pending.question_id = answer_data.get("questionId")
+                pending.answered_count = pending.correct_count = 0
+                pending.new_answers = pending.new_correct = 0
+            # Counts come from the store, so keep the highest seen
+            pending.answered_count = max(pending.answered_count, answered_count)
+            pending.correct_count = max(pending.correct_count, correct_count)
+            pending.total_players = total_players
+            pending.new_answers += 1
+            if answer_data.get("isCorrect"):
+                pending.new_correct += 1
+            pending.details.append(answer_data)
+
+        self._ensure_running()
+
+    def forget(self, session_id: str):
+        """Drop buffered state of a finished or deleted session (``flush`` it first
+        to deliver the answers still buffered)."""
+        with self._lock:
+            self._pending.pop(session_id, None)
+            self._last_top.pop(session_id, None)
+
+    def flush(self, session_id: Optional[str] = None) -> int:
+        """Emit buffered deltas of every session, or of ``session_id`` only.
+        Returns the number of emits."""
+        with self._lock:
+            if session_id is None:
+                pending, self._pending = self._pending, {}
+            else:
+                progress = self._pending.pop(session_id, None)
+                pending = {session_id: progress} if progress else {}
+
+        emitted = 0
+        for session_id, progress in pending.items():
+            payload = {
+                "questionId": progress.question_id,
+                "answeredCount": progress.answered_count,
+                "correctCount": progress.correct_count,
+                "totalPlayers": progress.total_players,
+                "newAnswers": progress.new_answers,
+                "newCorrect": progress.new_correct,
+            }
+            top = self._leaderboard_delta(session_id)
+            if top is not None:
+                payload["leaderboard"] = top
+            self.emit("answers_progress", payload, room=session_id)
+            self.emit("answers_detail", {"answers": progress.details}, room=host_room(session_id))
+            emitted += 2
+
+        self.frames_emitted += emitted
+        return emitted
+
+    def _leaderboard_delta(self, session_id: str):
+        if not self.leaderboard_size or not self.leaderboard_provider:
+            return None
+        top = self.leaderboard_provider(session_id, self.leaderboard_size)
+        signature = [(entry["playerId"], entry["score"]) for entry in top]
+        if self._last_top.get(session_id) == signature:
+            return None
+        self._last_top[session_id] = signature
+        return top
+
+    def _ensure_running(self):
+        if self._running:
+            return
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+        if self._start_task:
+            self._start_task(self._run)
+        else:
+            threading.Thread(target=self._run, name="answer-broadcaster", daemon=True).start()
+
+    def _run(self):
+        while True:
+            self._sleep(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Live answer broadcast failed: {e}")
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental Indexes for Live Sessions
+=====================================
+Structures kept up to date by LiveSession.record_answer so that
+read paths (leaderboard polls, reveal screen) never rescan every player.
+
+They are runtime-only: shared stores rebuild them when a session snapshot
+is decoded (see LiveSession.from_state).
+"""
+
+from bisect import bisect_left, insort
+from typing import Dict, List, Tuple
+
+
+class LeaderboardIndex:
+    """
+    Players ordered by (-score, joined_at, player_id).
+
+    Keys live in a bisect-maintained sorted list: rank lookups are
+    O(log P) and a top-K page is a slice.
+    """
+
+    def __init__(self):
+        self._keys: List[Tuple[int, float, str]] = []
+        self._key_of: Dict[str, Tuple[int, float, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def update(self, player):
+        """Insert the player or move it after a score change."""
+        new_key = (-player.score, player.joined_at, player.id)
+        old_key = self._key_of.get(player.id)
+        if old_key == new_key:
+            return
+        if old_key is not None:
+            del self._keys[bisect_left(self._keys, old_key)]
+        insort(self._keys, new_key)
+        self._key_of[player.id] = new_key
+
+    def remove(self, player_id: str):
+        old_key = self._key_of.pop(player_id, None)
+        if old_key is not None:
+            del self._keys[bisect_left(self._keys, old_key)]
+
+    def rank(self, player_id: str) -> int:
+        """1-based rank of a player, 0 if unknown."""
+        key = self._key_of.get(player_id)
+        if key is None:
+            return 0
+        return bisect_left(self._keys, key) + 1
+
+    def page(self, offset: int = 0, limit=None) -> List[str]:
+        """Player ids from ``offset`` (0-based), at most ``limit`` of them."""
+        offset = max(0, offset)
+        end = None if limit is None else offset + max(0, limit)
+        return [key[2] for key in self._keys[offset:end]]
+
+
+class QuestionTally:
+    """
+    Answer statistics of one question, appended to on every submit.
+
+    ``log`` holds player ids in arrival order, which is also ascending
+    time-spent order since every answer is timed from the same start.
+    """
+
+    def __init__(self, option_ids):
+        self.option_counts: Dict[str, int] = {option_id: 0 for option_id in option_ids}
+        self.correct_count = 0
+        self.log: List[str] = []
+
+    def record(self, player_id: str, selected_option_id: str, is_correct: bool):
+        self.option_counts[selected_option_id] = self.option_counts.get(selected_option_id, 0) + 1
+        if is_correct:
+            self.correct_count += 1
+        self.log.append(player_id)
+
+    def replace(self, old_option_id: str, old_correct: bool, selected_option_id: str, is_correct: bool):
+        """Move a recorded answer to another option; its place in ``log`` is kept."""
+        self.option_counts[old_option_id] -= 1
+        self.option_counts[selected_option_id] = self.option_counts.get(selected_option_id, 0) + 1
+        self.correct_count += int(is_correct) - int(old_correct)
+
+    @property
+    def total_answered(self) -> int:
+        return len(self.log)
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Live Session Reaper
+===================
+Expires live sessions nobody will come back to, so a long-running worker
+(or a shared store) does not keep every session, player and answer ever
+created, and their QZ-XXXX access codes return to the pool.
+
+A session expires when:
+  - completed:  ``completed_ttl`` seconds after its last question
+  - waiting:    no join for ``waiting_ttl`` seconds (lobby never started)
+  - abandoned:  started, but no question/answer for ``idle_ttl`` seconds
+
+Expired sessions are removed through ``store.delete``, which also releases
+the access code. The expiry is checked again under the store's session
+lock before removal, so a join or answer landing on another worker during
+the sweep keeps the session alive. With ``archive_dir`` set, completed
+sessions are first written there as ``<session_id>.json`` (session
+snapshot + final leaderboard), so results survive the expiry.
+
+Sweeps run every ``interval`` seconds in a background task. With a shared
+store any worker may sweep: deleting an already deleted session is a no-op.
+Each sweep also drops this worker's cached snapshots of sessions that are
+gone from the store (``store.prune_cache``).
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from live_session import SessionStatus
+
+logger = logging.getLogger(__name__)
+
+
+class LiveSessionReaper:
+    """
+    Periodic expiry of completed, idle-waiting and abandoned sessions.
+
+    ``on_expire(session, reason)`` runs after each removal (drop broadcaster
+    buffers, notify the room). ``start_task``/``sleep`` should be the
+    SocketIO ones so the loop cooperates with gevent workers.
+    """
+
+    def __init__(
+        self,
+        manager,
+        completed_ttl: float = 3600,
+        waiting_ttl: float = 3600,
+        idle_ttl: float = 1800,
+        interval: float = 60,
+        archive_dir: Optional[str] = None,
+        on_expire: Optional[Callable] = None,
+        start_task: Optional[Callable] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.manager = manager
+        self.completed_ttl = completed_ttl
+        self.waiting_ttl = waiting_ttl
+        self.idle_ttl = idle_ttl
+        self.interval = interval
+        self.archive_dir = archive_dir or None
+        self.on_expire = on_expire
+        self._start_task = start_task
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._running = False
+        self.sweeps = 0
+        self.expired: Dict[str, int] = {"completed": 0, "waiting": 0, "abandoned": 0}
+        self.archived = 0
+        self.last_sweep_ms = 0.0
+        self.last_session_count = 0
+        if self.archive_dir:
+            os.makedirs(self.archive_dir, exist_ok=True)
+
+    def expiry_reason(self, session, now: float) -> Optional[str]:
+        """Why the session should be removed at ``now``, or None to keep it."""
+        if session.status == SessionStatus.COMPLETED:
+            ended = session.completed_at or session.last_activity_at
+            return "completed" if now - ended >= self.completed_ttl else None
+        idle = now - session.last_activity_at
+        if session.status == SessionStatus.WAITING:
+            return "waiting" if idle >= self.waiting_ttl else None
+        return "abandoned" if idle >= self.idle_ttl else None
+
+    def sweep(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Remove every expired session. Returns the count per reason."""
+        start = time.perf_counter()
+        now = time.time() if now is None else now
+        store = self.manager.store
+        removed = {reason: 0 for reason in self.expired}
+        session_ids = store.session_ids()
+        remaining = set(session_ids)
+        for session_id in session_ids:
+            session = store.get(session_id)
+            reason = self.expiry_reason(session, now) if session else None
+            if reason is None:
+                continue
+            session = store.delete(session_id, check=lambda current: self._still_expired(current, reason, now))
+            if session is None:
+                continue
+            remaining.discard(session_id)
+            removed[reason] += 1
+            if self.on_expire:
+                try:
+                    self.on_expire(session, reason)
+                except Exception as e:
+                    logger.error(f"Live session expiry hook failed for {session_id}: {e}")
+
+        store.prune_cache(remaining)
+
+        with self._lock:
+            self.sweeps += 1
+            for reason, count in removed.items():
+                self.expired[reason] += count
+            self.last_sweep_ms = (time.perf_counter() - start) * 1000
+            self.last_session_count = len(session_ids) - sum(removed.values())
+        if any(removed.values()):
+            logger.info(f"Live sessions expired: {removed}")
+        return removed
+
+    def _still_expired(self, session, reason: str, now: float) -> bool:
+        """Recheck run by ``store.delete`` under the session lock."""
+        if self.expiry_reason(session, now) != reason:
+            return False
+        if reason == "completed" and self.archive_dir:
+            self._archive(session)
+        return True
+
+    def _archive(self, session):
+        record = session.to_state()
+        record["leaderboard"] = self.manager.get_leaderboard(session.session_id)
+        record["archived_at"] = time.time()
+        path = os.path.join(self.archive_dir, f"{session.session_id}.json")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(record, f, separators=(",", ":"), ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Could not archive live session {session.session_id}: {e}")
+            return
+        with self._lock:
+            self.archived += 1
+
+    def ensure_running(self):
+        """Start the sweep loop once (no-op when ``interval <= 0``)."""
+        if self._running or self.interval <= 0:
+            return
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+        if self._start_task:
+            self._start_task(self._run)
+        else:
+            threading.Thread(target=self._run, name="live-session-reaper", daemon=True).start()
+
+    def _run(self):
+        while True:
+            self._sleep(self.interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Live session sweep failed: {e}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "sessions": self.last_session_count,
+                "sweeps": self.sweeps,
+                "expired": dict(self.expired),
+                "archived": self.archived,
+                "lastSweepMs": round(self.last_sweep_ms, 2),
+                "ttl": {
+                    "completed": self.completed_ttl,
+                    "waiting": self.waiting_ttl,
+                    "idle": self.idle_ttl,
+                },
+            }
@@ -12,16 +12,25 @@ Scoring:
   - Correct answer base: 1000 points
   - Speed bonus: up to +500 points (faster = more)
   - Streak bonus: +100 per consecutive correct answer
+
+Memory: the per-item dataclasses use __slots__ and interned ids, and the
+answers of a session live in a columnar AnswerTable (see live_answers.py).
 """
 
 import random
-import string
+import sys
 import time
+import uuid
 import logging
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Dict, List, Mapping, Optional, Set, Tuple
 from enum import Enum
 
+from access_codes import AccessCodeAllocator
+from live_answers import AnswerTable, PlayerAnswers
+from live_index import LeaderboardIndex, QuestionTally
+from live_store import InMemorySessionStore, SessionStore
+
 logger = logging.getLogger(__name__)
 
 
@@ -33,7 +42,11 @@ class SessionStatus(str, Enum):
     COMPLETED = "completed"
 
 
-@dataclass
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+@dataclass(slots=True)
 class QuizQuestion:
     id: str
     text: str
@@ -42,8 +55,28 @@ class QuizQuestion:
     points: int = 1000
     time_limit: int = 20  # seconds
 
+    def __post_init__(self):
+        # Ids are repeated in every tally, answer and snapshot: share one string
+        self.id = _intern(self.id)
+        self.correct_option_id = _intern(self.correct_option_id)
+        self.options = [dict(opt, id=_intern(opt["id"])) for opt in self.options]
 
-@dataclass
+    def to_state(self):
+        return {
+            "id": self.id,
+            "text": self.text,
+            "options": self.options,
+            "correct_option_id": self.correct_option_id,
+            "points": self.points,
+            "time_limit": self.time_limit,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        return cls(**state)
+
+
+@dataclass(frozen=True, slots=True)
 class PlayerAnswer:
     player_id: str
     question_id: str
@@ -53,18 +86,46 @@ class PlayerAnswer:
     points_earned: int
     timestamp: float
 
+    def to_state(self):
+        return [
+            self.selected_option_id,
+            self.is_correct,
+            self.time_spent,
+            self.points_earned,
+            self.timestamp,
+        ]
 
-@dataclass
+    @classmethod
+    def from_state(cls, player_id, question_id, state):
+        return cls(player_id, question_id, *state)
+
+
+@dataclass(slots=True)
 class Player:
     id: str
     name: str
     avatar_color: str
     score: int = 0
     streak: int = 0
-    answers: Dict[str, PlayerAnswer] = field(default_factory=dict)
+    # A dict until the player joins a session, then a read-only PlayerAnswers
+    # row view: answers are recorded through LiveSession.record_answer
+    answers: Mapping[str, PlayerAnswer] = field(default_factory=dict)
     joined_at: float = field(default_factory=time.time)
     is_connected: bool = True
     badges: List[str] = field(default_factory=list)
+    # Running aggregates maintained by LiveSession.record_answer
+    correct_count: int = 0
+    total_time: float = 0.0
+    max_streak: int = 0  # longest run of consecutive questions answered correctly
+    correct_run: int = 0
+    last_correct_index: int = -1
+
+    def __post_init__(self):
+        self.id = _intern(self.id)
+
+    @property
+    def average_time(self) -> float:
+        return self.total_time / len(self.answers) if self.answers else 0
 
     def to_dict(self):
         return {
@@ -78,6 +139,37 @@ class Player:
             "answeredCount": len(self.answers),
         }
 
+    def to_state(self, include_answers: bool = True):
+        state = {
+            "id": self.id,
+            "name": self.name,
+            "avatar_color": self.avatar_color,
+            "score": self.score,
+            "streak": self.streak,
+            "joined_at": self.joined_at,
+            "is_connected": self.is_connected,
+            "badges": self.badges,
+            "correct_count": self.correct_count,
+            "total_time": self.total_time,
+            "max_streak": self.max_streak,
+            "correct_run": self.correct_run,
+            "last_correct_index": self.last_correct_index,
+        }
+        if include_answers:
+            state["answers"] = {qid: a.to_state() for qid, a in self.answers.items()}
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        state = dict(state)
+        answers = state.pop("answers", {})
+        player = cls(**state)
+        player.answers = {
+            qid: PlayerAnswer.from_state(player.id, qid, a)
+            for qid, a in answers.items()
+        }
+        return player
+
 
 @dataclass
 class LiveSession:
@@ -93,6 +185,104 @@ class LiveSession:
     created_at: float = field(default_factory=time.time)
     started_at: Optional[float] = None
     completed_at: Optional[float] = None
+    # Last join/start/question/answer, used by LiveSessionReaper
+    last_activity_at: float = field(default_factory=time.time)
+    leaderboard: LeaderboardIndex = field(
+        default_factory=LeaderboardIndex, repr=False, compare=False
+    )
+    question_index: Dict[str, int] = field(default_factory=dict, repr=False, compare=False)
+    tallies: Dict[str, QuestionTally] = field(default_factory=dict, repr=False, compare=False)
+    answers: AnswerTable = field(init=False, repr=False, compare=False)
+    # Rows to write back by shared stores (see take_changes)
+    changed_players: Set[str] = field(default_factory=set, init=False, repr=False, compare=False)
+    changed_answers: List[Tuple[str, str]] = field(default_factory=list, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        for index, question in enumerate(self.questions):
+            self.question_index[question.id] = index
+            self.tallies[question.id] = QuestionTally(opt["id"] for opt in question.options)
+        self.answers = AnswerTable(self.questions, PlayerAnswer)
+
+    def add_player(self, player: Player):
+        """Register a player and move its answers into the session's AnswerTable."""
+        existing = player.answers
+        row = self.answers.add_player(player.id)
+        player.answers = PlayerAnswers(self.answers, row)
+        for question_id, answer in existing.items():
+            self.answers.set(row, question_id, answer)
+        self.players[player.id] = player
+        self.leaderboard.update(player)
+
+    def record_answer(self, answer: PlayerAnswer) -> PlayerAnswer:
+        """
+        Store an answer and update everything derived from it: the player's
+        score, time, streaks and correct count, the question tally, the
+        leaderboard and the rows to write back.
+
+        A new answer is scored incrementally. Replacing an answer (same
+        player and question) recomputes the player's aggregates from its
+        answers; the player keeps its place in the tally's arrival log.
+        """
+        player = self.players[answer.player_id]
+        question_id = answer.question_id
+        tally = self.tallies[question_id]
+        previous = player.answers.get(question_id)
+        self.answers.set(player.answers.row, question_id, answer)
+        if previous is None:
+            tally.record(player.id, answer.selected_option_id, answer.is_correct)
+            self._add_to_aggregates(player, answer)
+        else:
+            tally.replace(previous.selected_option_id, previous.is_correct,
+                          answer.selected_option_id, answer.is_correct)
+            self._recompute_aggregates(player)
+        self.leaderboard.update(player)
+        self.mark_changed(player.id, question_id)
+        return answer
+
+    def _add_to_aggregates(self, player: Player, answer: PlayerAnswer):
+        player.score += answer.points_earned
+        player.total_time += answer.time_spent
+        if not answer.is_correct:
+            player.streak = 0
+            return
+        player.streak += 1
+        player.correct_count += 1
+        # Unanswered questions break the run, unlike the scoring streak
+        index = self.question_index[answer.question_id]
+        if player.last_correct_index == index - 1:
+            player.correct_run += 1
+        else:
+            player.correct_run = 1
+        player.last_correct_index = index
+        player.max_streak = max(player.max_streak, player.correct_run)
+
+    def _recompute_aggregates(self, player: Player):
+        answers = [player.answers[qid] for qid in player.answers]  # question order
+        player.score = player.streak = player.correct_count = 0
+        player.total_time = 0.0
+        player.max_streak = player.correct_run = 0
+        player.last_correct_index = -1
+        for answer in answers:
+            self._add_to_aggregates(player, answer)
+
+    def mark_changed(self, player_id: str, question_id: Optional[str] = None):
+        """Record that a player (and one of its answers) must be written back."""
+        self.changed_players.add(player_id)
+        if question_id is not None:
+            self.changed_answers.append((player_id, question_id))
+
+    def take_changes(self) -> Tuple[List[Player], List[PlayerAnswer]]:
+        """Players and answers changed since the last call, then forget them."""
+        players = [self.players[player_id] for player_id in self.changed_players]
+        answers = [self.players[player_id].answers[question_id]
+                   for player_id, question_id in self.changed_answers]
+        self.changed_players = set()
+        self.changed_answers = []
+        return players, answers
+
+    def get_question(self, question_id: str) -> Optional[QuizQuestion]:
+        index = self.question_index.get(question_id)
+        return self.questions[index] if index is not None else None
 
     @property
     def current_question(self) -> Optional[QuizQuestion]:
@@ -117,6 +307,93 @@ class LiveSession:
             "startedAt": self.started_at,
         }
 
+    def meta_state(self):
+        """Fields fixed at creation (written once by shared stores)."""
+        return {
+            "session_id": self.session_id,
+            "access_code": self.access_code,
+            "quiz_title": self.quiz_title,
+            "questions": [q.to_state() for q in self.questions],
+            "creator_id": self.creator_id,
+            "created_at": self.created_at,
+        }
+
+    def progress_state(self):
+        """Session-level fields changed by start/advance/answers."""
+        return {
+            "status": self.status.value,
+            "current_question_index": self.current_question_index,
+            "question_start_time": self.question_start_time,
+            "started_at": self.started_at,
+            "completed_at": self.completed_at,
+            "last_activity_at": self.last_activity_at,
+        }
+
+    def to_state(self):
+        """Serializable snapshot (archives, tests); shared stores keep it split in rows."""
+        return {
+            **self.meta_state(),
+            **self.progress_state(),
+            "players": [p.to_state() for p in self.players.values()],
+        }
+
+    @classmethod
+    def from_parts(cls, meta, progress, players, answers):
+        """Rebuild from store rows: player states and (player_id, question_id, answer state)."""
+        by_player = {state["id"]: dict(state, answers={}) for state in players}
+        for player_id, question_id, state in answers:
+            if player_id in by_player:
+                by_player[player_id]["answers"][question_id] = state
+        return cls.from_state({**meta, **progress, "players": list(by_player.values())})
+
+    def apply_changes(self, progress, players, answers):
+        """
+        Bring this snapshot up to date with rows written by another worker.
+        Idempotent: rows already applied are skipped or rewritten as is.
+        """
+        for key, value in progress.items():
+            setattr(self, key, SessionStatus(value) if key == "status" else value)
+        for state in players:
+            player = self.players.get(state["id"])
+            if player is None:
+                self.add_player(Player.from_state(state))
+                continue
+            for key, value in state.items():
+                if key not in ("id", "answers"):
+                    setattr(player, key, value)
+            self.leaderboard.update(player)
+        new_answers = sorted(
+            (PlayerAnswer.from_state(player_id, question_id, state) for player_id, question_id, state in answers),
+            key=lambda a: a.timestamp,
+        )
+        for a in new_answers:
+            player = self.players.get(a.player_id)
+            tally = self.tallies.get(a.question_id)
+            if player is None or tally is None or a.question_id in player.answers:
+                continue
+            # Aggregates come with the player rows: only the table and tally change
+            self.answers.set(player.answers.row, a.question_id, a)
+            tally.record(a.player_id, a.selected_option_id, a.is_correct)
+
+    @classmethod
+    def from_state(cls, state):
+        state = dict(state)
+        state["questions"] = [QuizQuestion.from_state(q) for q in state["questions"]]
+        state["status"] = SessionStatus(state["status"])
+        players = [Player.from_state(p) for p in state.pop("players")]
+        session = cls(**state)
+        for player in players:
+            session.add_player(player)
+        answers = sorted(
+            (a for p in players for a in p.answers.values()),
+            key=lambda a: a.timestamp,
+        )
+        for a in answers:
+            tally = session.tallies.get(a.question_id)
+            if tally:
+                tally.record(a.player_id, a.selected_option_id, a.is_correct)
+        return session
+
 
 AVATAR_COLORS = [
     "#FF6B6B", "#4ECDC4", "#45B7D1", "#96CEB4",
@@ -129,20 +406,17 @@ class LiveSessionManager:
     """
     Manages multiple live quiz sessions.
     Handles player joins, answer scoring, and leaderboard updates.
-    """
 
-    def __init__(self):
-        self.sessions: Dict[str, LiveSession] = {}
-        self._code_to_session: Dict[str, str] = {}
+    Session state lives in a pluggable SessionStore (see live_store.py);
+    every mutation runs inside ``store.transaction`` so it is atomic even
+    when several workers share the same store. Access codes come from an
+    AccessCodeAllocator over the same store (see access_codes.py).
+    """
 
-    def _generate_access_code(self) -> str:
-        """Generate a unique QZ-XXXX access code."""
-        for _ in range(100):
-            digits = "".join(random.choices(string.digits, k=4))
-            code = f"QZ-{digits}"
-            if code not in self._code_to_session:
-                return code
-        raise RuntimeError("Unable to generate unique access code")
+    def __init__(self, store: Optional[SessionStore] = None,
+                 codes: Optional[AccessCodeAllocator] = None):
+        self.store: SessionStore = store or InMemorySessionStore()
+        self.codes = codes or AccessCodeAllocator(self.store)
 
     def create_session(
         self,
@@ -151,9 +425,7 @@ class LiveSessionManager:
         creator_id: str,
     ) -> LiveSession:
         """Create a new live quiz session."""
-        session_id = f"session_{int(time.time())}_{random.randint(1000, 9999)}"
-        access_code = self._generate_access_code()
-
+        # Built before claiming a code, so a malformed question leaks nothing
         quiz_questions = []
         for i, q in enumerate(questions):
             quiz_questions.append(QuizQuestion(
@@ -165,85 +437,108 @@ class LiveSessionManager:
                 time_limit=q.get("time_limit", 20),
             ))
 
-        session = LiveSession(
-            session_id=session_id,
-            access_code=access_code,
-            quiz_title=quiz_title,
-            questions=quiz_questions,
-            creator_id=creator_id,
-        )
+        session_id = f"session_{uuid.uuid4().hex}"
 
-        self.sessions[session_id] = session
-        self._code_to_session[access_code] = session_id
+        # Allocated codes are unique; the claim only fails when another worker
+        # took the same pooled code first, or after a secret/config change.
+        for _ in range(100):
+            access_code = self.codes.allocate()
+            if self.store.claim_code(access_code, session_id):
+                break
+            logger.warning(f"Access code {access_code} already claimed, skipping")
+        else:
+            raise RuntimeError("Unable to allocate an access code")
+
+        try:
+            session = LiveSession(
+                session_id=session_id,
+                access_code=access_code,
+                quiz_title=quiz_title,
+                questions=quiz_questions,
+                creator_id=creator_id,
+            )
+            self.store.add(session)
+        except Exception:
+            self.store.release_code(access_code)
+            raise
         logger.info(f"Session created: {session_id} with code {access_code}")
         return session
 
     def get_session_by_code(self, code: str) -> Optional[LiveSession]:
         """Lookup a session by its access code."""
-        session_id = self._code_to_session.get(code.upper())
-        return self.sessions.get(session_id) if session_id else None
+        session_id = self.store.get_id_by_code(self.codes.normalize(code))
+        return self.store.get(session_id) if session_id else None
 
     def get_session(self, session_id: str) -> Optional[LiveSession]:
         """Get a session by ID."""
-        return self.sessions.get(session_id)
+        return self.store.get(session_id)
 
     def join_session(self, access_code: str, player_name: str) -> tuple:
         """
         Add a player to a session.
         Returns (session, player) or raises ValueError.
         """
-        session = self.get_session_by_code(access_code)
-        if not session:
+        session_id = self.store.get_id_by_code(self.codes.normalize(access_code))
+        if not session_id:
             raise ValueError(f"Session not found for code: {access_code}")
 
-        if session.status != SessionStatus.WAITING:
-            raise ValueError("Session has already started")
+        with self.store.transaction(session_id) as session:
+            if not session:
+                raise ValueError(f"Session not found for code: {access_code}")
 
-        player_id = f"player_{int(time.time())}_{random.randint(100, 999)}"
-        color = AVATAR_COLORS[len(session.players) % len(AVATAR_COLORS)]
+            if session.status != SessionStatus.WAITING:
+                raise ValueError("Session has already started")
 
-        player = Player(
-            id=player_id,
-            name=player_name,
-            avatar_color=color,
-        )
-        session.players[player_id] = player
+            player_id = f"player_{int(time.time())}_{random.randint(100, 999)}"
+            while player_id in session.players:
+                player_id = f"player_{int(time.time())}_{random.randint(100, 99999)}"
+            color = AVATAR_COLORS[len(session.players) % len(AVATAR_COLORS)]
+
+            player = Player(
+                id=player_id,
+                name=player_name,
+                avatar_color=color,
+            )
+            session.add_player(player)
+            session.mark_changed(player_id)
+            session.last_activity_at = player.joined_at
         logger.info(f"Player {player_name} joined session {session.access_code}")
         return session, player
 
     def start_session(self, session_id: str) -> LiveSession:
         """Transition session from waiting to active, then deliver first question."""
-        session = self.sessions.get(session_id)
-        if not session:
-            raise ValueError("Session not found")
-        if session.status != SessionStatus.WAITING:
-            raise ValueError("Session not in waiting state")
-        if len(session.players) == 0:
-            raise ValueError("No players in session")
-
-        session.status = SessionStatus.ACTIVE
-        session.started_at = time.time()
+        with self.store.transaction(session_id) as session:
+            if not session:
+                raise ValueError("Session not found")
+            if session.status != SessionStatus.WAITING:
+                raise ValueError("Session not in waiting state")
+            if len(session.players) == 0:
+                raise ValueError("No players in session")
+
+            session.status = SessionStatus.ACTIVE
+            session.started_at = session.last_activity_at = time.time()
         logger.info(f"Session {session.access_code} started with {len(session.players)} players")
         return session
 
     def advance_to_question(self, session_id: str) -> Optional[QuizQuestion]:
         """Move to the next question."""
-        session = self.sessions.get(session_id)
-        if not session:
-            return None
-
-        session.current_question_index += 1
-
-        if session.current_question_index >= session.total_questions:
-            session.status = SessionStatus.COMPLETED
-            session.completed_at = time.time()
-            self._calculate_badges(session)
-            logger.info(f"Session {session.access_code} completed")
-            return None
-
-        session.status = SessionStatus.QUESTION
-        session.question_start_time = time.time()
-        question = session.current_question
+        with self.store.transaction(session_id) as session:
+            if not session:
+                return None
+
+            session.current_question_index += 1
+            session.last_activity_at = time.time()
+
+            if session.current_question_index >= session.total_questions:
+                session.status = SessionStatus.COMPLETED
+                session.completed_at = session.last_activity_at
+                self._calculate_badges(session)
+                logger.info(f"Session {session.access_code} completed")
+                return None
+
+            session.status = SessionStatus.QUESTION
+            session.question_start_time = session.last_activity_at
+            question = session.current_question
         logger.info(
             f"Session {session.access_code}: Question {session.current_question_index + 1}/{session.total_questions}"
         )
@@ -256,11 +551,19 @@ class LiveSessionManager:
         question_id: str,
         selected_option_id: str,
     ) -> PlayerAnswer:
-        """Score and record a player's answer."""
-        session = self.sessions.get(session_id)
-        if not session:
-            raise ValueError("Session not found")
+        """Score and record a player's answer (atomically in the store)."""
+        with self.store.transaction(session_id) as session:
+            if not session:
+                raise ValueError("Session not found")
+            return self._record_answer(session, player_id, question_id, selected_option_id)
 
+    def _record_answer(
+        self,
+        session: LiveSession,
+        player_id: str,
+        question_id: str,
+        selected_option_id: str,
+    ) -> PlayerAnswer:
         player = session.players.get(player_id)
         if not player:
             raise ValueError("Player not found")
@@ -287,16 +590,11 @@ class LiveSessionManager:
             speed_bonus = int(500 * speed_ratio)
             points += speed_bonus
 
-            # Streak bonus
-            player.streak += 1
-            streak_bonus = min(player.streak * 100, 500)  # cap at 500
+            # Streak bonus (the streak this answer extends)
+            streak_bonus = min((player.streak + 1) * 100, 500)  # cap at 500
             points += streak_bonus
-        else:
-            player.streak = 0
 
-        player.score += points
-
-        answer = PlayerAnswer(
+        answer = session.record_answer(PlayerAnswer(
             player_id=player_id,
             question_id=question_id,
             selected_option_id=selected_option_id,
@@ -304,90 +602,107 @@ class LiveSessionManager:
             time_spent=round(time_spent, 2),
             points_earned=points,
             timestamp=time.time(),
-        )
-        player.answers[question_id] = answer
+        ))
+        session.last_activity_at = answer.timestamp
         return answer
 
-    def get_leaderboard(self, session_id: str) -> List[Dict]:
-        """Get sorted leaderboard for a session."""
-        session = self.sessions.get(session_id)
+    def get_leaderboard(
+        self,
+        session_id: str,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[Dict]:
+        """
+        Get the sorted leaderboard for a session.
+        ``limit``/``offset`` page through it without touching other players.
+        """
+        session = self.store.get(session_id)
         if not session:
             return []
 
-        sorted_players = sorted(
-            session.players.values(),
-            key=lambda p: (-p.score, p.joined_at),
-        )
-
+        offset = max(0, offset)
         leaderboard = []
-        for rank, player in enumerate(sorted_players, 1):
-            correct_count = sum(
-                1 for a in player.answers.values() if a.is_correct
-            )
-            total_answered = len(player.answers)
-            avg_time = (
-                sum(a.time_spent for a in player.answers.values()) / total_answered
-                if total_answered > 0
-                else 0
-            )
+        for rank, player_id in enumerate(session.leaderboard.page(offset, limit), offset + 1):
+            leaderboard.append(self._leaderboard_entry(session.players[player_id], rank))
+        return leaderboard
 
-            leaderboard.append({
-                "rank": rank,
-                "playerId": player.id,
-                "name": player.name,
-                "avatarColor": player.avatar_color,
-                "score": player.score,
-                "correctAnswers": correct_count,
-                "totalAnswered": total_answered,
-                "averageTime": round(avg_time, 2),
-                "streak": player.streak,
-                "badges": player.badges,
-            })
+    def get_player_rank(self, session_id: str, player_id: str) -> Optional[Dict]:
+        """Leaderboard entry of a single player (O(log P))."""
+        session = self.store.get(session_id)
+        if not session or player_id not in session.players:
+            return None
+        rank = session.leaderboard.rank(player_id)
+        return self._leaderboard_entry(session.players[player_id], rank)
 
-        return leaderboard
+    @staticmethod
+    def _leaderboard_entry(player: Player, rank: int) -> Dict:
+        return {
+            "rank": rank,
+            "playerId": player.id,
+            "name": player.name,
+            "avatarColor": player.avatar_color,
+            "score": player.score,
+            "correctAnswers": player.correct_count,
+            "totalAnswered": len(player.answers),
+            "averageTime": round(player.average_time, 2),
+            "streak": player.streak,
+            "badges": player.badges,
+        }
 
-    def get_question_results(self, session_id: str, question_id: str) -> Dict:
-        """Get detailed results for a specific question."""
-        session = self.sessions.get(session_id)
+    def get_question_results(
+        self,
+        session_id: str,
+        question_id: str,
+        limit: Optional[int] = None,
+    ) -> Dict:
+        """
+        Get detailed results for a specific question.
+        ``limit`` keeps only the K fastest players in ``playerResults``.
+        """
+        session = self.store.get(session_id)
         if not session:
             return {}
 
-        question = None
-        for q in session.questions:
-            if q.id == question_id:
-                question = q
-                break
-
+        question = session.get_question(question_id)
         if not question:
             return {}
 
-        option_counts = {opt["id"]: 0 for opt in question.options}
+        tally = session.tallies[question_id]
+        fastest = tally.log if limit is None else tally.log[:max(0, limit)]
         player_results = []
-
-        for player in session.players.values():
-            answer = player.answers.get(question_id)
-            if answer:
-                option_counts[answer.selected_option_id] = option_counts.get(
-                    answer.selected_option_id, 0
-                ) + 1
-                player_results.append({
-                    "playerId": player.id,
-                    "name": player.name,
-                    "selectedOption": answer.selected_option_id,
-                    "isCorrect": answer.is_correct,
-                    "timeSpent": answer.time_spent,
-                    "pointsEarned": answer.points_earned,
-                })
+        for player_id in fastest:
+            player = session.players[player_id]
+            answer = player.answers[question_id]
+            player_results.append({
+                "playerId": player.id,
+                "name": player.name,
+                "selectedOption": answer.selected_option_id,
+                "isCorrect": answer.is_correct,
+                "timeSpent": answer.time_spent,
+                "pointsEarned": answer.points_earned,
+            })
 
         return {
             "questionId": question_id,
             "questionText": question.text,
             "correctOptionId": question.correct_option_id,
-            "optionCounts": option_counts,
-            "totalAnswered": len(player_results),
+            "optionCounts": dict(tally.option_counts),
+            "totalAnswered": tally.total_answered,
+            "totalPlayers": len(session.players),
+            "correctCount": tally.correct_count,
+            "playerResults": player_results,
+        }
+
+    def get_answer_progress(self, session_id: str, question_id: str) -> Dict:
+        """Answer counters of a question, read from its tally in O(1)."""
+        session = self.store.get(session_id)
+        tally = session.tallies.get(question_id) if session else None
+        if not tally:
+            return {}
+        return {
+            "answeredCount": tally.total_answered,
+            "correctCount": tally.correct_count,
             "totalPlayers": len(session.players),
-            "correctCount": sum(1 for r in player_results if r["isCorrect"]),
-            "playerResults": sorted(player_results, key=lambda x: x["timeSpent"]),
         }
 
     def _calculate_badges(self, session: LiveSession):
@@ -395,48 +710,26 @@ class LiveSessionManager:
         if not session.players:
             return
 
-        sorted_players = sorted(
-            session.players.values(),
-            key=lambda p: -p.score,
-        )
-
         # Podium badges
-        if len(sorted_players) >= 1:
-            sorted_players[0].badges.append("gold")
-        if len(sorted_players) >= 2:
-            sorted_players[1].badges.append("silver")
-        if len(sorted_players) >= 3:
-            sorted_players[2].badges.append("bronze")
+        podium = session.leaderboard.page(0, 3)
+        for player_id, badge in zip(podium, ("gold", "silver", "bronze")):
+            session.players[player_id].badges.append(badge)
 
+        total = len(session.questions)
         for player in session.players.values():
-            correct = sum(1 for a in player.answers.values() if a.is_correct)
-            total = len(session.questions)
-
+            session.mark_changed(player.id)
             # Perfect score
-            if correct == total:
+            if player.correct_count == total:
                 player.badges.append("perfect")
 
             # Speed demon — average under 5 seconds
-            if player.answers:
-                avg = sum(a.time_spent for a in player.answers.values()) / len(player.answers)
-                if avg < 5:
-                    player.badges.append("speed-demon")
+            if player.answers and player.average_time < 5:
+                player.badges.append("speed-demon")
 
             # Max streak
-            max_streak = 0
-            current = 0
-            for q in session.questions:
-                answer = player.answers.get(q.id)
-                if answer and answer.is_correct:
-                    current += 1
-                    max_streak = max(max_streak, current)
-                else:
-                    current = 0
-            if max_streak >= 3:
+            if player.max_streak >= 3:
                 player.badges.append("streak-master")
 
     def delete_session(self, session_id: str):
         """Remove a session."""
-        session = self.sessions.pop(session_id, None)
-        if session:
-            self._code_to_session.pop(session.access_code, None)
+        self.store.delete(session_id)
@@ -0,0 +1,726 @@
+# -*- coding: utf-8 -*-
+"""
+Live Session Storage Backends
+=============================
+Storage layer used by LiveSessionManager.
+
+The in-memory store keeps sessions in process-local dicts (single worker).
+Shared stores (SQLite file, Redis protocol) let every gunicorn worker and
+every host see the same sessions, so a join or an answer can land on any
+worker.
+
+Every mutation goes through ``store.transaction(session_id)``, which holds
+an exclusive per-session lock (thread lock, SQLite write lock or Redis lock
+key) while the session is loaded, mutated and written back. Answer
+recording and score updates are therefore atomic across workers.
+
+Shared stores keep a session as rows, not as one document: a head (fixed
+fields + progress + version), one row per player and one per answer, each
+stamped with the version that wrote it. A transaction writes the head and
+only the players/answers it changed (``LiveSession.take_changes``), and a
+worker whose cached snapshot is behind applies only the rows written since
+its version (``LiveSession.apply_changes``).
+
+Access codes (see access_codes.py) are allocated from a per-code-space
+counter and a FIFO pool of released codes, both kept in the store so all
+workers draw from the same sequence.
+
+Configuration (URI style, like flask-limiter ``storage_uri``):
+  memory://
+  sqlite:////data/live_sessions.db
+  redis://localhost:6379/0
+"""
+
+import json
+import logging
+import os
+from collections import OrderedDict, deque
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _encode(value) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+def _build_session(meta, progress, players, answers):
+    from live_session import LiveSession
+    return LiveSession.from_parts(meta, progress, players, answers)
+
+
+def _encode_changes(session):
+    """Changed players and answers of a session, encoded for the store."""
+    players, answers = session.take_changes()
+    return (
+        [(player.id, _encode(player.to_state(include_answers=False))) for player in players],
+        [(a.player_id, a.question_id, _encode(a.to_state())) for a in answers],
+    )
+
+
+class SessionStore:
+    """Base interface for live session storage."""
+
+    #: True when several processes can see the same sessions.
+    shared = False
+
+    def claim_code(self, code: str, session_id: str) -> bool:
+        """Reserve an access code for a session. Returns False if already taken."""
+        raise NotImplementedError
+
+    def release_code(self, code: str):
+        """Free an access code (it joins the pool of reusable codes)."""
+        raise NotImplementedError
+
+    def next_code_ticket(self, space: str) -> int:
+        """Atomically return then increment the allocation counter of a code space."""
+        raise NotImplementedError
+
+    def pop_free_code(self, keep: int = 0) -> Optional[str]:
+        """Oldest released code, only if more than ``keep`` are waiting."""
+        raise NotImplementedError
+
+    def code_secret(self) -> bytes:
+        """Random key shared by every user of the store (access code permutation)."""
+        raise NotImplementedError
+
+    def get_id_by_code(self, code: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def add(self, session):
+        """Persist a freshly created session (its code must be claimed first).
+
+        Raises ValueError if a session with the same id already exists.
+        """
+        raise NotImplementedError
+
+    def get(self, session_id: str):
+        """Return the session (or a fresh snapshot for shared stores)."""
+        raise NotImplementedError
+
+    def transaction(self, session_id: str):
+        """Context manager yielding the session (or None) under an exclusive lock."""
+        raise NotImplementedError
+
+    def delete(self, session_id: str, check: Optional[Callable] = None):
+        """Remove a session and its access code. Returns the removed session.
+
+        ``check(session)`` runs under the session lock, on the current state;
+        when it returns False nothing is removed and None is returned.
+        """
+        raise NotImplementedError
+
+    def session_ids(self) -> List[str]:
+        raise NotImplementedError
+
+    def prune_cache(self, session_ids: Iterable[str]):
+        """Drop cached snapshots of sessions not in ``session_ids`` (shared stores)."""
+
+
+class InMemorySessionStore(SessionStore):
+    """Process-local store (default). Only valid with a single worker."""
+
+    def __init__(self):
+        self.sessions: Dict[str, object] = {}
+        self._code_to_session: Dict[str, str] = {}
+        self._code_tickets: Dict[str, int] = {}
+        self._free_codes = deque()
+        self._secret = os.urandom(32)
+        self._lock = threading.RLock()
+        self._session_locks: Dict[str, threading.RLock] = {}
+
+    def claim_code(self, code, session_id):
+        with self._lock:
+            if code in self._code_to_session:
+                return False
+            self._code_to_session[code] = session_id
+            return True
+
+    def release_code(self, code):
+        with self._lock:
+            if self._code_to_session.pop(code, None) is not None:
+                self._free_codes.append(code)
+
+    def next_code_ticket(self, space):
+        with self._lock:
+            ticket = self._code_tickets.get(space, 0)
+            self._code_tickets[space] = ticket + 1
+            return ticket
+
+    def pop_free_code(self, keep=0):
+        with self._lock:
+            return self._free_codes.popleft() if len(self._free_codes) > keep else None
+
+    def code_secret(self):
+        return self._secret
+
+    def get_id_by_code(self, code):
+        return self._code_to_session.get(code)
+
+    def add(self, session):
+        with self._lock:
+            if session.session_id in self.sessions:
+                raise ValueError(f"Session already exists: {session.session_id}")
+            session.take_changes()
+            self.sessions[session.session_id] = session
+            self._session_locks[session.session_id] = threading.RLock()
+
+    def get(self, session_id):
+        return self.sessions.get(session_id)
+
+    @contextmanager
+    def transaction(self, session_id):
+        with self._lock:
+            lock = self._session_locks.get(session_id)
+        if lock is None:
+            yield None
+            return
+        with lock:
+            session = self.sessions.get(session_id)
+            try:
+                yield session
+            finally:
+                # Objects are shared as is: nothing to write back
+                if session is not None:
+                    session.take_changes()
+
+    def delete(self, session_id, check=None):
+        with self._lock:
+            lock = self._session_locks.get(session_id)
+        if lock is None:
+            return None
+        # Same lock as transaction(): no mutation runs between check and removal
+        with lock, self._lock:
+            session = self.sessions.get(session_id)
+            if session is None or (check is not None and not check(session)):
+                return None
+            del self.sessions[session_id]
+            self._session_locks.pop(session_id, None)
+            self.release_code(session.access_code)
+            return session
+
+    def session_ids(self):
+        with self._lock:
+            return list(self.sessions)
+
+
+class _VersionedCache:
+    """Keeps the last decoded snapshot per session, keyed by store version.
+
+    A snapshot at the store version is returned as is; one behind it is
+    brought up to date with ``load_changes(session, since)`` (rows written
+    after ``since``), and only an unknown session is rebuilt in full.
+
+    At most ``max_entries`` sessions are kept (least recently used first
+    out), and ``prune`` drops sessions another worker deleted or expired.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # One refresh at a time: apply_changes mutates the cached object
+        self._refresh_lock = threading.RLock()
+
+    def lookup(self, session_id, version, load_full, load_changes):
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry:
+                self._entries.move_to_end(session_id)
+        # A newer entry comes from a transaction of this worker
+        if entry and entry[0] >= version:
+            return entry[1]
+        with self._refresh_lock:
+            with self._lock:
+                entry = self._entries.get(session_id)
+            if entry and entry[0] >= version:
+                return entry[1]
+            try:
+                if entry:
+                    session = entry[1]
+                    load_changes(session, entry[0])
+                else:
+                    session = load_full()
+            except BaseException:
+                self.forget(session_id)
+                raise
+            if session is None:
+                self.forget(session_id)
+                return None
+            self.remember(session_id, version, session)
+            return session
+
+    def remember(self, session_id, version, session):
+        with self._lock:
+            self._entries[session_id] = (version, session)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def forget(self, session_id):
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def prune(self, live_ids):
+        live_ids = set(live_ids)
+        with self._lock:
+            for session_id in [sid for sid in self._entries if sid not in live_ids]:
+                del self._entries[session_id]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteSessionStore(SessionStore):
+    """File-backed store shared by all workers of a host.
+
+    Writes use ``BEGIN IMMEDIATE`` so only one worker mutates the database
+    at a time; WAL mode keeps readers non-blocking. An answer writes three
+    small rows (head, player, answer), so the write lock is held for well
+    under a millisecond whatever the number of players.
+    """
+
+    shared = True
+
+    def __init__(self, path: str, timeout: float = 10.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._cache = _VersionedCache()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS live_session_heads ("
+            " session_id TEXT PRIMARY KEY,"
+            " version INTEGER NOT NULL,"
+            " meta TEXT NOT NULL,"
+            " progress TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS live_players ("
+            " session_id TEXT NOT NULL,"
+            " player_id TEXT NOT NULL,"
+            " version INTEGER NOT NULL,"
+            " data TEXT NOT NULL,"
+            " PRIMARY KEY (session_id, player_id)) WITHOUT ROWID"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS live_answers ("
+            " session_id TEXT NOT NULL,"
+            " player_id TEXT NOT NULL,"
+            " question_id TEXT NOT NULL,"
+            " version INTEGER NOT NULL,"
+            " data TEXT NOT NULL,"
+            " PRIMARY KEY (session_id, player_id, question_id)) WITHOUT ROWID"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS live_players_version ON live_players (session_id, version)")
+        conn.execute("CREATE INDEX IF NOT EXISTS live_answers_version ON live_answers (session_id, version)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS live_codes ("
+            " code TEXT PRIMARY KEY,"
+            " session_id TEXT NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS live_code_tickets ("
+            " space TEXT PRIMARY KEY,"
+            " next INTEGER NOT NULL)"
+        )
+        # FIFO: rows are appended and removed from the head only
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS live_free_codes ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " code TEXT NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS live_meta ("
+            " name TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def claim_code(self, code, session_id):
+        try:
+            self._conn().execute(
+                "INSERT INTO live_codes (code, session_id) VALUES (?, ?)", (code, session_id)
+            )
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    @contextmanager
+    def _write(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _release_codes(conn, where, params):
+        codes = [row[0] for row in conn.execute(f"SELECT code FROM live_codes WHERE {where}", params)]
+        conn.execute(f"DELETE FROM live_codes WHERE {where}", params)
+        conn.executemany("INSERT INTO live_free_codes (code) VALUES (?)", [(code,) for code in codes])
+
+    def release_code(self, code):
+        with self._write() as conn:
+            self._release_codes(conn, "code = ?", (code,))
+
+    def next_code_ticket(self, space):
+        with self._write() as conn:
+            conn.execute("INSERT OR IGNORE INTO live_code_tickets (space, next) VALUES (?, 0)", (space,))
+            ticket = conn.execute("SELECT next FROM live_code_tickets WHERE space = ?", (space,)).fetchone()[0]
+            conn.execute("UPDATE live_code_tickets SET next = next + 1 WHERE space = ?", (space,))
+        return ticket
+
+    def pop_free_code(self, keep=0):
+        with self._write() as conn:
+            head, tail = conn.execute("SELECT min(seq), max(seq) FROM live_free_codes").fetchone()
+            if head is None or tail - head + 1 <= keep:
+                return None
+            code = conn.execute("SELECT code FROM live_free_codes WHERE seq = ?", (head,)).fetchone()[0]
+            conn.execute("DELETE FROM live_free_codes WHERE seq = ?", (head,))
+        return code
+
+    def code_secret(self):
+        conn = self._conn()
+        conn.execute("INSERT OR IGNORE INTO live_meta (name, value) VALUES ('code_secret', ?)", (os.urandom(32),))
+        return bytes(conn.execute("SELECT value FROM live_meta WHERE name = 'code_secret'").fetchone()[0])
+
+    def get_id_by_code(self, code):
+        row = self._conn().execute(
+            "SELECT session_id FROM live_codes WHERE code = ?", (code,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def add(self, session):
+        players, answers = _encode_changes(session)
+        try:
+            with self._write() as conn:
+                conn.execute(
+                    "INSERT INTO live_session_heads (session_id, version, meta, progress, updated_at)"
+                    " VALUES (?, 1, ?, ?, ?)",
+                    (session.session_id, _encode(session.meta_state()),
+                     _encode(session.progress_state()), time.time()),
+                )
+                self._write_changes(conn, session.session_id, 1, players, answers)
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Session already exists: {session.session_id}")
+        self._cache.remember(session.session_id, 1, session)
+
+    @staticmethod
+    def _write_changes(conn, session_id, version, players, answers):
+        conn.executemany(
+            "INSERT OR REPLACE INTO live_players (session_id, player_id, version, data) VALUES (?, ?, ?, ?)",
+            [(session_id, player_id, version, data) for player_id, data in players],
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO live_answers (session_id, player_id, question_id, version, data)"
+            " VALUES (?, ?, ?, ?, ?)",
+            [(session_id, player_id, question_id, version, data) for player_id, question_id, data in answers],
+        )
+
+    def _load(self, conn, session_id):
+        row = conn.execute(
+            "SELECT version, progress FROM live_session_heads WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if not row:
+            # Deleted (or expired) by another worker
+            self._cache.forget(session_id)
+            return None, 0
+        version, progress = row
+
+        def rows(table, columns, since):
+            return conn.execute(
+                f"SELECT {columns} FROM {table} WHERE session_id = ? AND version > ? AND version <= ?",
+                (session_id, since, version),
+            ).fetchall()
+
+        def load_full():
+            meta = conn.execute(
+                "SELECT meta FROM live_session_heads WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if not meta:
+                return None
+            return _build_session(
+                json.loads(meta[0]),
+                json.loads(progress),
+                [json.loads(data) for data, in rows("live_players", "data", 0)],
+                [(p, q, json.loads(data)) for p, q, data in rows("live_answers", "player_id, question_id, data", 0)],
+            )
+
+        def load_changes(session, since):
+            session.apply_changes(
+                json.loads(progress),
+                [json.loads(data) for data, in rows("live_players", "data", since)],
+                [(p, q, json.loads(data)) for p, q, data in rows("live_answers", "player_id, question_id, data", since)],
+            )
+
+        return self._cache.lookup(session_id, version, load_full, load_changes), version
+
+    def get(self, session_id):
+        conn = self._conn()
+        if conn.in_transaction:
+            return self._load(conn, session_id)[0]
+        # Read transaction: head and rows from the same snapshot
+        conn.execute("BEGIN")
+        try:
+            session, _ = self._load(conn, session_id)
+        finally:
+            conn.execute("COMMIT")
+        return session
+
+    @contextmanager
+    def transaction(self, session_id):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            session, version = self._load(conn, session_id)
+            yield session
+            if session is not None:
+                players, answers = _encode_changes(session)
+                conn.execute(
+                    "UPDATE live_session_heads SET version = ?, progress = ?, updated_at = ?"
+                    " WHERE session_id = ?",
+                    (version + 1, _encode(session.progress_state()), time.time(), session_id),
+                )
+                self._write_changes(conn, session_id, version + 1, players, answers)
+                self._cache.remember(session_id, version + 1, session)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            # The cached object may have been partially mutated
+            self._cache.forget(session_id)
+            raise
+
+    def delete(self, session_id, check=None):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            session, _ = self._load(conn, session_id)
+            if check is not None and (session is None or not check(session)):
+                conn.execute("ROLLBACK")
+                return None
+            for table in ("live_session_heads", "live_players", "live_answers"):
+                conn.execute(f"DELETE FROM {table} WHERE session_id = ?", (session_id,))
+            self._release_codes(conn, "session_id = ?", (session_id,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._cache.forget(session_id)
+        return session
+
+    def session_ids(self):
+        rows = self._conn().execute("SELECT session_id FROM live_session_heads").fetchall()
+        return [row[0] for row in rows]
+
+    def prune_cache(self, session_ids):
+        self._cache.prune(session_ids)
+
+
+class RedisSessionStore(SessionStore):
+    """Redis-protocol store shared by every worker on every host.
+
+    Only plain commands are used (GET, SET NX PX, INCR, DEL, SADD, SREM,
+    SMEMBERS, RPUSH, LPOP, LLEN, HSET, HGETALL, HMGET, ZADD, ZRANGEBYSCORE)
+    so any Redis-compatible server, or an in-process stand-in exposing the
+    same redis-py methods, can back it.
+
+    A session is ``meta``/``progress``/``version`` strings, ``players`` and
+    ``answers`` hashes and a ``changes`` sorted set (changed player/answer
+    -> version of its last write) used to catch up a cached snapshot.
+    """
+
+    shared = True
+
+    def __init__(self, client=None, url: Optional[str] = None, prefix: str = "quizo:live",
+                 lock_timeout: float = 10.0):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("The 'redis' package is required for LIVE_SESSION_STORE=redis://")
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+        self.lock_timeout = lock_timeout
+        self._cache = _VersionedCache()
+
+    def _key(self, *parts) -> str:
+        return ":".join((self.prefix, *parts))
+
+    @staticmethod
+    def _text(value) -> Optional[str]:
+        if value is None:
+            return None
+        return value.decode() if isinstance(value, bytes) else str(value)
+
+    def claim_code(self, code, session_id):
+        return bool(self.client.set(self._key("code", code), session_id, nx=True))
+
+    def release_code(self, code):
+        if self.client.delete(self._key("code", code)):
+            self.client.rpush(self._key("codes", "free"), code)
+
+    def next_code_ticket(self, space):
+        return int(self.client.incr(self._key("codes", "ticket", space))) - 1
+
+    def pop_free_code(self, keep=0):
+        # Concurrent pops may leave slightly fewer than ``keep`` codes waiting
+        if int(self.client.llen(self._key("codes", "free"))) <= keep:
+            return None
+        return self._text(self.client.lpop(self._key("codes", "free")))
+
+    def code_secret(self):
+        self.client.set(self._key("codes", "secret"), os.urandom(32).hex(), nx=True)
+        return bytes.fromhex(self._text(self.client.get(self._key("codes", "secret"))))
+
+    def get_id_by_code(self, code):
+        return self._text(self.client.get(self._key("code", code)))
+
+    def _session_keys(self, session_id):
+        return [self._key(part, session_id) for part in ("meta", "progress", "version", "players", "answers", "changes")]
+
+    def add(self, session):
+        if not self.client.set(self._key("meta", session.session_id), _encode(session.meta_state()), nx=True):
+            raise ValueError(f"Session already exists: {session.session_id}")
+        players, answers = _encode_changes(session)
+        self._write_changes(session.session_id, 1, session, players, answers)
+        self.client.set(self._key("version", session.session_id), 1)
+        self.client.sadd(self._key("ids"), session.session_id)
+        self._cache.remember(session.session_id, 1, session)
+
+    def _write_changes(self, session_id, version, session, players, answers):
+        if players:
+            self.client.hset(self._key("players", session_id), mapping=dict(players))
+        if answers:
+            self.client.hset(self._key("answers", session_id),
+                             mapping={_encode([p, q]): data for p, q, data in answers})
+        changes = {_encode(["p", player_id]): version for player_id, _ in players}
+        changes.update({_encode(["a", p, q]): version for p, q, _ in answers})
+        if changes:
+            self.client.zadd(self._key("changes", session_id), changes)
+        self.client.set(self._key("progress", session_id), _encode(session.progress_state()))
+
+    def _load(self, session_id):
+        version = self._text(self.client.get(self._key("version", session_id)))
+        if version is None:
+            self._cache.forget(session_id)
+            return None, 0
+        version = int(version)
+
+        def progress():
+            return json.loads(self._text(self.client.get(self._key("progress", session_id))))
+
+        def load_full():
+            meta = self._text(self.client.get(self._key("meta", session_id)))
+            if meta is None:
+                return None
+            players = self.client.hgetall(self._key("players", session_id))
+            answers = self.client.hgetall(self._key("answers", session_id))
+            return _build_session(
+                json.loads(meta),
+                progress(),
+                [json.loads(self._text(data)) for data in players.values()],
+                [(*json.loads(self._text(field)), json.loads(self._text(data))) for field, data in answers.items()],
+            )
+
+        def load_changes(session, since):
+            members = [
+                json.loads(self._text(member))
+                for member in self.client.zrangebyscore(self._key("changes", session_id), f"({since}", version)
+            ]
+            player_ids = [m[1] for m in members if m[0] == "p"]
+            answer_keys = [m[1:] for m in members if m[0] == "a"]
+            players = self.client.hmget(self._key("players", session_id), player_ids) if player_ids else []
+            answers = (self.client.hmget(self._key("answers", session_id), [_encode(k) for k in answer_keys])
+                       if answer_keys else [])
+            session.apply_changes(
+                progress(),
+                [json.loads(self._text(data)) for data in players if data is not None],
+                [(p, q, json.loads(self._text(data))) for (p, q), data in zip(answer_keys, answers) if data is not None],
+            )
+
+        return self._cache.lookup(session_id, version, load_full, load_changes), version
+
+    def get(self, session_id):
+        session, _ = self._load(session_id)
+        return session
+
+    @contextmanager
+    def _locked(self, session_id) -> Iterator[None]:
+        lock_key = self._key("lock", session_id)
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_timeout
+        while not self.client.set(lock_key, token, nx=True, px=int(self.lock_timeout * 1000)):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Could not lock session {session_id}")
+            time.sleep(0.005)
+        try:
+            yield
+        finally:
+            if self._text(self.client.get(lock_key)) == token:
+                self.client.delete(lock_key)
+
+    @contextmanager
+    def transaction(self, session_id):
+        with self._locked(session_id):
+            try:
+                session, version = self._load(session_id)
+                yield session
+            except BaseException:
+                self._cache.forget(session_id)
+                raise
+            if session is not None:
+                # Rows first, version last: a reader seeing the new version finds them
+                players, answers = _encode_changes(session)
+                self._write_changes(session_id, version + 1, session, players, answers)
+                new_version = self.client.incr(self._key("version", session_id))
+                self._cache.remember(session_id, int(new_version), session)
+
+    def delete(self, session_id, check=None):
+        with self._locked(session_id):
+            session, _ = self._load(session_id)
+            if check is not None and (session is None or not check(session)):
+                return None
+            if session:
+                self.release_code(session.access_code)
+            self.client.delete(*self._session_keys(session_id))
+            self.client.srem(self._key("ids"), session_id)
+        self._cache.forget(session_id)
+        return session
+
+    def session_ids(self):
+        return [self._text(member) for member in self.client.smembers(self._key("ids"))]
+
+    def prune_cache(self, session_ids):
+        self._cache.prune(session_ids)
+
+
+def create_session_store(uri: Optional[str] = None) -> SessionStore:
+    """Build a store from a URI (memory://, sqlite:///path, redis://...)."""
+    uri = (uri or "memory://").strip()
+    if uri.startswith("memory://"):
+        return InMemorySessionStore()
+    if uri.startswith("sqlite:///"):
+        return SQLiteSessionStore(uri[len("sqlite:///"):])
+    if uri.startswith(("redis://", "rediss://", "unix://")):
+        return RedisSessionStore(url=uri)
+    raise ValueError(f"Unsupported LIVE_SESSION_STORE: {uri}")
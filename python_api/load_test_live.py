@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Live Server Connection Load Test
+================================
+Finds the WebSocket connection ceiling of a running QUIZO backend and
+checks that REST endpoints stay responsive while the sockets are held
+open and slow LLM generations are in flight.
+
+The test ramps idle Socket.IO clients in steps (all joined to the same
+live session room). After each step it probes ``/api/health`` and
+``/api/live/session/<id>`` and reports p50/p95 latency. The ceiling is
+the last step where fewer than 5% of the connections failed.
+
+Requirements (client side only):
+    pip install "python-socketio[asyncio_client]" aiohttp
+
+Usage:
+    # Server, e.g. cooperative mode:
+    SOCKETIO_ASYNC_MODE=gevent gunicorn app:app -c gunicorn.conf.py
+    # Client:
+    python load_test_live.py --url http://localhost:5000 --steps 250,500,1000,2000 --slow-calls 4
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+import socketio
+
+QUESTIONS = [{
+    "id": "q1",
+    "text": "Load test question",
+    "options": [{"id": o, "text": o.upper()} for o in "abcd"],
+    "correct_option_id": "a",
+}]
+
+
+async def create_session(http, url, token):
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    async with http.post(f"{url}/api/live/create", json={"title": "Load test", "questions": QUESTIONS},
+                         headers=headers) as response:
+        response.raise_for_status()
+        return (await response.json())["sessionId"]
+
+
+async def open_client(url, session_id, timeout):
+    client = socketio.AsyncClient(reconnection=False)
+    joined = asyncio.Event()
+    client.on("joined_room", lambda data: joined.set())
+    await client.connect(url, transports=["websocket"], wait_timeout=timeout)
+    await client.emit("join_session", {"sessionId": session_id})
+    await asyncio.wait_for(joined.wait(), timeout)
+    return client
+
+
+async def probe(http, url, session_id, samples=20):
+    latencies = []
+    for path in ["/api/health", f"/api/live/session/{session_id}?limit=10"] * (samples // 2):
+        start = time.perf_counter()
+        async with http.get(f"{url}{path}") as response:
+            await response.read()
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+async def slow_generation(http, url, token):
+    """Keep one /api/generate call in flight (LLM round-trip) until cancelled."""
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    text = "Python est un langage de programmation cree par Guido van Rossum en 1991. " * 40
+    while True:
+        try:
+            async with http.post(f"{url}/api/generate", json={"text": text, "numQuestions": 10},
+                                 headers=headers, timeout=aiohttp.ClientTimeout(total=300)) as response:
+                await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            await asyncio.sleep(1)
+
+
+async def run(args):
+    steps = [int(step) for step in args.steps.split(",")]
+    connector = aiohttp.TCPConnector(limit=args.slow_calls + 4)
+    async with aiohttp.ClientSession(connector=connector) as http:
+        session_id = await create_session(http, args.url, args.token)
+        slow_tasks = [asyncio.create_task(slow_generation(http, args.url, args.token))
+                      for _ in range(args.slow_calls)]
+
+        clients = []
+        ceiling = 0
+        print(f"{'sockets':>8}{'failed':>8}{'p50 ms':>9}{'p95 ms':>9}")
+        try:
+            for target in steps:
+                needed = target - len(clients)
+                failures = 0
+                for batch_start in range(0, needed, args.batch):
+                    batch = min(args.batch, needed - batch_start)
+                    results = await asyncio.gather(
+                        *(open_client(args.url, session_id, args.timeout) for _ in range(batch)),
+                        return_exceptions=True,
+                    )
+                    for result in results:
+                        if isinstance(result, Exception):
+                            failures += 1
+                        else:
+                            clients.append(result)
+                connected = sum(1 for client in clients if client.connected)
+                p50, p95 = await probe(http, args.url, session_id)
+                print(f"{connected:>8}{failures:>8}{p50:>9.1f}{p95:>9.1f}")
+                if failures > needed * 0.05:
+                    break
+                ceiling = connected
+            await asyncio.sleep(args.hold)
+        finally:
+            for task in slow_tasks:
+                task.cancel()
+            await asyncio.gather(*(client.disconnect() for client in clients), return_exceptions=True)
+
+    print(f"\nConnection ceiling: {ceiling} sockets "
+          f"({args.slow_calls} concurrent LLM generations)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--token", default="", help="Firebase ID token (not needed in dev mode)")
+    parser.add_argument("--steps", default="250,500,1000,2000,4000")
+    parser.add_argument("--batch", type=int, default=50, help="connections opened concurrently")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--hold", type=float, default=5.0, help="seconds to hold the final step")
+    parser.add_argument("--slow-calls", type=int, default=0, help="concurrent /api/generate calls")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
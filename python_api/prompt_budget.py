@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+Budget de tokens des prompts de generation, pour tous les fournisseurs.
+
+  - estimate_tokens: tokenisation approchee locale (un jeton par mot ou
+    signe de ponctuation, plus un par tranche de 4 caracteres d'un mot
+    long), sans tokenizer du fournisseur;
+  - fenetre de contexte et sortie maximale de chaque modele configure
+    (MODEL_CONTEXT_WINDOWS pour en ajouter ou les corriger);
+  - texte source: l'extrait le plus long qui tient dans la fenetre une fois
+    la consigne et la sortie reservees, plafonne par
+    GENERATION_MAX_SOURCE_TOKENS (au-dela, le cout augmente sans meilleures
+    questions);
+  - max_tokens: tokens par question observes sur les reponses precedentes
+    du modele (moyenne et ecart mobiles), au lieu d'une estimation fixe.
+
+L'estimation locale est recalee par modele sur l'usage rapporte par les
+fournisseurs (prompt_tokens / completion_tokens): la sortie inclut alors les
+tokens de raisonnement des modeles qui en produisent.
+"""
+
+import logging
+import os
+import re
+import threading
+from typing import Dict, Optional, Tuple
+
+from chunked_generation import build_course_excerpt
+
+logger = logging.getLogger(__name__)
+
+_PIECE = re.compile(r"\w+|[^\w\s]")
+# Tranches de 4 caracteres apres la premiere lettre d'un mot (sous-mots BPE)
+_SUBWORD = re.compile(r"(?<=\w)\w{4}")
+
+# (fenetre de contexte, sortie maximale, tokens de sortie par token visible)
+# Le dernier terme est l'a priori avant observation: > 1 pour les modeles
+# qui raisonnent avant de repondre (tokens de reflexion factures en sortie).
+DEFAULT_MODEL_LIMITS: Dict[str, Tuple[int, int, float]] = {
+    "gemini-2.5-flash": (1048576, 65536, 2.0),
+    "llama-3.3-70b-versatile": (131072, 32768, 1.0),
+    "llama-3.1-8b-instant": (131072, 8192, 1.0),
+}
+_FALLBACK_LIMITS = (32768, 8192, 1.0)
+# Enveloppe JSON de la reponse ({"questions": [...]}) et marge de fin
+_RESPONSE_OVERHEAD = 64
+
+
+def estimate_tokens(text: str) -> int:
+    """Nombre de tokens approche (tokenizers BPE usuels, texte latin)."""
+    if not text:
+        return 0
+    return len(_PIECE.findall(text)) + len(_SUBWORD.findall(text))
+
+
+def parse_model_limits(raw: str) -> Dict[str, Tuple[int, int, float]]:
+    """``modele=contexte:sortie[:ratio],...`` (MODEL_CONTEXT_WINDOWS)."""
+    limits = {}
+    for entry in (raw or "").split(","):
+        if "=" not in entry:
+            continue
+        model, values = entry.split("=", 1)
+        parts = values.split(":")
+        try:
+            context = int(parts[0])
+            output = int(parts[1]) if len(parts) > 1 else _FALLBACK_LIMITS[1]
+            ratio = float(parts[2]) if len(parts) > 2 else 1.0
+        except ValueError:
+            raise ValueError(f"MODEL_CONTEXT_WINDOWS invalide: {entry.strip()}")
+        limits[model.strip()] = (context, output, ratio)
+    return limits
+
+
+class _ModelUsage:
+    """Observations d'un modele: recalage de l'estimation et tokens par question."""
+
+    def __init__(self, output_ratio: float, tokens_per_question: float):
+        self.input_ratio = 1.0
+        self.output_ratio = output_ratio
+        self.per_question = tokens_per_question
+        self.per_question_deviation = tokens_per_question * 0.25
+        self.responses = 0
+        self.usage_reports = 0
+
+
+class PromptBudget:
+    """Taille du texte source et max_tokens par modele."""
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Tuple[int, int, float]]] = None,
+        max_source_tokens: int = 4000,
+        tokens_per_question: float = 250.0,
+        min_output_tokens: int = 1024,
+        smoothing: float = 0.2,
+    ):
+        self.limits = {**DEFAULT_MODEL_LIMITS, **(limits or {})}
+        self.max_source_tokens = max_source_tokens
+        self.tokens_per_question = tokens_per_question
+        self.min_output_tokens = min_output_tokens
+        self.smoothing = smoothing
+        self._usage: Dict[str, _ModelUsage] = {}
+        self._lock = threading.Lock()
+
+    def _model(self, model: str) -> _ModelUsage:
+        usage = self._usage.get(model)
+        if usage is None:
+            with self._lock:
+                usage = self._usage.setdefault(
+                    model, _ModelUsage(self.model_limits(model)[2], self.tokens_per_question)
+                )
+        return usage
+
+    def model_limits(self, model: str) -> Tuple[int, int, float]:
+        return self.limits.get(model, _FALLBACK_LIMITS)
+
+    def count_tokens(self, model: str, text: str) -> int:
+        """Tokens du texte pour ce modele (estimation recalee sur son usage)."""
+        return int(estimate_tokens(text) * self._model(model).input_ratio)
+
+    def output_tokens(self, model: str, num_questions: int) -> int:
+        """max_tokens pour ``num_questions``: moyenne observee + 2 ecarts par question."""
+        usage = self._model(model)
+        per_question = (usage.per_question + 2 * usage.per_question_deviation) * usage.output_ratio
+        needed = int(num_questions * per_question) + _RESPONSE_OVERHEAD
+        return max(self.min_output_tokens, min(needed, self.model_limits(model)[1]))
+
+    def source_tokens(self, model: str, num_questions: int, prompt_tokens: int) -> int:
+        """Tokens disponibles pour le texte source une fois consigne et sortie reservees."""
+        context = self.model_limits(model)[0]
+        available = context - prompt_tokens - self.output_tokens(model, num_questions)
+        return max(0, min(self.max_source_tokens, int(available * 0.9)))
+
+    def fit_source(self, text: str, model: str, num_questions: int, prompt_tokens: int = 600) -> str:
+        """Texte entier s'il tient dans le budget, sinon extrait couvrant tout le document."""
+        text = (text or "").strip()
+        budget = self.source_tokens(model, num_questions, prompt_tokens)
+        tokens = self.count_tokens(model, text)
+        if tokens <= budget:
+            return text
+        max_chars = int(len(text) * budget / tokens)
+        logger.debug(f"Texte source reduit a {budget} tokens (~{max_chars} caracteres) pour {model}")
+        return build_course_excerpt(text, max_chars)
+
+    def observe(self, model: str, num_questions: int, content: str):
+        """Tokens par question d'une reponse analysee (``num_questions`` retenues)."""
+        if num_questions <= 0 or not content:
+            return
+        usage = self._model(model)
+        per_question = max(0, estimate_tokens(content) - _RESPONSE_OVERHEAD) / num_questions
+        with self._lock:
+            deviation = abs(per_question - usage.per_question)
+            usage.per_question += self.smoothing * (per_question - usage.per_question)
+            usage.per_question_deviation += self.smoothing * (deviation - usage.per_question_deviation)
+            usage.responses += 1
+
+    def record_usage(self, model: str, prompt: str, content: str,
+                     prompt_tokens: Optional[int], completion_tokens: Optional[int]):
+        """Recale l'estimation locale sur les tokens factures par le fournisseur."""
+        usage = self._model(model)
+        estimated_prompt = estimate_tokens(prompt)
+        estimated_output = estimate_tokens(content)
+        with self._lock:
+            if prompt_tokens and estimated_prompt:
+                usage.input_ratio += self.smoothing * (prompt_tokens / estimated_prompt - usage.input_ratio)
+            if completion_tokens and estimated_output:
+                usage.output_ratio += self.smoothing * (completion_tokens / estimated_output - usage.output_ratio)
+            usage.usage_reports += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "maxSourceTokens": self.max_source_tokens,
+                "models": {
+                    model: {
+                        "contextWindow": self.model_limits(model)[0],
+                        "maxOutputTokens": self.model_limits(model)[1],
+                        "tokensPerQuestion": round(usage.per_question, 1),
+                        "tokensPerQuestionDeviation": round(usage.per_question_deviation, 1),
+                        "inputRatio": round(usage.input_ratio, 3),
+                        "outputRatio": round(usage.output_ratio, 3),
+                        "responses": usage.responses,
+                        "usageReports": usage.usage_reports,
+                    }
+                    for model, usage in self._usage.items()
+                },
+            }
+
+
+_budget: Optional[PromptBudget] = None
+_budget_lock = threading.Lock()
+
+
+def get_prompt_budget() -> PromptBudget:
+    """Budget partage du processus, construit a la premiere utilisation."""
+    global _budget
+    if _budget is None:
+        with _budget_lock:
+            if _budget is None:
+                _budget = PromptBudget(
+                    limits=parse_model_limits(os.getenv("MODEL_CONTEXT_WINDOWS", "")),
+                    max_source_tokens=int(os.getenv("GENERATION_MAX_SOURCE_TOKENS", "4000")),
+                    tokens_per_question=float(os.getenv("GENERATION_TOKENS_PER_QUESTION", "250")),
+                )
+    return _budget
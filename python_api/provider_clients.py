@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Registre des clients des fournisseurs IA, construits une fois par processus.
+
+  - clients SDK (modele Gemini, client Groq et son pool de connexions):
+    un par (fournisseur, cle ou modele), reutilise par toutes les requetes
+    au lieu d'etre reconstruit a chaque appel. Les cles ne sont conservees
+    que sous forme d'empreinte dans l'index du registre;
+  - sonde de disponibilite: un appel sans cout en tokens (liste des
+    modeles) dont le resultat est garde PROVIDER_PROBE_TTL secondes
+    (PROVIDER_PROBE_FAILURE_TTL apres un echec), au lieu d'une completion
+    reelle a chaque verification.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _digest(value: Optional[str]) -> str:
+    return hashlib.blake2b((value or "").encode("utf-8"), digest_size=12).hexdigest()
+
+
+class ProviderClientRegistry:
+    """Clients par (fournisseur, cle) et resultats des sondes de disponibilite."""
+
+    def __init__(self, probe_ttl: float = 60.0, failure_ttl: float = 10.0, max_clients: int = 32):
+        self.probe_ttl = probe_ttl
+        self.failure_ttl = failure_ttl
+        self.max_clients = max_clients
+        self._clients: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._probes: Dict[Tuple[str, str], Tuple[bool, float]] = {}
+        self._lock = threading.Lock()
+        self._build_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self.clients_built = 0
+        self.client_hits = 0
+        self.probes_run = 0
+        self.probe_hits = 0
+
+    def get(self, provider: str, key: Optional[str], factory: Callable[[], Any]) -> Any:
+        """Client de ``provider`` pour ``key``, construit par ``factory`` au premier appel."""
+        index = (provider, _digest(key))
+        with self._lock:
+            client = self._clients.get(index)
+            if client is not None:
+                self._clients.move_to_end(index)
+                self.client_hits += 1
+                return client
+            build_lock = self._build_locks.setdefault(index, threading.Lock())
+        # Une seule construction par cle, meme si plusieurs requetes arrivent ensemble
+        with build_lock:
+            with self._lock:
+                client = self._clients.get(index)
+            if client is None:
+                client = factory()
+                with self._lock:
+                    self._clients[index] = client
+                    self.clients_built += 1
+                    # Cles utilisateur: on garde les plus recentes
+                    while len(self._clients) > self.max_clients:
+                        evicted, _ = self._clients.popitem(last=False)
+                        self._build_locks.pop(evicted, None)
+                logger.info(f"Client {provider} initialise")
+            return client
+
+    def is_available(self, provider: str, key: Optional[str], probe: Callable[[], Any]) -> bool:
+        """Resultat de ``probe()`` (appel sans cout), garde en cache par (fournisseur, cle)."""
+        index = (provider, _digest(key))
+        now = time.monotonic()
+        with self._lock:
+            cached = self._probes.get(index)
+            if cached is not None and cached[1] > now:
+                self.probe_hits += 1
+                return cached[0]
+        try:
+            available = probe() is not False
+        except Exception as e:
+            logger.warning(f"Sonde {provider} en echec: {e}")
+            available = False
+        ttl = self.probe_ttl if available else self.failure_ttl
+        with self._lock:
+            self._probes[index] = (available, time.monotonic() + ttl)
+            self.probes_run += 1
+        return available
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            clients: Dict[str, int] = {}
+            for provider, _ in self._clients:
+                clients[provider] = clients.get(provider, 0) + 1
+            return {
+                "clients": clients,
+                "clientsBuilt": self.clients_built,
+                "clientHits": self.client_hits,
+                "probesRun": self.probes_run,
+                "probeHits": self.probe_hits,
+                "probeTtl": self.probe_ttl,
+            }
+
+
+_registry: Optional[ProviderClientRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_provider_clients() -> ProviderClientRegistry:
+    """Registre partage du processus, construit a la premiere utilisation."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ProviderClientRegistry(
+                    probe_ttl=float(os.getenv("PROVIDER_PROBE_TTL", "60")),
+                    failure_ttl=float(os.getenv("PROVIDER_PROBE_FAILURE_TTL", "10")),
+                    max_clients=int(os.getenv("PROVIDER_MAX_CLIENTS", "32")),
+                )
+    return _registry
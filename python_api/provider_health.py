@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+"""
+Registre de sante des fournisseurs IA, par fournisseur et par cle API.
+
+Pour chaque couple (fournisseur, cle) le registre garde les derniers
+resultats (latence, succes/echec) et un disjoncteur:
+  - 401/403          : cle invalide, circuit ouvert PROVIDER_HEALTH_AUTH_OPEN_SECONDS
+  - 429              : circuit ouvert jusqu'a la remise a zero annoncee
+                       (Retry-After / x-ratelimit-reset-*), sinon
+                       PROVIDER_HEALTH_RATE_LIMIT_SECONDS
+  - 5xx, 408, timeout, connexion impossible/coupee (pas de statut HTTP):
+                       circuit ouvert apres PROVIDER_HEALTH_FAILURE_THRESHOLD
+                       echecs consecutifs, duree doublee a chaque rechute
+  - autres 4xx (400, 413, 422...): la requete est en cause, pas le
+                       fournisseur; comptees (``requestErrors``) sans toucher
+                       au disjoncteur ni au taux d'erreur
+A l'expiration, un seul appel de test passe (semi-ouvert); un succes
+referme le circuit.
+
+Les cles ne sont jamais conservees en clair (empreinte BLAKE2 courte).
+
+Partage optionnel (PROVIDER_HEALTH_STORE=sqlite:////data/provider_health.db):
+l'etat des circuits ouverts est ecrit dans un fichier SQLite lu par tous
+les workers, une cle bannie par un worker est ignoree par les autres.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_CLOSED = "closed"
+_OPEN = "open"
+_HALF_OPEN = "half_open"
+
+
+def trips_breaker(status_code: Optional[int]) -> bool:
+    """Echec imputable au fournisseur: 5xx, 408, ou aucune reponse HTTP (timeout, connexion)."""
+    return status_code is None or status_code >= 500 or status_code == 408
+
+
+def key_fingerprint(api_key: Optional[str]) -> str:
+    if not api_key:
+        return "default"
+    return hashlib.blake2b(api_key.encode("utf-8"), digest_size=5).hexdigest()
+
+
+class _KeyHealth:
+    def __init__(self, window: int):
+        self.results = deque(maxlen=window)  # (succes, latence)
+        self.consecutive_failures = 0
+        self.state = _CLOSED
+        self.open_until = 0.0
+        self.open_count = 0
+        self.reason = ""
+        self.probe_started = 0.0
+        self.request_errors = 0
+
+    @property
+    def error_rate(self) -> float:
+        if not self.results:
+            return 0.0
+        return sum(1 for ok, _ in self.results if not ok) / len(self.results)
+
+    @property
+    def average_latency(self) -> Optional[float]:
+        latencies = [latency for ok, latency in self.results if ok]
+        return sum(latencies) / len(latencies) if latencies else None
+
+
+class _SQLiteCircuitStore:
+    """Circuits ouverts partages entre processus (un fichier par hote)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS provider_circuits ("
+            " circuit_id TEXT PRIMARY KEY, open_until REAL NOT NULL, reason TEXT NOT NULL)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def open(self, circuit_id: str, open_until: float, reason: str):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO provider_circuits (circuit_id, open_until, reason) VALUES (?, ?, ?)",
+            (circuit_id, open_until, reason),
+        )
+
+    def close(self, circuit_id: str):
+        self._conn().execute("DELETE FROM provider_circuits WHERE circuit_id = ?", (circuit_id,))
+
+    def open_until(self, circuit_id: str) -> float:
+        row = self._conn().execute(
+            "SELECT open_until FROM provider_circuits WHERE circuit_id = ?", (circuit_id,)
+        ).fetchone()
+        return row[0] if row else 0.0
+
+
+class ProviderHealthRegistry:
+    """Sante glissante et disjoncteurs par (fournisseur, cle)."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        open_seconds: float = 30.0,
+        max_open_seconds: float = 600.0,
+        rate_limit_seconds: float = 60.0,
+        auth_open_seconds: float = 3600.0,
+        window: int = 20,
+        probe_timeout: float = 60.0,
+        max_keys: int = 1000,
+        shared_store: Optional[_SQLiteCircuitStore] = None,
+    ):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.rate_limit_seconds = rate_limit_seconds
+        self.auth_open_seconds = auth_open_seconds
+        self.window = window
+        self.probe_timeout = probe_timeout
+        self.max_keys = max_keys
+        self.shared_store = shared_store
+        self._keys: "OrderedDict[str, _KeyHealth]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.skipped_calls = 0
+
+    @staticmethod
+    def circuit_id(provider: str, api_key: Optional[str]) -> str:
+        return f"{provider}:{key_fingerprint(api_key)}"
+
+    def _entry(self, circuit_id: str) -> _KeyHealth:
+        entry = self._keys.get(circuit_id)
+        if entry is None:
+            entry = _KeyHealth(self.window)
+            self._keys[circuit_id] = entry
+            # Borne memoire: des cles utilisateur differentes a chaque requete
+            while len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+        else:
+            self._keys.move_to_end(circuit_id)
+        return entry
+
+    def _shared_open_until(self, circuit_id: str) -> float:
+        if self.shared_store is None:
+            return 0.0
+        try:
+            return self.shared_store.open_until(circuit_id)
+        except sqlite3.Error as e:
+            logger.warning(f"Lecture des circuits partages impossible: {e}")
+            return 0.0
+
+    def is_available(self, provider: str, api_key: Optional[str], consume_probe: bool = True) -> bool:
+        """False si le circuit est ouvert; laisse passer un seul appel de test a l'expiration.
+
+        ``consume_probe=False`` consulte l'etat sans reserver l'appel de test.
+        """
+        circuit_id = self.circuit_id(provider, api_key)
+        now = time.time()
+        shared_until = self._shared_open_until(circuit_id)
+        with self._lock:
+            entry = self._entry(circuit_id)
+            if shared_until > max(now, entry.open_until):
+                entry.state = _OPEN
+                entry.open_until = shared_until
+                entry.reason = entry.reason or "circuit partage"
+            if entry.state == _CLOSED:
+                return True
+            if entry.state == _OPEN and now >= entry.open_until:
+                entry.state = _HALF_OPEN
+                entry.probe_started = 0.0
+            # Un appel de test a la fois; un test jamais conclu (cle non
+            # utilisee finalement) n'empeche pas le suivant indefiniment
+            if entry.state == _HALF_OPEN and now - entry.probe_started > self.probe_timeout:
+                if consume_probe:
+                    entry.probe_started = now
+                return True
+            if consume_probe:
+                self.skipped_calls += 1
+            return False
+
+    def record_success(self, provider: str, api_key: Optional[str], latency: float):
+        circuit_id = self.circuit_id(provider, api_key)
+        with self._lock:
+            entry = self._entry(circuit_id)
+            entry.results.append((True, latency))
+            entry.consecutive_failures = 0
+            reopened = entry.state != _CLOSED
+            entry.state = _CLOSED
+            entry.open_count = 0
+            entry.reason = ""
+        if reopened:
+            logger.info(f"Circuit {circuit_id} referme")
+            if self.shared_store is not None:
+                try:
+                    self.shared_store.close(circuit_id)
+                except sqlite3.Error as e:
+                    logger.warning(f"Ecriture des circuits partages impossible: {e}")
+
+    def record_failure(
+        self,
+        provider: str,
+        api_key: Optional[str],
+        status_code: Optional[int] = None,
+        retry_after: Optional[float] = None,
+        latency: float = 0.0,
+        provider_fault: Optional[bool] = None,
+    ):
+        """Enregistre un echec d'appel.
+
+        ``provider_fault`` force la classification quand le statut HTTP ne
+        suffit pas (False: reponse refusee ou illisible pour cette requete);
+        par defaut ``trips_breaker(status_code)``.
+        """
+        circuit_id = self.circuit_id(provider, api_key)
+        now = time.time()
+        if provider_fault is None:
+            provider_fault = trips_breaker(status_code)
+        with self._lock:
+            entry = self._entry(circuit_id)
+            if status_code not in (401, 403, 429) and not provider_fault:
+                entry.request_errors += 1
+                return
+            entry.results.append((False, latency))
+            entry.consecutive_failures += 1
+            if status_code in (401, 403):
+                duration, reason = self.auth_open_seconds, f"cle refusee ({status_code})"
+            elif status_code == 429:
+                duration, reason = retry_after or self.rate_limit_seconds, "quota atteint (429)"
+            elif entry.state == _HALF_OPEN or entry.consecutive_failures >= self.failure_threshold:
+                duration = min(self.max_open_seconds, self.open_seconds * (2 ** entry.open_count))
+                reason = f"{entry.consecutive_failures} echecs consecutifs"
+            else:
+                return
+            entry.state = _OPEN
+            entry.open_until = now + duration
+            entry.open_count += 1
+            entry.reason = reason
+        logger.warning(f"Circuit {circuit_id} ouvert {duration:.0f}s: {reason}")
+        if self.shared_store is not None:
+            try:
+                self.shared_store.open(circuit_id, now + duration, reason)
+            except sqlite3.Error as e:
+                logger.warning(f"Ecriture des circuits partages impossible: {e}")
+
+    def order_keys(self, provider: str, keys: Iterable[str]) -> List[str]:
+        """Cles dont le circuit laisse passer l'appel, les plus saines d'abord.
+
+        Verifier ``is_available`` juste avant chaque appel: c'est lui qui
+        reserve l'appel de test d'un circuit semi-ouvert.
+        """
+        keys = list(keys)
+        available = [key for key in keys if self.is_available(provider, key, consume_probe=False)]
+        if len(available) < len(keys):
+            with self._lock:
+                self.skipped_calls += len(keys) - len(available)
+
+        def score(key):
+            with self._lock:
+                entry = self._keys.get(self.circuit_id(provider, key))
+            if entry is None:
+                return (0.0, 0.0)
+            return (entry.error_rate, entry.average_latency or 0.0)
+
+        return sorted(available, key=score)
+
+    def provider_tier(self, provider: str) -> int:
+        """0 sain (ou inconnu), 1 degrade, 2 tous les circuits connus ouverts."""
+        prefix = f"{provider}:"
+        now = time.time()
+        with self._lock:
+            entries = [entry for circuit_id, entry in self._keys.items() if circuit_id.startswith(prefix)]
+        if not entries:
+            return 0
+        if all(entry.state == _OPEN and entry.open_until > now for entry in entries):
+            return 2
+        results = [ok for entry in entries for ok, _ in entry.results]
+        if results and results.count(False) / len(results) >= 0.5:
+            return 1
+        return 0
+
+    def order_providers(self, providers: List[str]) -> List[str]:
+        """Trie les fournisseurs par sante en gardant l'ordre demande a sante egale."""
+        return sorted(providers, key=self.provider_tier)
+
+    def snapshot(self) -> Dict:
+        now = time.time()
+        with self._lock:
+            circuits = {}
+            for circuit_id, entry in self._keys.items():
+                latency = entry.average_latency
+                circuits[circuit_id] = {
+                    "state": entry.state if entry.state != _OPEN or entry.open_until > now else _HALF_OPEN,
+                    "errorRate": round(entry.error_rate, 3),
+                    "avgLatencyMs": round(latency * 1000) if latency is not None else None,
+                    "openForSeconds": max(0, round(entry.open_until - now)) if entry.state == _OPEN else 0,
+                    "reason": entry.reason,
+                    "requestErrors": entry.request_errors,
+                }
+            return {
+                "shared": self.shared_store is not None,
+                "skippedCalls": self.skipped_calls,
+                "circuits": circuits,
+            }
+
+
+_registry: Optional[ProviderHealthRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_provider_health() -> ProviderHealthRegistry:
+    """Registre partage du processus, construit a la premiere utilisation."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                store_uri = os.getenv("PROVIDER_HEALTH_STORE", "memory://").strip()
+                shared_store = None
+                if store_uri.startswith("sqlite:///"):
+                    shared_store = _SQLiteCircuitStore(store_uri[len("sqlite:///"):])
+                elif not store_uri.startswith("memory://"):
+                    raise ValueError(f"PROVIDER_HEALTH_STORE non supporte: {store_uri}")
+                _registry = ProviderHealthRegistry(
+                    failure_threshold=int(os.getenv("PROVIDER_HEALTH_FAILURE_THRESHOLD", "3")),
+                    open_seconds=float(os.getenv("PROVIDER_HEALTH_OPEN_SECONDS", "30")),
+                    rate_limit_seconds=float(os.getenv("PROVIDER_HEALTH_RATE_LIMIT_SECONDS", "60")),
+                    auth_open_seconds=float(os.getenv("PROVIDER_HEALTH_AUTH_OPEN_SECONDS", "3600")),
+                    shared_store=shared_store,
+                )
+    return _registry
@@ -0,0 +1,411 @@
+# -*- coding: utf-8 -*-
+"""
+Client HTTP partage pour les fournisseurs IA (OpenRouter, Groq, ...).
+
+Un seul client par processus garde des connexions keep-alive ouvertes par
+hote: les appels successifs (cles de secours, fournisseurs de repli,
+requetes suivantes) reutilisent la connexion TLS au lieu de refaire un
+handshake TCP+TLS a chaque tentative.
+
+Backends:
+  - requests + urllib3 (defaut): pools par hote, HTTP/1.1 keep-alive
+  - httpx (PROVIDER_HTTP2=1, si les paquets httpx et h2 sont installes):
+    HTTP/2 multiplexe sur une connexion par hote
+
+Configuration:
+  PROVIDER_HTTP_POOL_CONNECTIONS  nombre d'hotes gardes en pool (10)
+  PROVIDER_HTTP_POOL_MAXSIZE      connexions par hote (20)
+  PROVIDER_HTTP_CONNECT_TIMEOUT   secondes (5)
+  PROVIDER_HTTP_READ_TIMEOUT      secondes (90)
+  PROVIDER_HTTP_POOL_TIMEOUT      attente max d'une connexion libre, secondes (10)
+  PROVIDER_HTTP2                  1 pour activer HTTP/2
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+import weakref
+from typing import Dict, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import EmptyPoolError
+
+logger = logging.getLogger(__name__)
+
+# Temps d'attente au-dela duquel l'obtention d'une connexion compte comme une attente
+_POOL_WAIT_THRESHOLD = 0.001
+
+
+class ProviderHTTPError(Exception):
+    """Erreur reseau ou HTTP d'un fournisseur (corps de reponse inclus si disponible)."""
+
+    def __init__(self, message, status_code=None, body="", retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.body = body or ""
+        self.retry_after = retry_after
+
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def parse_retry_after(headers) -> Optional[float]:
+    """Secondes avant la remise a zero du quota (Retry-After ou x-ratelimit-reset-*).
+
+    Groq annonce des durees du type ``2m59.56s`` ou ``7.66s``.
+    """
+    if not headers:
+        return None
+    candidates = []
+    for name in ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        value = headers.get(name)
+        if not value:
+            continue
+        value = str(value).strip()
+        try:
+            seconds = float(value)
+        except ValueError:
+            seconds = None
+        if seconds is not None:
+            if name == "retry-after":
+                return seconds
+            candidates.append(seconds)
+            continue
+        parts = _DURATION_PART.findall(value)
+        if parts:
+            factors = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+            candidates.append(sum(float(number) * factors[unit] for number, unit in parts))
+    return max(candidates) if candidates else None
+
+
+_SSE_DONE = object()
+
+
+def _parse_sse_line(line):
+    """Texte d'une ligne ``data: {...}`` d'un flux chat completions (None si rien)."""
+    if not line or not line.startswith("data:"):
+        return None  # lignes vides, commentaires ": keep-alive", event:
+    data = line[5:].strip()
+    if data == "[DONE]":
+        return _SSE_DONE
+    try:
+        chunk = json.loads(data)
+    except ValueError:
+        return None
+    if isinstance(chunk, dict) and chunk.get("error"):
+        # OpenRouter signale les erreurs survenues en cours de flux dans le flux
+        raise ProviderHTTPError(f"Erreur en cours de flux: {chunk['error']}", body=data)
+    try:
+        return chunk["choices"][0]["delta"].get("content") or None
+    except (KeyError, IndexError, TypeError, AttributeError):
+        return None
+
+
+class _PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_opened = 0
+        self.pool_waits = 0
+        self.pool_wait_seconds = 0.0
+        self.pool_exhausted = 0
+
+    def record_wait(self, waited):
+        if waited > _POOL_WAIT_THRESHOLD:
+            with self._lock:
+                self.pool_waits += 1
+                self.pool_wait_seconds += waited
+
+    def record_exhausted(self):
+        with self._lock:
+            self.pool_exhausted += 1
+
+    def record_request(self, new_connections=0):
+        with self._lock:
+            self.requests += 1
+            self.connections_opened += new_connections
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            reused = max(0, self.requests - self.connections_opened)
+            return {
+                "requests": self.requests,
+                "connectionsOpened": self.connections_opened,
+                "reuseRatio": round(reused / self.requests, 3) if self.requests else 0.0,
+                "poolWaits": self.pool_waits,
+                "poolWaitMs": round(self.pool_wait_seconds * 1000, 1),
+                "poolExhausted": self.pool_exhausted,
+            }
+
+
+def _metered_pool(base, metrics, pool_timeout):
+    """Sous-classe de pool urllib3 qui mesure l'attente d'une connexion libre.
+
+    requests n'indique pas de delai a ``_get_conn``: ``pool_timeout`` borne
+    l'attente, au-dela EmptyPoolError est levee.
+    """
+
+    class MeteredPool(base):
+        def _new_conn(self):
+            conn = super()._new_conn()
+            with metrics._lock:
+                metrics.connections_opened += 1
+            return conn
+
+        def _get_conn(self, timeout=None):
+            start = time.perf_counter()
+            try:
+                conn = super()._get_conn(pool_timeout if timeout is None else timeout)
+            except EmptyPoolError:
+                metrics.record_exhausted()
+                raise
+            finally:
+                metrics.record_wait(time.perf_counter() - start)
+            return conn
+
+    return MeteredPool
+
+
+class _PooledAdapter(HTTPAdapter):
+    def __init__(self, metrics, pool_timeout, **kwargs):
+        self._metrics = metrics
+        self._pool_timeout = pool_timeout
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        # block=True: au-dela de maxsize on attend une connexion libre
+        # (compte dans poolWaits) au lieu d'ouvrir des connexions jetables,
+        # au plus pool_timeout secondes (poolExhausted)
+        super().init_poolmanager(connections, maxsize, block=True, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _metered_pool(HTTPConnectionPool, self._metrics, self._pool_timeout),
+            "https": _metered_pool(HTTPSConnectionPool, self._metrics, self._pool_timeout),
+        }
+
+
+class ProviderHTTPClient:
+    """Client HTTP keep-alive partage entre tous les appels fournisseurs."""
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 20,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 90.0,
+        http2: bool = False,
+        pool_timeout: float = 10.0,
+    ):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_timeout = pool_timeout
+        self.metrics = _PoolMetrics()
+        self.backend = "requests"
+        self._httpx = None
+        if http2:
+            self._httpx = self._build_httpx_client(pool_maxsize)
+        if self._httpx is None:
+            self._session = requests.Session()
+            adapter = _PooledAdapter(
+                self.metrics, pool_timeout, pool_connections=pool_connections, pool_maxsize=pool_maxsize
+            )
+            self._session.mount("https://", adapter)
+            self._session.mount("http://", adapter)
+
+    def _build_httpx_client(self, pool_maxsize):
+        try:
+            import h2  # noqa: F401 - requis par httpx pour HTTP/2
+            import httpx
+        except ImportError:
+            logger.warning("PROVIDER_HTTP2 demande mais httpx/h2 absents: HTTP/1.1 keep-alive utilise")
+            return None
+        self.backend = "httpx-http2"
+        self._seen_connections = weakref.WeakSet()
+        return httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize),
+        )
+
+    def _timeout(self, read_timeout):
+        return (self.connect_timeout, read_timeout or self.read_timeout)
+
+    def _pool_exhausted(self, url):
+        # Sans statut HTTP: traitee comme une erreur reseau, la tentative suivante est faite
+        return ProviderHTTPError(
+            f"Pool de connexions sature: aucune connexion libre apres {self.pool_timeout:g}s pour {url}"
+        )
+
+    def post_json(self, url: str, headers: Dict, payload: Dict, read_timeout: Optional[float] = None) -> Dict:
+        """POST JSON et retourne le corps JSON; leve ProviderHTTPError sinon."""
+        return self._request_json("POST", url, headers, payload, read_timeout)
+
+    def get_json(self, url: str, headers: Dict, read_timeout: Optional[float] = None) -> Dict:
+        """GET (liste des modeles, ...) et retourne le corps JSON; leve ProviderHTTPError sinon."""
+        return self._request_json("GET", url, headers, None, read_timeout)
+
+    def _request_json(self, method, url, headers, payload, read_timeout):
+        if self._httpx is not None:
+            return self._request_json_httpx(method, url, headers, payload, read_timeout)
+        try:
+            response = self._session.request(
+                method, url, headers=headers, json=payload, timeout=self._timeout(read_timeout)
+            )
+        except EmptyPoolError:
+            raise self._pool_exhausted(url)
+        except requests.exceptions.RequestException as e:
+            raise ProviderHTTPError(str(e))
+        finally:
+            self.metrics.record_request()
+        if response.status_code >= 400:
+            raise ProviderHTTPError(
+                f"{response.status_code} Error: {response.reason} for url: {url}",
+                status_code=response.status_code,
+                body=response.text,
+                retry_after=parse_retry_after(response.headers),
+            )
+        try:
+            return response.json()
+        except ValueError as e:
+            raise ProviderHTTPError(f"Reponse non JSON: {e}", status_code=response.status_code, body=response.text)
+
+    def _request_json_httpx(self, method, url, headers, payload, read_timeout):
+        import httpx
+
+        connect, read = self._timeout(read_timeout)
+        start = time.perf_counter()
+        try:
+            response = self._httpx.request(
+                method, url, headers=headers, json=payload, timeout=httpx.Timeout(read, connect=connect, pool=self.pool_timeout)
+            )
+        except httpx.PoolTimeout:
+            self.metrics.record_request()
+            self.metrics.record_exhausted()
+            raise self._pool_exhausted(url)
+        except httpx.HTTPError as e:
+            self.metrics.record_request()
+            raise ProviderHTTPError(str(e))
+        self.metrics.record_request(self._count_new_httpx_connections())
+        logger.debug(f"{url} via {response.http_version} en {time.perf_counter() - start:.2f}s")
+        if response.status_code >= 400:
+            raise ProviderHTTPError(
+                f"{response.status_code} Error: {response.reason_phrase} for url: {url}",
+                status_code=response.status_code,
+                body=response.text,
+                retry_after=parse_retry_after(response.headers),
+            )
+        try:
+            return response.json()
+        except ValueError as e:
+            raise ProviderHTTPError(f"Reponse non JSON: {e}", status_code=response.status_code, body=response.text)
+
+    def stream_chat_completion(
+        self, url: str, headers: Dict, payload: Dict, read_timeout: Optional[float] = None
+    ) -> Iterator[str]:
+        """POST ``stream: true`` et genere les fragments de texte (SSE chat completions).
+
+        Les erreurs HTTP sont levees au premier ``next()``, avant tout fragment.
+        """
+        payload = {**payload, "stream": True}
+        if self._httpx is not None:
+            yield from self._stream_httpx(url, headers, payload, read_timeout)
+            return
+        try:
+            response = self._session.post(
+                url, headers=headers, json=payload, timeout=self._timeout(read_timeout), stream=True
+            )
+        except EmptyPoolError:
+            raise self._pool_exhausted(url)
+        except requests.exceptions.RequestException as e:
+            raise ProviderHTTPError(str(e))
+        finally:
+            self.metrics.record_request()
+        with response:
+            if response.status_code >= 400:
+                raise ProviderHTTPError(
+                    f"{response.status_code} Error: {response.reason} for url: {url}",
+                    status_code=response.status_code,
+                    body=response.text,
+                    retry_after=parse_retry_after(response.headers),
+                )
+            response.encoding = "utf-8"
+            try:
+                # chunk_size=None: les fragments sont rendus des leur arrivee
+                for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                    delta = _parse_sse_line(line)
+                    # Apres [DONE] le flux est lu jusqu'au bout pour que la
+                    # connexion retourne au pool au lieu d'etre coupee
+                    if delta and delta is not _SSE_DONE:
+                        yield delta
+            except requests.exceptions.RequestException as e:
+                raise ProviderHTTPError(f"Flux interrompu: {e}")
+
+    def _stream_httpx(self, url, headers, payload, read_timeout):
+        import httpx
+
+        connect, read = self._timeout(read_timeout)
+        try:
+            with self._httpx.stream(
+                "POST", url, headers=headers, json=payload, timeout=httpx.Timeout(read, connect=connect, pool=self.pool_timeout)
+            ) as response:
+                self.metrics.record_request(self._count_new_httpx_connections())
+                if response.status_code >= 400:
+                    response.read()
+                    raise ProviderHTTPError(
+                        f"{response.status_code} Error: {response.reason_phrase} for url: {url}",
+                        status_code=response.status_code,
+                        body=response.text,
+                        retry_after=parse_retry_after(response.headers),
+                    )
+                for line in response.iter_lines():
+                    delta = _parse_sse_line(line)
+                    if delta and delta is not _SSE_DONE:
+                        yield delta
+        except httpx.PoolTimeout:
+            self.metrics.record_exhausted()
+            raise self._pool_exhausted(url)
+        except httpx.HTTPError as e:
+            raise ProviderHTTPError(str(e))
+
+    def _count_new_httpx_connections(self) -> int:
+        pool = getattr(getattr(self._httpx, "_transport", None), "_pool", None)
+        new = 0
+        for connection in getattr(pool, "connections", []):
+            if connection not in self._seen_connections:
+                self._seen_connections.add(connection)
+                new += 1
+        return new
+
+    def get_metrics(self) -> Dict:
+        return {"backend": self.backend, **self.metrics.snapshot()}
+
+    def close(self):
+        if self._httpx is not None:
+            self._httpx.close()
+        else:
+            self._session.close()
+
+
+_client: Optional[ProviderHTTPClient] = None
+_client_lock = threading.Lock()
+
+
+def get_provider_http_client() -> ProviderHTTPClient:
+    """Client partage du processus, construit a la premiere utilisation."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ProviderHTTPClient(
+                    pool_connections=int(os.getenv("PROVIDER_HTTP_POOL_CONNECTIONS", "10")),
+                    pool_maxsize=int(os.getenv("PROVIDER_HTTP_POOL_MAXSIZE", "20")),
+                    connect_timeout=float(os.getenv("PROVIDER_HTTP_CONNECT_TIMEOUT", "5")),
+                    read_timeout=float(os.getenv("PROVIDER_HTTP_READ_TIMEOUT", "90")),
+                    http2=os.getenv("PROVIDER_HTTP2", "0") == "1",
+                    pool_timeout=float(os.getenv("PROVIDER_HTTP_POOL_TIMEOUT", "10")),
+                )
+                logger.info(f"Client HTTP fournisseurs initialise ({_client.backend})")
+    return _client
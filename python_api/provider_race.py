@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+Course "hedgee" entre fournisseurs IA.
+
+Mode sequentiel (defaut historique): un fournisseur a la fois, dans le
+thread appelant; le suivant n'est tente qu'apres l'echec du precedent. Le
+budget global est verifie avant chaque tentative (un appel en cours est
+borne par le timeout de lecture du client HTTP).
+
+Mode hedged: le fournisseur prefere demarre seul; si aucune reponse n'est
+arrivee apres le delai de couverture (fixe, ou p95 observe du fournisseur
+en mode adaptatif), le suivant est lance en parallele. Le premier quiz
+valide l'emporte, les appels restants sont ignores (leur resultat est
+jete a l'arrivee). Un echec lance immediatement le fournisseur suivant.
+Chaque course a son propre pool (un thread par fournisseur): une tentative
+n'attend jamais derriere celles d'autres requetes, et le delai de
+couverture comme la latence mesuree partent du debut reel de l'appel. Le
+budget global borne l'attente totale.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """Latences recentes des appels reussis, par fournisseur."""
+
+    def __init__(self, window: int = 50):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(provider, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, provider: str, pct: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(provider, ()))
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, math.ceil(pct / 100 * len(samples)) - 1))
+        return samples[index]
+
+    def count(self, provider: str) -> int:
+        with self._lock:
+            return len(self._samples.get(provider, ()))
+
+    def snapshot(self) -> Dict:
+        providers = list(self._samples)
+        return {
+            provider: {
+                "samples": self.count(provider),
+                "p50Ms": round(self.percentile(provider, 50) * 1000),
+                "p95Ms": round(self.percentile(provider, 95) * 1000),
+            }
+            for provider in providers
+            if self.count(provider)
+        }
+
+
+class _Attempt:
+    """Tentative lancee dans le pool d'une course; ``started_at`` pose au debut reel."""
+
+    __slots__ = ("provider", "started_at")
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self.started_at: Optional[float] = None
+
+
+class ProviderRace:
+    """Lance les tentatives fournisseur selon le mode et retourne la premiere valide."""
+
+    # Attente maximale entre deux verifications du demarrage d'une tentative
+    _START_POLL = 0.01
+
+    def __init__(
+        self,
+        hedge_delay: float = 8.0,
+        adaptive: bool = False,
+        min_hedge_delay: float = 1.0,
+        min_samples: int = 5,
+        tracker: Optional[LatencyTracker] = None,
+    ):
+        self.hedge_delay = hedge_delay
+        self.adaptive = adaptive
+        self.min_hedge_delay = min_hedge_delay
+        self.min_samples = min_samples
+        self.tracker = tracker or LatencyTracker()
+        self._lock = threading.Lock()
+        self.races = 0
+        self.hedges_launched = 0
+        self.hedge_wins = 0
+        self.budget_exhausted = 0
+
+    def hedge_delay_for(self, provider: str, hedge_delay: Optional[float] = None) -> float:
+        """Delai avant de couvrir ``provider``: p95 observe en adaptatif, sinon fixe."""
+        if hedge_delay is not None:
+            return hedge_delay
+        if self.adaptive and self.tracker.count(provider) >= self.min_samples:
+            return max(self.min_hedge_delay, self.tracker.percentile(provider, 95))
+        return self.hedge_delay
+
+    def _timed_call(self, call, provider, attempt: Optional[_Attempt] = None):
+        start = time.perf_counter()
+        if attempt is not None:
+            attempt.started_at = time.monotonic()
+        result = call(provider)
+        self.tracker.record(provider, time.perf_counter() - start)
+        return result
+
+    def _exhausted(self, errors: List[str], budget: float):
+        with self._lock:
+            self.budget_exhausted += 1
+        errors.append(f"budget de {budget:.1f}s epuise")
+        return ValueError(" | ".join(errors))
+
+    def run(
+        self,
+        providers: List[str],
+        call: Callable[[str], object],
+        hedged: bool = False,
+        budget: Optional[float] = None,
+        hedge_delay: Optional[float] = None,
+    ) -> Tuple[str, object, List[str]]:
+        """Retourne (fournisseur, resultat, erreurs des perdants).
+
+        ``call(provider)`` doit lever ValueError si la reponse est inutilisable
+        (fournisseur en erreur ou quiz non parseable).
+        """
+        if not providers:
+            raise ValueError("Aucun fournisseur IA a tenter")
+        with self._lock:
+            self.races += 1
+
+        deadline = time.monotonic() + budget if budget else math.inf
+        if hedged and len(providers) > 1:
+            return self._run_hedged(providers, call, deadline, budget, hedge_delay)
+        return self._run_sequential(providers, call, deadline, budget)
+
+    def _run_sequential(self, providers, call, deadline, budget):
+        errors: List[str] = []
+        for provider in providers:
+            if time.monotonic() >= deadline:
+                raise self._exhausted(errors, budget)
+            logger.info(f"Tentative de generation avec {provider}")
+            try:
+                return provider, self._timed_call(call, provider), errors
+            except ValueError as e:
+                errors.append(f"{provider}: {e}")
+                logger.warning(f"Provider {provider} indisponible: {e}")
+        raise ValueError(" | ".join(errors))
+
+    def _run_hedged(self, providers, call, deadline, budget, hedge_delay):
+        # Pool propre a la course: les perdants finissent en arriere-plan
+        executor = ThreadPoolExecutor(max_workers=len(providers), thread_name_prefix="provider-race")
+        try:
+            return self._race(executor, providers, call, deadline, budget, hedge_delay)
+        finally:
+            executor.shutdown(wait=False)
+
+    def _race(self, executor, providers, call, deadline, budget, hedge_delay):
+        pending = {}
+        errors: List[str] = []
+        next_index = 0
+        latest: Optional[_Attempt] = None
+
+        def launch():
+            nonlocal next_index, latest
+            latest = _Attempt(providers[next_index])
+            next_index += 1
+            logger.info(f"Tentative de generation avec {latest.provider}")
+            pending[executor.submit(self._timed_call, call, latest.provider, latest)] = latest.provider
+
+        def next_launch_at():
+            if next_index >= len(providers) or latest.provider not in pending.values():
+                return math.inf
+            if latest.started_at is None:
+                # Pas encore demarree: le delai de couverture ne court pas
+                return time.monotonic() + self._START_POLL
+            return latest.started_at + self.hedge_delay_for(latest.provider, hedge_delay)
+
+        launch()
+        while True:
+            hedge_at = next_launch_at()
+            wake_at = min(hedge_at, deadline)
+            timeout = None if wake_at == math.inf else max(0.0, wake_at - time.monotonic())
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            failed = False
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    result = future.result()
+                except ValueError as e:
+                    errors.append(f"{provider}: {e}")
+                    logger.warning(f"Provider {provider} indisponible: {e}")
+                    failed = True
+                    continue
+                if providers[0] in pending.values():
+                    with self._lock:
+                        self.hedge_wins += 1
+                if pending:
+                    logger.info(f"{provider} gagne la course, {len(pending)} appel(s) ignore(s)")
+                return provider, result, errors
+
+            now = time.monotonic()
+            if now >= deadline:
+                raise self._exhausted(errors, budget)
+
+            if next_index < len(providers):
+                if failed or not pending:
+                    launch()
+                elif latest.started_at is not None and now >= next_launch_at():
+                    with self._lock:
+                        self.hedges_launched += 1
+                    logger.info(f"Pas de reponse de {', '.join(pending.values())}: couverture lancee")
+                    launch()
+            elif not pending:
+                raise ValueError(" | ".join(errors))
+
+    def get_metrics(self) -> Dict:
+        with self._lock:
+            return {
+                "races": self.races,
+                "hedgesLaunched": self.hedges_launched,
+                "hedgeWins": self.hedge_wins,
+                "budgetExhausted": self.budget_exhausted,
+                "latency": self.tracker.snapshot(),
+            }
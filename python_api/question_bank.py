@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+Banque de questions generees, reutilisables sans rappeler le modele.
+
+Chaque question produite par /api/generate ou /api/manual-assistant est
+enregistree (SQLite, fonctionne hors ligne) avec l'empreinte du texte
+source, et indexee dans un index inverse terme -> questions.
+
+Pour une nouvelle demande, les termes du texte source interrogent l'index
+(classement BM25); une question candidate n'est retenue que si le texte
+source couvre l'essentiel de ses termes (couverture ponderee par l'IDF,
+QUESTION_BANK_MIN_COVERAGE): elle porte alors sur ce que dit le cours.
+Le modele n'est appele que pour les questions manquantes.
+
+QUESTION_BANK_URL: none:// (desactive) ou sqlite:////data/question_bank.db
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from question_dedup import normalize_for_matching, question_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Mots vides ecartes de l'index (gabarits de questions et mots grammaticaux)
+_STOPWORDS = frozenset("""
+    quel quelle quels quelles qui que quoi quand comment pourquoi combien lequel laquelle
+    est sont etait etre ont avoir fait faire les des une dans pour par sur avec aux ces cette
+    son ses leur leurs plus moins entre parmi suivant suivante suivants suivantes mais donc
+    ainsi aussi comme tout tous toute toutes elle elles ils nous vous peut peuvent sans sous
+    apres avant selon pendant lors durant chez document texte cours question reponse
+    what which who whom whose when where why how does did the are was were this that these
+    those with from for into and not following main can will would been have has
+""".split())
+
+
+_DOUBLED = re.compile(r"(.)\1+")
+
+
+def _stem(word: str) -> str:
+    # Racine grossiere: sans pluriel ni e final, lettres doublees reduites
+    # ("rejette", "rejetes" -> "rejet")
+    stem = _DOUBLED.sub(r"\1", word.rstrip("sx").rstrip("e"))
+    return stem if len(stem) > 2 else word
+
+
+def extract_terms(text: str) -> List[str]:
+    """Termes indexes: racines des mots normalises de 3 lettres ou plus, hors mots vides."""
+    return [
+        _stem(word) for word in normalize_for_matching(text).split()
+        if len(word) > 2 and word not in _STOPWORDS
+    ]
+
+
+def source_digest(text: str) -> str:
+    return hashlib.blake2b(" ".join((text or "").split()).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _question_terms(question: Dict) -> List[str]:
+    # Enonce + bonne reponse: les distracteurs ne figurent pas dans le cours
+    parts = [str(question.get("text", ""))]
+    parts.extend(
+        str(option.get("text", "")) for option in question.get("options") or []
+        if isinstance(option, dict) and option.get("isCorrect")
+    )
+    return extract_terms(" ".join(parts))
+
+
+class QuestionBank:
+    """Questions en SQLite + index inverse (terme, question, frequence)."""
+
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75, min_coverage: float = 0.6,
+                 max_query_terms: int = 256, candidate_factor: int = 5):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.min_coverage = min_coverage
+        self.max_query_terms = max_query_terms
+        self.candidate_factor = candidate_factor
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.searches = 0
+        self.reused = 0
+        self.added = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS bank_questions ("
+            " id INTEGER PRIMARY KEY,"
+            " fingerprint TEXT NOT NULL UNIQUE,"
+            " source_digest TEXT NOT NULL,"
+            " difficulty TEXT NOT NULL,"
+            " origin TEXT NOT NULL,"
+            " length INTEGER NOT NULL,"
+            " data TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS bank_postings ("
+            " term TEXT NOT NULL, question_id INTEGER NOT NULL, tf INTEGER NOT NULL,"
+            " PRIMARY KEY (term, question_id)) WITHOUT ROWID"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS bank_postings_question ON bank_postings (question_id)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def add(self, questions: Iterable[Dict], source_text: str, origin: str = "generate") -> int:
+        """Enregistre les questions (une seule fois par enonce normalise)."""
+        digest = source_digest(source_text)
+        now = time.time()
+        conn = self._conn()
+        added = 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for question in questions:
+                fingerprint = question_fingerprint(question)
+                terms = Counter(_question_terms(question))
+                if not fingerprint or not terms:
+                    continue
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO bank_questions"
+                    " (fingerprint, source_digest, difficulty, origin, length, data, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (fingerprint, digest, question.get("difficulty") or "medium", origin,
+                     sum(terms.values()), json.dumps(question, ensure_ascii=False), now),
+                )
+                if cursor.rowcount != 1:
+                    continue
+                conn.executemany(
+                    "INSERT INTO bank_postings (term, question_id, tf) VALUES (?, ?, ?)",
+                    [(term, cursor.lastrowid, tf) for term, tf in terms.items()],
+                )
+                added += 1
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self.added += added
+        return added
+
+    def search(self, source_text: str, difficulty: str, limit: int,
+               min_coverage: Optional[float] = None) -> List[Dict]:
+        """Jusqu'a ``limit`` questions de la banque couvertes par le texte source, les plus pertinentes d'abord."""
+        min_coverage = self.min_coverage if min_coverage is None else min_coverage
+        with self._lock:
+            self.searches += 1
+        source_terms = Counter(extract_terms(source_text))
+        if not source_terms or limit <= 0:
+            return []
+        conn = self._conn()
+        total, average_length = conn.execute(
+            "SELECT COUNT(*), AVG(length) FROM bank_questions WHERE difficulty = ?", (difficulty,)
+        ).fetchone()
+        if not total:
+            return []
+
+        # Requete: les termes les plus frequents du texte source
+        query = [term for term, _ in source_terms.most_common(self.max_query_terms)]
+        placeholders = ",".join("?" * len(query))
+        rows = conn.execute(
+            f"SELECT p.term, p.question_id, p.tf, q.length FROM bank_postings p"
+            f" JOIN bank_questions q ON q.id = p.question_id"
+            f" WHERE p.term IN ({placeholders}) AND q.difficulty = ?",
+            (*query, difficulty),
+        ).fetchall()
+        if not rows:
+            return []
+
+        document_frequency = Counter(term for term, _, _, _ in rows)
+        scores: Dict[int, float] = {}
+        for term, question_id, tf, length in rows:
+            idf = self._idf(total, document_frequency[term])
+            norm = tf + self.k1 * (1 - self.b + self.b * length / (average_length or 1))
+            scores[question_id] = scores.get(question_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+        candidates = sorted(scores, key=scores.get, reverse=True)[:limit * self.candidate_factor]
+
+        # Couverture: part (ponderee IDF) des termes de la question presents dans le texte source
+        placeholders = ",".join("?" * len(candidates))
+        postings = conn.execute(
+            f"SELECT question_id, term FROM bank_postings WHERE question_id IN ({placeholders})",
+            candidates,
+        ).fetchall()
+        candidate_terms: Dict[int, List[str]] = {}
+        for question_id, term in postings:
+            candidate_terms.setdefault(question_id, []).append(term)
+        all_terms = sorted({term for terms in candidate_terms.values() for term in terms})
+        frequencies = dict(conn.execute(
+            f"SELECT term, COUNT(*) FROM bank_postings WHERE term IN ({','.join('?' * len(all_terms))})"
+            f" GROUP BY term",
+            all_terms,
+        ).fetchall())
+
+        accepted = []
+        for question_id in candidates:
+            terms = candidate_terms.get(question_id, [])
+            weights = [self._idf(total, frequencies.get(term, 1)) for term in terms]
+            covered = sum(weight for term, weight in zip(terms, weights) if term in source_terms)
+            if weights and covered / sum(weights) >= min_coverage:
+                accepted.append(question_id)
+            if len(accepted) >= limit:
+                break
+        if not accepted:
+            return []
+
+        data = dict(conn.execute(
+            f"SELECT id, data FROM bank_questions WHERE id IN ({','.join('?' * len(accepted))})", accepted
+        ).fetchall())
+        questions = [json.loads(data[question_id]) for question_id in accepted]
+        with self._lock:
+            self.reused += len(questions)
+        return questions
+
+    def _idf(self, total: int, document_frequency: int) -> float:
+        return math.log(1 + (total - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def stats(self) -> Dict:
+        conn = self._conn()
+        questions = conn.execute("SELECT COUNT(*) FROM bank_questions").fetchone()[0]
+        terms = conn.execute("SELECT COUNT(DISTINCT term) FROM bank_postings").fetchone()[0]
+        with self._lock:
+            return {
+                "questions": questions,
+                "terms": terms,
+                "added": self.added,
+                "searches": self.searches,
+                "reused": self.reused,
+                "minCoverage": self.min_coverage,
+            }
+
+
+def create_question_bank(uri: Optional[str], min_coverage: float = 0.6) -> Optional[QuestionBank]:
+    """None pour none:// (banque desactivee), sinon banque SQLite."""
+    uri = (uri or "none://").strip()
+    if uri.startswith("none://"):
+        return None
+    if uri.startswith("sqlite:///"):
+        return QuestionBank(uri[len("sqlite:///"):], min_coverage=min_coverage)
+    raise ValueError(f"QUESTION_BANK_URL non supportee: {uri}")
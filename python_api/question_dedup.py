@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+Detection des questions quasi dupliquees (paraphrases) pour tous les fournisseurs.
+
+Chaque question est representee par deux vecteurs de n-grammes de
+caracteres (hachage dans ``dim`` cases, normalises L2): les mots porteurs
+de sens de l'enonce (sans mots de gabarit), et ses options triees. La
+similarite entre deux questions est le cosinus de ces vecteurs, pondere
+entre enonce et options (nulle si les nombres de l'enonce different); au-dela
+du seuil, la question la plus tardive est ecartee. Un enonce trop court
+(``min_stem_chars``) ne compte que s'il est identique: "signifie http" et
+"signifie https" partagent presque tous leurs n-grammes. Seuls les accents
+et signes diacritiques sont retires: les lettres de toutes les ecritures
+(arabe, ...) sont gardees et hachees en octets UTF-8. Tout le calcul est vectorise avec NumPy: un
+produit matriciel donne toutes les similarites d'un lot (des centaines de
+questions fusionnees en quelques millisecondes).
+
+Sans NumPy, repli sur l'egalite exacte des textes normalises (un enonce
+vide n'est jamais un doublon).
+"""
+
+import logging
+import re
+import unicodedata
+from typing import Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r"[\W_]+")
+_NUMBER = re.compile(r"\d+")
+
+# Mots de gabarit ("quelle est la ...", "which of the ..."): communs a des
+# questions differentes, ils masqueraient les termes qui les distinguent
+_STOPWORDS = frozenset("""
+    quel quelle quels quelles qui que quoi quand comment pourquoi combien lequel laquelle
+    est sont etait ont fait les des une dans pour par sur avec aux ces cette son sa ses
+    leur leurs plus moins entre parmi suivant suivante suivants suivantes principal principale
+    what which who whom whose when where why how does did the are was were this that these
+    those with from for into of and or not following main
+""".split())
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15  # hachage multiplicatif de Fibonacci (64 bits)
+
+
+def strip_accents(text: str) -> str:
+    """Sans signes diacritiques (NFKD, marques combinantes retirees), autres lettres gardees."""
+    if text.isascii():
+        return text
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in text if unicodedata.category(char) != "Mn")
+
+
+def normalize_for_matching(text: str) -> str:
+    """Minuscules, sans accents ni ponctuation, espaces simples."""
+    return _NON_WORD.sub(" ", strip_accents(str(text or "").lower())).strip()
+
+
+def question_fingerprint(question: Dict) -> str:
+    """Enonce normalise: egalite exacte modulo casse, accents et ponctuation."""
+    return normalize_for_matching(question.get("text", ""))
+
+
+def _numbers(question: Dict) -> str:
+    # "3 + 4" et "5 + 6" ne different que par les nombres: jamais des doublons
+    return " ".join(sorted(set(_NUMBER.findall(question_fingerprint(question)))))
+
+
+def _content_text(question: Dict) -> str:
+    words = question_fingerprint(question).split()
+    content = [word for word in words if len(word) > 2 and word not in _STOPWORDS]
+    return " ".join(content or words)
+
+
+def _option_text(question: Dict) -> str:
+    options = question.get("options") or []
+    texts = [normalize_for_matching(opt.get("text", "")) for opt in options if isinstance(opt, dict)]
+    # Triees: l'ordre des options ne change pas la question
+    return " | ".join(sorted(text for text in texts if text))
+
+
+def ngram_vectors(texts: Sequence[str], ngram: int = 3, dim: int = 1024):
+    """Matrice (len(texts), dim) des n-grammes de caracteres haches, lignes normalisees L2.
+
+    Les textes sont concatenes dans un seul tableau d'octets: identifiants de
+    n-grammes, cases et comptages sont calcules sans boucle Python par n-gramme.
+    """
+    bits = dim.bit_length() - 1
+    if 1 << bits != dim:
+        raise ValueError("dim doit etre une puissance de 2")
+    padded = [f" {text} ".encode("utf-8") for text in texts]
+    lengths = np.fromiter((len(raw) for raw in padded), dtype=np.int64, count=len(padded))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1])) if len(padded) else np.zeros(0, np.int64)
+    data = np.frombuffer(b"".join(padded), dtype=np.uint8).astype(np.uint64)
+    if len(data) < ngram:
+        return np.zeros((len(padded), dim), dtype=np.float32)
+
+    positions = np.arange(len(data) - ngram + 1)
+    ids = np.zeros(len(positions), dtype=np.uint64)
+    for offset in range(ngram):
+        ids = ids * np.uint64(257) + data[offset:len(data) - ngram + 1 + offset]
+    rows = np.searchsorted(starts, positions, side="right") - 1
+    # N-grammes a cheval sur deux textes ecartes
+    valid = positions + ngram <= starts[rows] + lengths[rows]
+    buckets = (ids[valid] * np.uint64(_HASH_MULTIPLIER)) >> np.uint64(64 - bits)
+    counts = np.bincount(rows[valid] * dim + buckets.astype(np.int64), minlength=len(padded) * dim)
+    matrix = counts.reshape(len(padded), dim).astype(np.float32)
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class NearDuplicateFilter:
+    """Ecarte les questions dont la similarite avec une precedente depasse ``threshold``."""
+
+    def __init__(self, threshold: float = 0.8, option_weight: float = 0.25, ngram: int = 3, dim: int = 1024,
+                 min_stem_chars: int = 20):
+        self.threshold = threshold
+        self.option_weight = option_weight
+        self.min_stem_chars = min_stem_chars
+        self.ngram = ngram
+        self.dim = dim
+
+    def similarity_matrix(self, questions: Sequence[Dict]):
+        """Similarites ponderees (enonce, options) de toutes les paires."""
+        contents = [_content_text(q) for q in questions]
+        stems = ngram_vectors(contents, self.ngram, self.dim)
+        options = ngram_vectors([_option_text(q) for q in questions], self.ngram, self.dim)
+        stem_similarity = stems @ stems.T
+        short = np.array([len(content) < self.min_stem_chars for content in contents])
+        if short.any():
+            # Enonces courts: egalite exacte au lieu du cosinus
+            codes = np.unique(contents, return_inverse=True)[1]
+            pairs = short[:, None] | short[None, :]
+            stem_similarity[pairs] = (codes[:, None] == codes[None, :])[pairs]
+        similarity = (1 - self.option_weight) * stem_similarity + self.option_weight * (options @ options.T)
+        numbers = [_numbers(q) for q in questions]
+        if any(numbers):
+            codes = np.unique(numbers, return_inverse=True)[1]
+            similarity[codes[:, None] != codes[None, :]] = 0.0
+        return similarity
+
+    def duplicate_indices(self, questions: Sequence[Dict]) -> List[int]:
+        """Indices des questions quasi identiques a une question precedente conservee."""
+        count = len(questions)
+        if count < 2:
+            return []
+        if not NUMPY_AVAILABLE:
+            seen = set()
+            duplicates = []
+            for index, question in enumerate(questions):
+                fingerprint = question_fingerprint(question)
+                if fingerprint and fingerprint in seen:
+                    duplicates.append(index)
+                seen.add(fingerprint)
+            return duplicates
+
+        similar = self.similarity_matrix(questions) >= self.threshold
+        kept = np.ones(count, dtype=bool)
+        for index in range(count - 1):
+            if kept[index]:
+                kept[index + 1:] &= ~similar[index, index + 1:]
+        return np.flatnonzero(~kept).tolist()
+
+    def filter(self, questions: Sequence[Dict]) -> Tuple[List[Dict], List[int]]:
+        """(questions conservees dans l'ordre, indices ecartes)."""
+        duplicates = self.duplicate_indices(questions)
+        if not duplicates:
+            return list(questions), []
+        dropped = set(duplicates)
+        logger.info(f"{len(duplicates)} question(s) quasi dupliquee(s) ecartee(s) sur {len(questions)}")
+        return [q for index, q in enumerate(questions) if index not in dropped], duplicates
+
+
+class NearDuplicateIndex:
+    """Version incrementale (questions recues une a une, ex: flux SSE)."""
+
+    def __init__(self, dedup: NearDuplicateFilter):
+        self.dedup = dedup
+        self._fingerprints = set()
+        self._contents = []
+        self._stems = []
+        self._options = []
+        self._numbers = []
+
+    def add(self, question: Dict) -> bool:
+        """Indexe la question et retourne True, ou False si c'est un quasi doublon."""
+        if not NUMPY_AVAILABLE:
+            fingerprint = question_fingerprint(question)
+            if fingerprint and fingerprint in self._fingerprints:
+                return False
+            self._fingerprints.add(fingerprint)
+            return True
+
+        dedup = self.dedup
+        content = _content_text(question)
+        stem = ngram_vectors([content], dedup.ngram, dedup.dim)[0]
+        option = ngram_vectors([_option_text(question)], dedup.ngram, dedup.dim)[0]
+        numbers = _numbers(question)
+        if self._stems:
+            stem_scores = np.stack(self._stems) @ stem
+            for index, previous in enumerate(self._contents):
+                if min(len(content), len(previous)) < dedup.min_stem_chars:
+                    stem_scores[index] = float(content == previous)
+            scores = ((1 - dedup.option_weight) * stem_scores
+                      + dedup.option_weight * (np.stack(self._options) @ option))
+            scores[np.array(self._numbers) != numbers] = 0.0
+            if scores.max() >= dedup.threshold:
+                return False
+        self._contents.append(content)
+        self._stems.append(stem)
+        self._options.append(option)
+        self._numbers.append(numbers)
+        return True
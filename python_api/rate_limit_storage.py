@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+Stockage SQLite des compteurs de flask-limiter, partage par les workers d'un hote.
+
+Avec ``memory://`` chaque worker gunicorn compte de son cote: "20 per
+minute" devient 20 x nombre de workers, et tout repart de zero au
+redemarrage. RATELIMIT_STORAGE_URI choisit le stockage:
+
+  memory://                          par worker (developpement)
+  sqlite:////data/rate_limits.db     workers d'un hote, survit au redemarrage
+  sqlite:////dev/shm/rate_limits.db  idem en memoire partagee (sans disque)
+  redis://host:6379/0                plusieurs hotes (stockage Redis de
+                                     ``limits``, fenetre glissante en script Lua)
+
+Fenetre glissante (RATELIMIT_STRATEGY=moving-window): chaque cle est une
+seule ligne dont les horodatages des requetes de la fenetre sont packes
+(8 octets chacun, au plus ``limit``). Une requete = une transaction:
+lecture, retrait des horodatages sortis de la fenetre et ajout en une
+seule ecriture. Les cles expirees sont purgees par lots
+(RATELIMIT_PURGE_INTERVAL), pas a chaque requete.
+
+Importer ce module enregistre le schema ``sqlite`` aupres de ``limits``.
+"""
+
+import bisect
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Optional, Tuple
+
+from limits.storage import MovingWindowSupport, Storage
+
+
+def _unpack(blob: Optional[bytes]) -> array:
+    entries = array("d")
+    if blob:
+        entries.frombytes(blob)
+    return entries
+
+
+class SQLiteRateLimitStorage(Storage, MovingWindowSupport):
+    """Fenetres fixes (compteur + expiration) et glissantes (horodatages packes)."""
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri: Optional[str] = None, wrap_exceptions: bool = False,
+                 purge_interval: float = 60.0, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.path = (uri or "")[len("sqlite:///"):]
+        if not self.path:
+            raise ValueError(f"URI de stockage des limites invalide: {uri}")
+        self.purge_interval = float(purge_interval)
+        self._local = threading.local()
+        self._last_purge = 0.0
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_counters ("
+            " key TEXT PRIMARY KEY, value INTEGER NOT NULL, expires_at REAL NOT NULL) WITHOUT ROWID"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_windows ("
+            " key TEXT PRIMARY KEY, entries BLOB NOT NULL, expires_at REAL NOT NULL) WITHOUT ROWID"
+        )
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            # WAL: une ecriture perdue au pire en cas de coupure, pas de fsync par requete
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self, work):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = work(conn, time.time())
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def _maybe_purge(self, conn: sqlite3.Connection, now: float):
+        if now - self._last_purge < self.purge_interval:
+            return
+        self._last_purge = now
+        conn.execute("DELETE FROM rate_counters WHERE expires_at <= ?", (now,))
+        conn.execute("DELETE FROM rate_windows WHERE expires_at <= ?", (now,))
+
+    # --- Fenetre fixe ---
+
+    def incr(self, key: str, expiry: float, elastic_expiry: bool = False, amount: int = 1) -> int:
+        def work(conn, now):
+            self._maybe_purge(conn, now)
+            row = conn.execute("SELECT value, expires_at FROM rate_counters WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] <= now:
+                value, expires_at = amount, now + expiry
+            else:
+                value = row[0] + amount
+                expires_at = now + expiry if elastic_expiry else row[1]
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_counters (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+            return value
+
+        return self._transaction(work)
+
+    def get(self, key: str) -> int:
+        row = self._conn().execute(
+            "SELECT value FROM rate_counters WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key: str) -> float:
+        row = self._conn().execute(
+            "SELECT expires_at FROM rate_counters WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else time.time()
+
+    # --- Fenetre glissante ---
+
+    def acquire_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+
+        def work(conn, now):
+            self._maybe_purge(conn, now)
+            row = conn.execute("SELECT entries FROM rate_windows WHERE key = ?", (key,)).fetchone()
+            entries = _unpack(row[0] if row else None)
+            del entries[:bisect.bisect_right(entries, now - expiry)]
+            if len(entries) + amount > limit:
+                return False
+            entries.extend([now] * amount)
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_windows (key, entries, expires_at) VALUES (?, ?, ?)",
+                (key, entries.tobytes(), now + expiry),
+            )
+            return True
+
+        return self._transaction(work)
+
+    def get_moving_window(self, key: str, limit: int, expiry: int) -> Tuple[float, int]:
+        now = time.time()
+        row = self._conn().execute(
+            "SELECT entries FROM rate_windows WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        entries = _unpack(row[0] if row else None)
+        del entries[:bisect.bisect_right(entries, now - expiry)]
+        if not entries:
+            return now, 0
+        return entries[0], len(entries)
+
+    # --- Administration ---
+
+    def check(self) -> bool:
+        try:
+            self._conn().execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> Optional[int]:
+        def work(conn, now):
+            cleared = conn.execute("DELETE FROM rate_counters").rowcount
+            return cleared + conn.execute("DELETE FROM rate_windows").rowcount
+
+        return self._transaction(work)
+
+    def clear(self, key: str) -> None:
+        def work(conn, now):
+            conn.execute("DELETE FROM rate_counters WHERE key = ?", (key,))
+            conn.execute("DELETE FROM rate_windows WHERE key = ?", (key,))
+
+        self._transaction(work)
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+Analyse des reponses JSON des modeles IA.
+
+StreamingQuestionParser lit une reponse en cours de generation (fragments
+de streaming) et rend chaque objet du tableau "questions" des qu'il est
+complet, sans attendre la fin de la reponse. Le balayage est lineaire: un
+etat (profondeur, chaine en cours, echappement) est conserve entre les
+fragments et le texte deja consomme est libere au fil de l'eau.
+
+parse_json_response analyse une reponse complete: un seul balayage des
+accolades (hors chaines) delimite les objets JSON, en privilegiant un bloc
+```json```; le texte autour (explications, accolades d'un commentaire) est
+ignore. Si la reponse est tronquee (max_tokens atteint) ou mal formee, les
+objets complets du tableau attendu sont recuperes un par un.
+"""
+
+import json
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_SPECIAL = re.compile(r'[{}"\\]')
+_FENCE = "```"
+
+
+def _array_pattern(array_key: str):
+    return re.compile(r'"%s"\s*:\s*\[' % re.escape(array_key))
+
+
+_QUESTIONS_ARRAY = _array_pattern("questions")
+
+
+class StreamingQuestionParser:
+    """Extrait les questions du tableau ``"questions"`` au fil des fragments recus."""
+
+    def __init__(self, array_key: str = "questions"):
+        self._array = _QUESTIONS_ARRAY if array_key == "questions" else _array_pattern(array_key)
+        self._text = ""
+        self._pos = 0
+        self._in_array = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._item_start = None
+        self.finished = False
+        self.items_seen = 0
+        self.invalid_items = 0
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Ajoute un fragment et retourne les questions devenues completes."""
+        if self.finished or not chunk:
+            return []
+        self._text += chunk
+        if not self._in_array and not self._find_array():
+            return []
+        return self._scan()
+
+    def _find_array(self) -> bool:
+        match = self._array.search(self._text)
+        if match:
+            start = match.end()
+        elif self._text.lstrip().startswith("["):
+            # Tableau de questions renvoye sans objet englobant
+            start = self._text.index("[") + 1
+        else:
+            return False
+        self._text = self._text[start:]
+        self._pos = 0
+        self._in_array = True
+        return True
+
+    def _scan(self) -> List[Dict[str, Any]]:
+        items = []
+        text = self._text
+        index = self._pos
+        length = len(text)
+        while index < length:
+            char = text[index]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{" or char == "[":
+                if self._depth == 0:
+                    self._item_start = index
+                self._depth += 1
+            elif char == "}" or char == "]":
+                if self._depth == 0:
+                    # Fin du tableau "questions"
+                    self.finished = True
+                    break
+                self._depth -= 1
+                if self._depth == 0 and self._item_start is not None:
+                    item = self._decode(text[self._item_start:index + 1])
+                    if item is not None:
+                        items.append(item)
+                    self._item_start = None
+            index += 1
+
+        # Libere le texte consomme: seul l'objet en cours reste en memoire
+        keep_from = self._item_start if self._item_start is not None else index
+        self._text = text[keep_from:]
+        self._pos = index - keep_from
+        if self._item_start is not None:
+            self._item_start = 0
+        return items
+
+    def _decode(self, raw: str):
+        self.items_seen += 1
+        try:
+            item = json.loads(raw)
+        except json.JSONDecodeError as e:
+            self.invalid_items += 1
+            logger.warning(f"Question {self.items_seen} ignoree (JSON invalide): {e}")
+            return None
+        if not isinstance(item, dict):
+            self.invalid_items += 1
+            return None
+        return item
+
+
+def iter_json_objects(text: str) -> Iterator[str]:
+    """Objets ``{...}`` de premier niveau du texte, dans l'ordre.
+
+    Seuls les caracteres significatifs (accolades, guillemets, antislash)
+    sont visites; les accolades dans les chaines JSON ne comptent pas.
+    """
+    depth = 0
+    start = 0
+    in_string = False
+    skip = -1
+    for match in _SPECIAL.finditer(text):
+        index = match.start()
+        if index == skip:
+            continue
+        char = text[index]
+        if in_string:
+            if char == "\\":
+                skip = index + 1
+            elif char == '"':
+                in_string = False
+        elif depth == 0:
+            # Hors objet: guillemets et antislashs du texte libre ignores
+            if char == "{":
+                start = index
+                depth = 1
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                yield text[start:index + 1]
+
+
+def _fenced_blocks(content: str) -> List[str]:
+    """Contenu des blocs ```json ... ``` (le dernier peut etre non ferme)."""
+    blocks = []
+    position = content.find(_FENCE)
+    while position != -1:
+        body_start = content.find("\n", position)
+        if body_start == -1:
+            break
+        end = content.find(_FENCE, body_start)
+        blocks.append(content[body_start + 1:end if end != -1 else len(content)])
+        if end == -1:
+            break
+        position = content.find(_FENCE, end + len(_FENCE))
+    return blocks
+
+
+@dataclass
+class ParsedResponse:
+    data: Dict[str, Any]
+    truncated: bool = False  # JSON incomplet: seules les entrees completes du tableau sont reprises
+    recovered: int = 0
+
+
+def parse_json_response(content: str, array_key: str = "questions") -> ParsedResponse:
+    """Objet JSON d'une reponse de modele (ValueError si rien n'est exploitable).
+
+    Retourne le premier objet contenant ``array_key`` (sinon le premier objet
+    valide); a defaut, les objets complets du tableau ``array_key``.
+    """
+    if not content:
+        raise ValueError("Reponse vide de l'IA")
+
+    sources = _fenced_blocks(content) + [content]
+    fallback: Optional[Dict[str, Any]] = None
+    for source in sources:
+        for raw in iter_json_objects(source):
+            try:
+                data = json.loads(raw)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(data, dict):
+                continue
+            if array_key in data:
+                return ParsedResponse(data)
+            if fallback is None:
+                fallback = data
+
+    for source in sources:
+        parser = StreamingQuestionParser(array_key)
+        items = parser.feed(source.strip())
+        if items:
+            if parser.finished and not parser.invalid_items:
+                # Tableau JSON nu, complet
+                return ParsedResponse({array_key: items})
+            logger.warning(
+                f"Reponse JSON incomplete: {len(items)} entree(s) \"{array_key}\" recuperee(s)"
+            )
+            return ParsedResponse({array_key: items}, truncated=True, recovered=len(items))
+
+    if fallback is not None:
+        return ParsedResponse(fallback)
+    raise ValueError("Aucun JSON trouvé dans la réponse de l'IA")
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+Caches LRU + TTL pour les resultats couteux (generation de quiz, ...).
+
+Deux backends interchangeables:
+  - MemoryLRUCache : OrderedDict en memoire, propre au processus
+  - SQLiteLRUCache : fichier SQLite partage par tous les workers d'un hote
+                     (ex: disque /data declare dans render.yaml)
+et leur combinaison TieredLRUCache (memoire devant le disque) quand
+``memory_entries`` est passe a create_result_cache avec une URI sqlite.
+
+Configuration par URI, comme LIVE_SESSION_STORE:
+  memory://                         cache en memoire
+  sqlite:////data/generation.db     cache sur disque
+  none://                           cache desactive
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(*parts) -> str:
+    """Empreinte BLAKE2 stable des parametres (dicts tries, JSON compact)."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=20).hexdigest()
+
+
+class MemoryLRUCache:
+    """Cache LRU en memoire avec expiration par entree."""
+
+    backend = "memory"
+
+    def __init__(self, max_entries: int = 500, ttl: float = 7 * 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteLRUCache:
+    """Cache LRU sur disque (valeurs JSON), partage entre processus."""
+
+    backend = "sqlite"
+
+    def __init__(self, path: str, max_entries: int = 5000, ttl: float = 7 * 24 * 3600,
+                 table: str = "cache_entries"):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.table = table
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table} (accessed_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        conn = self._conn()
+        row = conn.execute(
+            f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if row[1] < now:
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            return None
+        conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at)"
+            " VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value, ensure_ascii=False), now + self.ttl, now),
+        )
+        # Eviction: entrees expirees puis les moins recemment lues
+        conn.execute(f"DELETE FROM {self.table} WHERE expires_at < ?", (now,))
+        conn.execute(
+            f"DELETE FROM {self.table} WHERE key IN ("
+            f" SELECT key FROM {self.table} ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def __len__(self) -> int:
+        return self._conn().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+
+class TieredLRUCache:
+    """LRU memoire (petit, par processus) devant un LRU SQLite (grand, partage).
+
+    Une entree lue sur disque est remontee en memoire: les lectures repetees
+    du meme worker ne touchent plus SQLite ni le decodage JSON.
+    """
+
+    backend = "memory+sqlite"
+
+    def __init__(self, memory: MemoryLRUCache, disk: SQLiteLRUCache):
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any):
+        self.memory.set(key, value)
+        self.disk.set(key, value)
+
+    def __len__(self) -> int:
+        return len(self.disk)
+
+
+class ResultCache:
+    """Facade avec compteurs hits/misses/bypass, backend optionnel."""
+
+    def __init__(self, backend=None, name: str = "cache"):
+        self.backend = backend
+        self.name = name
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def get(self, key: str, bypass: bool = False) -> Optional[Any]:
+        if not self.enabled or bypass:
+            with self._lock:
+                self.bypassed += 1
+            return None
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Lecture du cache {self.name} impossible: {e}")
+            value = None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any):
+        if not self.enabled:
+            return
+        try:
+            self.backend.set(key, value)
+        except Exception as e:
+            logger.warning(f"Ecriture du cache {self.name} impossible: {e}")
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.backend if self.enabled else "none",
+            "entries": len(self.backend) if self.enabled else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hitRatio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+def create_result_cache(uri: Optional[str], name: str, max_entries: int, ttl: float,
+                        memory_entries: int = 0) -> ResultCache:
+    """Construit un cache depuis une URI (memory://, sqlite:///chemin, none://).
+
+    Avec une URI sqlite et ``memory_entries > 0``, un LRU memoire de cette
+    taille est place devant le disque.
+    """
+    uri = (uri or "memory://").strip()
+    if uri.startswith("none://"):
+        backend = None
+    elif uri.startswith("memory://"):
+        backend = MemoryLRUCache(max_entries=max_entries, ttl=ttl)
+    elif uri.startswith("sqlite:///"):
+        backend = SQLiteLRUCache(uri[len("sqlite:///"):], max_entries=max_entries, ttl=ttl, table=name)
+        if memory_entries > 0:
+            backend = TieredLRUCache(MemoryLRUCache(max_entries=memory_entries, ttl=ttl), backend)
+    else:
+        raise ValueError(f"URI de cache non supportee: {uri}")
+    return ResultCache(backend, name=name)
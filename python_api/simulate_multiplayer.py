@@ -16,6 +16,7 @@ import time
 import random
 import threading
 import os
+from dataclasses import replace
 
 # Add parent dir for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -253,8 +254,10 @@ def simulate_player_answer(manager, session, player, question, profile):
         question.id,
         selected,
     )
-    # Override the time_spent for realistic display (since we're simulating fast)
-    answer.time_spent = round(time_to_answer, 2)
+    # Override the time_spent for realistic display (since we're simulating fast);
+    # answers are frozen values: record the adjusted one so average times follow
+    with manager.store.transaction(session.session_id) as live:
+        answer = live.record_answer(replace(answer, time_spent=round(time_to_answer, 2)))
 
     return answer
 
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+Regroupement des requetes de generation identiques en cours (single-flight).
+
+Quand 30 eleves demandent le meme quiz d'entrainement dans la meme seconde,
+un seul appel fournisseur part: les requetes identiques concurrentes
+attendent l'appel en cours et recoivent toutes son resultat.
+
+  - dans un worker : la premiere requete (meneuse) execute la generation,
+                     les suivantes attendent son evenement;
+  - entre workers  : un bail (lease) par cle dans un store partage. Le
+                     worker qui l'obtient genere et y publie le resultat
+                     (conserve ``result_ttl`` secondes); les autres
+                     sondent le store. Un bail expire (worker arrete) est
+                     repris par le suivant.
+
+Stores (GENERATION_SINGLE_FLIGHT_STORE):
+  memory://                          regroupement par worker uniquement
+  sqlite:////data/single_flight.db   workers d'un meme hote
+  redis://host:6379/0                plusieurs hotes (SET NX PX)
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _SQLiteLeaseStore:
+    """Baux et resultats publies dans un fichier SQLite partage par les workers."""
+
+    backend = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS single_flight ("
+            " key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL, result TEXT)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM single_flight WHERE expires_at < ?", (now,))
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO single_flight (key, owner, expires_at, result) VALUES (?, ?, ?, NULL)",
+                (key, owner, now + ttl),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount == 1
+
+    def publish(self, key: str, owner: str, value: Any, ttl: float):
+        self._conn().execute(
+            "UPDATE single_flight SET result = ?, expires_at = ? WHERE key = ? AND owner = ?",
+            (json.dumps(value, ensure_ascii=False), time.time() + ttl, key, owner),
+        )
+
+    def release(self, key: str, owner: str):
+        self._conn().execute("DELETE FROM single_flight WHERE key = ? AND owner = ?", (key, owner))
+
+    def peek(self, key: str) -> Optional[Tuple[str, Any]]:
+        """('done', resultat), ('running', None) ou None (aucun bail)."""
+        row = self._conn().execute(
+            "SELECT expires_at, result FROM single_flight WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[0] < time.time():
+            return None
+        if row[1] is None:
+            return "running", None
+        return "done", json.loads(row[1])
+
+
+class _RedisLeaseStore:
+    """Memes operations avec des commandes Redis simples (SET NX PX, GET, DEL)."""
+
+    backend = "redis"
+
+    def __init__(self, url: str, prefix: str = "quizo:single_flight"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("Le paquet 'redis' est requis pour GENERATION_SINGLE_FLIGHT_STORE=redis://")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def _key(self, kind: str, key: str) -> str:
+        return f"{self.prefix}:{kind}:{key}"
+
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        if self.client.exists(self._key("result", key)):
+            return False
+        return bool(self.client.set(self._key("lease", key), owner, nx=True, px=int(ttl * 1000)))
+
+    def publish(self, key: str, owner: str, value: Any, ttl: float):
+        self.client.set(self._key("result", key), json.dumps(value, ensure_ascii=False), px=int(ttl * 1000))
+        self.release(key, owner)
+
+    def release(self, key: str, owner: str):
+        current = self.client.get(self._key("lease", key))
+        if current is not None and (current.decode() if isinstance(current, bytes) else current) == owner:
+            self.client.delete(self._key("lease", key))
+
+    def peek(self, key: str) -> Optional[Tuple[str, Any]]:
+        raw = self.client.get(self._key("result", key))
+        if raw is not None:
+            return "done", json.loads(raw)
+        if self.client.exists(self._key("lease", key)):
+            return "running", None
+        return None
+
+
+def create_lease_store(uri: Optional[str]):
+    """None pour memory:// (regroupement local seulement)."""
+    uri = (uri or "memory://").strip()
+    if uri.startswith("memory://"):
+        return None
+    if uri.startswith("sqlite:///"):
+        return _SQLiteLeaseStore(uri[len("sqlite:///"):])
+    if uri.startswith(("redis://", "rediss://", "unix://")):
+        return _RedisLeaseStore(uri)
+    raise ValueError(f"GENERATION_SINGLE_FLIGHT_STORE non supporte: {uri}")
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """Une seule execution de ``fn`` par cle a la fois, resultat partage."""
+
+    def __init__(self, lease_store=None, lease_ttl: float = 180.0, result_ttl: float = 30.0,
+                 wait_timeout: float = 150.0, poll_interval: float = 0.25):
+        self.lease_store = lease_store
+        self.lease_ttl = lease_ttl
+        self.result_ttl = result_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.owner = uuid.uuid4().hex
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced_local = 0
+        self.coalesced_remote = 0
+        self.wait_timeouts = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Retourne (resultat, partage): partage=True si une autre requete l'a produit.
+
+        Les requetes du meme worker recoivent aussi l'exception de la meneuse.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.leaders += 1
+            else:
+                call.followers += 1
+                self.coalesced_local += 1
+
+        if not leader:
+            if not call.event.wait(self.wait_timeout):
+                with self._lock:
+                    self.wait_timeouts += 1
+                logger.warning("Attente d'une generation identique expiree, generation separee")
+                return fn(), False
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result, shared = self._lead(key, fn)
+            return call.result, shared
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            if call.followers:
+                logger.info(f"Generation partagee avec {call.followers} requete(s) identique(s)")
+            call.event.set()
+
+    def _lead(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        if self.lease_store is None:
+            return fn(), False
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            try:
+                acquired = self.lease_store.acquire(key, self.owner, self.lease_ttl)
+                state = None if acquired else self.lease_store.peek(key)
+            except Exception as e:
+                logger.warning(f"Store single-flight indisponible, generation locale: {e}")
+                return fn(), False
+
+            if acquired:
+                try:
+                    value = fn()
+                except BaseException:
+                    self._store_call(self.lease_store.release, key, self.owner)
+                    raise
+                self._store_call(self.lease_store.publish, key, self.owner, value, self.result_ttl)
+                return value, False
+            if state is not None and state[0] == "done":
+                with self._lock:
+                    self.coalesced_remote += 1
+                return state[1], True
+            if time.monotonic() >= deadline:
+                with self._lock:
+                    self.wait_timeouts += 1
+                logger.warning("Attente d'une generation identique (autre worker) expiree")
+                return fn(), False
+            time.sleep(self.poll_interval)
+
+    @staticmethod
+    def _store_call(method, *args):
+        try:
+            method(*args)
+        except Exception as e:
+            logger.warning(f"Ecriture du store single-flight impossible: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "store": self.lease_store.backend if self.lease_store is not None else "memory",
+                "inFlight": len(self._calls),
+                "leaders": self.leaders,
+                "coalescedLocal": self.coalesced_local,
+                "coalescedRemote": self.coalesced_remote,
+                "waitTimeouts": self.wait_timeouts,
+            }
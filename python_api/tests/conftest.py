@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""Shared fixtures: modules of python_api/ on sys.path, a Redis stand-in."""
+
+import os
+import sys
+from collections import deque
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeRedis:
+    """In-process stand-in for the redis-py commands used by the stores."""
+
+    def __init__(self):
+        self.data = {}
+
+    @staticmethod
+    def _bytes(value):
+        return value if isinstance(value, bytes) else str(value).encode()
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = self._bytes(value)
+        return True
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def incr(self, key):
+        value = int(self.data.get(key, b"0")) + 1
+        self.data[key] = self._bytes(value)
+        return value
+
+    def sadd(self, key, *members):
+        self.data.setdefault(key, set()).update(self._bytes(m) for m in members)
+
+    def srem(self, key, *members):
+        self.data.get(key, set()).difference_update(self._bytes(m) for m in members)
+
+    def smembers(self, key):
+        return set(self.data.get(key, ()))
+
+    def rpush(self, key, *values):
+        self.data.setdefault(key, deque()).extend(self._bytes(v) for v in values)
+
+    def llen(self, key):
+        return len(self.data.get(key, ()))
+
+    def lpop(self, key):
+        values = self.data.get(key)
+        return values.popleft() if values else None
+
+    def hset(self, key, mapping):
+        self.data.setdefault(key, {}).update(
+            {self._bytes(k): self._bytes(v) for k, v in mapping.items()}
+        )
+
+    def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    def hmget(self, key, fields):
+        values = self.data.get(key, {})
+        return [values.get(self._bytes(f)) for f in fields]
+
+    def zadd(self, key, mapping):
+        self.data.setdefault(key, {}).update({self._bytes(k): float(v) for k, v in mapping.items()})
+
+    def zrangebyscore(self, key, low, high):
+        exclusive = isinstance(low, str) and low.startswith("(")
+        low = float(str(low).lstrip("("))
+        high = float(high)
+        items = sorted(self.data.get(key, {}).items(), key=lambda item: item[1])
+        return [m for m, score in items if (score > low if exclusive else score >= low) and score <= high]
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
+
+
+QUESTIONS = [
+    {
+        "id": f"q{i}",
+        "text": f"Question {i}",
+        "options": [{"id": o, "text": o.upper()} for o in "abcd"],
+        "correct_option_id": "a",
+    }
+    for i in range(1, 4)
+]
+
+
+@pytest.fixture
+def questions():
+    return [dict(q) for q in QUESTIONS]
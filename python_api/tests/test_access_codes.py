@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from access_codes import AccessCodeAllocator, CodeSpace, FeistelPermutation
+from live_store import InMemorySessionStore
+
+
+@pytest.mark.parametrize("size", [2, 7, 31 ** 2, 1000, 31 ** 3])
+def test_feistel_is_a_bijection(size):
+    permutation = FeistelPermutation(size, b"k" * 32)
+    image = [permutation(i) for i in range(size)]
+    assert sorted(image) == list(range(size))
+
+
+def test_feistel_depends_on_key():
+    a = FeistelPermutation(31 ** 3, b"a" * 32)
+    b = FeistelPermutation(31 ** 3, b"b" * 32)
+    assert [a(i) for i in range(50)] != [b(i) for i in range(50)]
+    with pytest.raises(ValueError):
+        a(31 ** 3)
+
+
+def test_code_space_round_trip():
+    space = CodeSpace(length=3)
+    codes = {space.encode(i) for i in range(space.size)}
+    assert len(codes) == space.size
+    for index in (0, 1, 30, 31, space.size - 1):
+        code = space.encode(index)
+        assert code.startswith("QZ-") and len(code) == 6
+        assert space.decode(code) == index
+        assert space.decode(code[3:].lower()) == index
+    assert space.decode("QZ-0OI") is None
+    assert space.decode("QZ-22") is None
+
+
+def test_allocator_exhausts_space_then_reuses_oldest():
+    store = InMemorySessionStore()
+    space = CodeSpace(alphabet="ABC", length=2)
+    allocator = AccessCodeAllocator(store, space, reuse_after=2, secret="s")
+    codes = [allocator.allocate() for _ in range(space.size)]
+    assert len(set(codes)) == space.size
+    with pytest.raises(RuntimeError):
+        allocator.allocate()
+
+    for code in codes[:3]:
+        store.claim_code(code, "x")
+        store.release_code(code)
+    assert allocator.allocate() == codes[0]
+    assert allocator.allocate() == codes[1]
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+
+from generation_jobs import DONE, FAILED, QUEUED, RUNNING, GenerationJobQueue
+from result_cache import create_result_cache
+
+
+@pytest.fixture
+def queue():
+    store = create_result_cache("memory://", "generation_jobs", max_entries=100, ttl=3600)
+    return GenerationJobQueue(store, max_workers=2, max_pending=4, job_timeout=60)
+
+
+def saved(queue, **fields):
+    record = {**queue._new_record("owner", RUNNING), **fields}
+    queue.store.set(record["jobId"], record)
+    return record["jobId"]
+
+
+def test_running_timeout_counts_from_start(queue):
+    now = time.time()
+    waited_long = saved(queue, createdAt=now - 300, startedAt=now - 5)
+    stuck = saved(queue, createdAt=now - 300, startedAt=now - 61)
+    assert queue.get(waited_long)["status"] == RUNNING
+    assert queue.get(stuck)["status"] == FAILED
+    assert queue.store.get(stuck)["status"] == FAILED
+
+
+def test_queued_timeout_covers_the_queue_ahead(queue):
+    assert queue.queue_timeout == 60 * 3
+    now = time.time()
+    waiting = saved(queue, status=QUEUED, createdAt=now - 120)
+    lost = saved(queue, status=QUEUED, createdAt=now - 181)
+    assert queue.get(waiting)["status"] == QUEUED
+    assert queue.get(lost)["status"] == FAILED
+
+
+def test_job_runs_to_completion(queue):
+    release = threading.Event()
+    record = queue.submit(lambda: release.wait(5) and {"questions": []}, owner="u")
+    release.set()
+    for _ in range(100):
+        if queue.get(record["jobId"])["status"] == DONE:
+            break
+        time.sleep(0.01)
+    job = queue.get(record["jobId"])
+    assert job["status"] == DONE and job["result"] == {"questions": []}
+    assert job["startedAt"] >= job["createdAt"]
+
+
+def test_watch_requires_job_owner(monkeypatch):
+    app_module = pytest.importorskip("app")
+    if app_module.socketio is None:
+        pytest.skip("Flask-SocketIO not available")
+
+    class FakeTokens:
+        def verify(self, token):
+            return {"uid": token}
+
+    monkeypatch.setattr(app_module, "_firebase_app", object())
+    monkeypatch.setattr(app_module, "verified_tokens", FakeTokens())
+    record = app_module.generation_jobs.complete({"questions": []}, owner="alice")
+
+    def watch(token):
+        client = app_module.socketio.test_client(app_module.app)
+        client.emit("watch_generation_job", {"jobId": record["jobId"], "token": token})
+        received = client.get_received()
+        client.disconnect()
+        return [(event["name"], event["args"][0]) for event in received]
+
+    (name, payload), = watch("mallory")
+    assert name == "generation_job_error" and "result" not in payload
+    (name, payload), = watch("alice")
+    assert name == "generation_job" and payload["result"] == {"questions": []}
+    assert "owner" not in payload
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import dataclasses
+
+import pytest
+
+from live_answers import AnswerTable, PlayerAnswers
+from live_session import LiveSession, LiveSessionManager, PlayerAnswer, QuizQuestion
+
+
+def make_questions(questions):
+    return [QuizQuestion(**q) for q in questions]
+
+
+def test_answer_table_round_trip(questions):
+    table = AnswerTable(make_questions(questions), PlayerAnswer)
+    rows = [table.add_player(pid) for pid in ("p1", "p2")]
+    first = PlayerAnswers(table, rows[0])
+    second = PlayerAnswers(table, rows[1])
+
+    q1 = PlayerAnswer("p1", "q1", "a", True, 1.23, 1450, 100.5)
+    q3 = PlayerAnswer("p1", "q3", "not-an-option", False, 7.0, 0, 130.25)
+    table.set(rows[0], "q3", q3)
+    table.set(rows[0], "q1", q1)
+
+    assert first["q1"] == q1 and first.get("q3") == q3
+    assert list(first) == ["q1", "q3"] and len(first) == 2
+    assert "q2" not in first and first.get("q2") is None and "unknown" not in first
+    assert dict(first.items()) == {"q1": q1, "q3": q3}
+    assert len(second) == 0 and list(second.values()) == []
+    with pytest.raises(KeyError):
+        second["q1"]
+
+    replaced = dataclasses.replace(q1, selected_option_id="b", is_correct=False)
+    table.set(rows[0], "q1", replaced)
+    assert first["q1"] == replaced and len(first) == 2
+    with pytest.raises(KeyError):
+        table.set(rows[0], "q9", q1)
+
+
+def test_answers_are_read_only(questions):
+    manager = LiveSessionManager()
+    session = manager.create_session("Quiz", questions, "host")
+    _, player = manager.join_session(session.access_code, "P")
+    manager.start_session(session.session_id)
+    question = manager.advance_to_question(session.session_id)
+    answer = manager.submit_answer(session.session_id, player.id, question.id, "a")
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        player.answers[question.id].time_spent = 9.0
+    with pytest.raises(TypeError):
+        player.answers[question.id] = answer
+    assert player.answers[question.id] == answer
+
+
+def test_record_answer_replacement_keeps_aggregates(questions):
+    manager = LiveSessionManager()
+    session = manager.create_session("Quiz", questions, "host")
+    _, player = manager.join_session(session.access_code, "P")
+    _, other = manager.join_session(session.access_code, "O")
+    manager.start_session(session.session_id)
+    for option in "aaa":
+        question = manager.advance_to_question(session.session_id)
+        manager.submit_answer(session.session_id, player.id, question.id, option)
+    assert (player.correct_count, player.streak, player.max_streak) == (3, 3, 3)
+
+    with manager.store.transaction(session.session_id) as live:
+        middle = player.answers["q2"]
+        live.record_answer(dataclasses.replace(
+            middle, selected_option_id="b", is_correct=False, points_earned=0, time_spent=4.0
+        ))
+
+    answers = list(player.answers.values())
+    assert player.score == sum(a.points_earned for a in answers)
+    assert player.total_time == pytest.approx(sum(a.time_spent for a in answers))
+    assert (player.correct_count, player.streak, player.max_streak) == (2, 1, 1)
+    assert session.tallies["q2"].option_counts["b"] == 1
+    assert session.tallies["q2"].correct_count == 0
+    assert session.tallies["q2"].log == [player.id]
+    assert manager.get_leaderboard(session.session_id)[0]["score"] == player.score
+    assert other.score == 0
+
+
+def test_from_state_round_trip(questions):
+    manager = LiveSessionManager()
+    session = manager.create_session("Quiz", questions, "host")
+    ids = [manager.join_session(session.access_code, f"P{i}")[1].id for i in range(3)]
+    manager.start_session(session.session_id)
+    question = manager.advance_to_question(session.session_id)
+    for player_id, option in zip(ids, "abz"):
+        manager.submit_answer(session.session_id, player_id, question.id, option)
+
+    state = manager.get_session(session.session_id).to_state()
+    restored = LiveSession.from_state(state)
+    assert restored.to_state() == state
+    for player_id in ids:
+        original = session.players[player_id]
+        copy = restored.players[player_id]
+        assert isinstance(copy.answers, PlayerAnswers)
+        assert dict(copy.answers) == dict(original.answers)
+        assert copy.score == original.score and copy.total_time == original.total_time
+    assert restored.tallies[question.id].option_counts == {"a": 1, "b": 1, "c": 0, "d": 0, "z": 1}
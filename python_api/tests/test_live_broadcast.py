@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+from live_broadcast import AnswerBroadcaster, host_room
+
+
+class Recorder:
+    def __init__(self):
+        self.frames = []
+
+    def __call__(self, event, data, room=None):
+        self.frames.append((event, room, data))
+
+
+def answer(player_id, correct=True):
+    return {"playerId": player_id, "questionId": "q1", "isCorrect": correct}
+
+
+def test_flush_one_session_then_forget():
+    emit = Recorder()
+    broadcaster = AnswerBroadcaster(emit, interval=10, start_task=lambda run: None)
+    broadcaster.record("s1", answer("p1"), 1, 1, 3)
+    broadcaster.record("s1", answer("p2", False), 2, 1, 3)
+    broadcaster.record("s2", answer("p9"), 1, 1, 1)
+
+    assert broadcaster.flush("s1") == 2
+    (progress_event, room, progress), (detail_event, detail_room, detail) = emit.frames
+    assert (progress_event, room) == ("answers_progress", "s1")
+    assert progress["answeredCount"] == 2 and progress["newCorrect"] == 1
+    assert (detail_event, detail_room) == ("answers_detail", host_room("s1"))
+    assert [a["playerId"] for a in detail["answers"]] == ["p1", "p2"]
+
+    broadcaster.forget("s1")
+    assert broadcaster.flush("s1") == 0
+    assert broadcaster.flush() == 2
+    assert [room for _, room, _ in emit.frames[2:]] == ["s2", host_room("s2")]
+
+
+def test_without_coalescing_emits_each_answer():
+    emit = Recorder()
+    broadcaster = AnswerBroadcaster(emit, interval=0)
+    broadcaster.record("s1", answer("p1"), 1, 1, 1)
+    assert emit.frames == [("answer_submitted", "s1", answer("p1"))]
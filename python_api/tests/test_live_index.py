@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import random
+
+from live_index import LeaderboardIndex, QuestionTally
+from live_session import LiveSession, LiveSessionManager
+
+
+def played_session(questions, players=12, seed=3):
+    rng = random.Random(seed)
+    manager = LiveSessionManager()
+    session = manager.create_session("Quiz", questions, "host")
+    player_ids = [manager.join_session(session.access_code, f"P{i}")[1].id for i in range(players)]
+    manager.start_session(session.session_id)
+    for _ in questions:
+        question = manager.advance_to_question(session.session_id)
+        for player_id in rng.sample(player_ids, players - 2):
+            manager.submit_answer(session.session_id, player_id, question.id, rng.choice("abcd"))
+    return manager, session
+
+
+def sorted_ids(session):
+    players = sorted(session.players.values(), key=lambda p: (-p.score, p.joined_at, p.id))
+    return [p.id for p in players]
+
+
+class Scored:
+    def __init__(self, player_id, score, joined_at):
+        self.id, self.score, self.joined_at = player_id, score, joined_at
+
+
+def test_leaderboard_index_moves_players():
+    index = LeaderboardIndex()
+    a, b, c = Scored("a", 0, 1.0), Scored("b", 0, 2.0), Scored("c", 0, 3.0)
+    for player in (a, b, c):
+        index.update(player)
+    assert index.page() == ["a", "b", "c"]
+
+    c.score = 500
+    index.update(c)
+    b.score = 500
+    index.update(b)
+    assert index.page() == ["b", "c", "a"]
+    assert [index.rank(p) for p in "abc"] == [3, 1, 2]
+    assert index.page(1, 1) == ["c"]
+
+    index.remove("b")
+    assert index.page() == ["c", "a"] and len(index) == 2
+    assert index.rank("b") == 0
+
+
+def test_leaderboard_matches_full_sort(questions):
+    manager, session = played_session(questions)
+    live = manager.get_session(session.session_id)
+    assert live.leaderboard.page() == sorted_ids(live)
+    page = manager.get_leaderboard(session.session_id, limit=3, offset=2)
+    assert [e["rank"] for e in page] == [3, 4, 5]
+    assert [e["playerId"] for e in page] == sorted_ids(live)[2:5]
+
+
+def test_leaderboard_rebuilt_by_from_state(questions):
+    manager, session = played_session(questions)
+    live = manager.get_session(session.session_id)
+    restored = LiveSession.from_state(live.to_state())
+    assert restored.leaderboard.page() == live.leaderboard.page() == sorted_ids(restored)
+    for player_id in restored.players:
+        assert restored.leaderboard.rank(player_id) == live.leaderboard.rank(player_id)
+
+
+def scanned_results(session, question):
+    """Counters computed the pre-index way, by scanning every player."""
+    answers = [p.answers[question.id] for p in session.players.values() if question.id in p.answers]
+    counts = {opt["id"]: 0 for opt in question.options}
+    for answer in answers:
+        counts[answer.selected_option_id] += 1
+    fastest = sorted(answers, key=lambda a: (a.time_spent, a.timestamp))
+    return counts, sum(a.is_correct for a in answers), [a.player_id for a in fastest]
+
+
+def test_question_tally_counts():
+    tally = QuestionTally(["a", "b"])
+    tally.record("p1", "a", True)
+    tally.record("p2", "b", False)
+    tally.record("p3", "z", False)
+    assert tally.option_counts == {"a": 1, "b": 1, "z": 1}
+    assert tally.correct_count == 1
+    assert tally.total_answered == 3
+    assert tally.log == ["p1", "p2", "p3"]
+
+
+def test_tallies_match_scan_after_from_state(questions):
+    manager, session = played_session(questions)
+    live = manager.get_session(session.session_id)
+    restored = LiveSession.from_state(live.to_state())
+    for question in restored.questions:
+        counts, correct, fastest = scanned_results(restored, question)
+        for s in (live, restored):
+            tally = s.tallies[question.id]
+            assert tally.option_counts == counts
+            assert tally.correct_count == correct
+            assert tally.log == fastest
+    results = manager.get_question_results(session.session_id, questions[0]["id"], limit=2)
+    assert [r["playerId"] for r in results["playerResults"]] == live.tallies[questions[0]["id"]].log[:2]
+    assert results["totalAnswered"] == len(live.players) - 2
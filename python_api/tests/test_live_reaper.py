@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+import json
+import time
+
+from live_reaper import LiveSessionReaper
+from live_session import LiveSessionManager
+from live_store import SQLiteSessionStore, _VersionedCache
+
+
+def idle_session(manager, questions, idle_for):
+    session = manager.create_session("Quiz", questions, "host")
+    with manager.store.transaction(session.session_id) as live:
+        live.last_activity_at = time.time() - idle_for
+    return session
+
+
+def test_sweep_expires_and_archives(tmp_path, questions):
+    manager = LiveSessionManager()
+    expired = []
+    reaper = LiveSessionReaper(manager, completed_ttl=60, waiting_ttl=60, interval=0,
+                               archive_dir=str(tmp_path / "archive"),
+                               on_expire=lambda session, reason: expired.append(reason))
+    waiting = idle_session(manager, questions, 120)
+    fresh = manager.create_session("Quiz", questions, "host")
+
+    finished = manager.create_session("Quiz", questions, "host")
+    manager.join_session(finished.access_code, "P")
+    manager.start_session(finished.session_id)
+    for _ in range(len(questions) + 1):
+        manager.advance_to_question(finished.session_id)
+
+    assert reaper.sweep(now=time.time() + 30) == {"completed": 0, "waiting": 1, "abandoned": 0}
+    assert reaper.sweep(now=time.time() + 90) == {"completed": 1, "waiting": 1, "abandoned": 0}
+    assert manager.get_session(waiting.session_id) is None
+    assert manager.store.session_ids() == []
+    assert sorted(expired) == ["completed", "waiting", "waiting"]
+    archived = json.loads((tmp_path / "archive" / f"{finished.session_id}.json").read_text())
+    assert archived["leaderboard"][0]["name"] == "P"
+    assert not (tmp_path / "archive" / f"{fresh.session_id}.json").exists()
+
+
+def test_sweep_rechecks_under_lock(tmp_path, questions):
+    path = str(tmp_path / "live.db")
+    reaper_manager = LiveSessionManager(SQLiteSessionStore(path))
+    other = LiveSessionManager(SQLiteSessionStore(path))
+    session = idle_session(other, questions, 120)
+
+    store = reaper_manager.store
+    read = store.get
+
+    def get_then_join(session_id):
+        snapshot = read(session_id)
+        other.join_session(session.access_code, "late")  # lands between read and delete
+        return snapshot
+
+    store.get = get_then_join
+    reaper = LiveSessionReaper(reaper_manager, waiting_ttl=60, interval=0)
+    assert reaper.sweep()["waiting"] == 0
+    assert len(other.get_session(session.session_id).players) == 1
+
+
+def test_sweep_prunes_other_worker_cache(tmp_path, questions):
+    path = str(tmp_path / "live.db")
+    first = LiveSessionManager(SQLiteSessionStore(path))
+    second = LiveSessionManager(SQLiteSessionStore(path))
+    kept = first.create_session("Quiz", questions, "host")
+    gone = first.create_session("Quiz", questions, "host")
+    for session in (kept, gone):
+        assert second.get_session(session.session_id) is not None
+    assert len(second.store._cache) == 2
+
+    first.delete_session(gone.session_id)
+    LiveSessionReaper(second, interval=0).sweep()
+    assert len(second.store._cache) == 1
+    assert second.get_session(kept.session_id) is not None
+
+
+def test_versioned_cache_is_bounded():
+    cache = _VersionedCache(max_entries=2)
+    for session_id in ("a", "b"):
+        cache.remember(session_id, 1, object())
+    assert cache.lookup("a", 1, None, None) is not None  # a is now most recent
+    cache.remember("c", 1, object())
+    assert len(cache) == 2
+    assert cache.lookup("b", 1, lambda: None, None) is None
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+app_module = pytest.importorskip("app")
+if app_module.socketio is None or app_module.session_manager is None:
+    pytest.skip("Flask-SocketIO not available", allow_module_level=True)
+
+
+class FakeTokens:
+    def verify(self, token):
+        if token != "creator-token":
+            raise ValueError("invalid token")
+        return {"uid": "creator"}
+
+
+@pytest.fixture
+def firebase(monkeypatch):
+    monkeypatch.setattr(app_module, "_firebase_app", object())
+    monkeypatch.setattr(app_module, "verified_tokens", FakeTokens())
+
+
+@pytest.fixture
+def live_session(questions):
+    session = app_module.session_manager.create_session("Quiz", questions, "creator")
+    yield session
+    app_module.session_manager.delete_session(session.session_id)
+
+
+def join_as_host(session_id, **extra):
+    client = app_module.socketio.test_client(app_module.app)
+    client.emit("join_session", {"sessionId": session_id, "role": "host", **extra})
+    events = [event["name"] for event in client.get_received()]
+    host = app_module.host_room(session_id) in app_module.socketio.server.manager.rooms["/"]
+    client.disconnect()
+    return events, host
+
+
+def test_host_room_requires_creator_token(firebase, live_session):
+    assert join_as_host(live_session.session_id) == (["host_denied", "joined_room"], False)
+    assert join_as_host(live_session.session_id, token="forged") == (["host_denied", "joined_room"], False)
+    assert join_as_host(live_session.session_id, token="creator-token") == (["joined_room"], True)
+
+
+def test_host_room_for_unknown_session_is_refused(firebase):
+    assert join_as_host("session_missing", token="creator-token") == (["host_denied", "joined_room"], False)
+
+
+def test_completion_flushes_buffered_answers(live_session, monkeypatch):
+    monkeypatch.setattr(app_module.answer_broadcaster, "_ensure_running", lambda: None)
+    manager = app_module.session_manager
+    _, player = manager.join_session(live_session.access_code, "P")
+    manager.start_session(live_session.session_id)
+    for _ in range(len(live_session.questions) - 1):
+        manager.advance_to_question(live_session.session_id)
+    question = manager.advance_to_question(live_session.session_id)
+
+    client = app_module.socketio.test_client(app_module.app)
+    client.emit("join_session", {"sessionId": live_session.session_id})
+    http = app_module.app.test_client()
+    url = f"/api/live/session/{live_session.session_id}"
+    assert http.post(f"{url}/answer", json={
+        "playerId": player.id, "questionId": question.id, "selectedOptionId": "a",
+    }).status_code == 200
+    assert http.post(f"{url}/next").get_json()["completed"] is True
+
+    events = [event["name"] for event in client.get_received()]
+    client.disconnect()
+    assert events[-2:] == ["answers_progress", "session_completed"]
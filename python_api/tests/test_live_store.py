@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from live_session import LiveSessionManager, SessionStatus
+from live_store import InMemorySessionStore, RedisSessionStore, SQLiteSessionStore
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def store_factory(request, tmp_path, fake_redis):
+    """Builds stores sharing one backend, like two workers would."""
+    if request.param == "memory":
+        store = InMemorySessionStore()
+        return lambda: store
+    if request.param == "sqlite":
+        return lambda: SQLiteSessionStore(str(tmp_path / "live.db"))
+    return lambda: RedisSessionStore(client=fake_redis)
+
+
+def play(manager, session, answers):
+    """Join one player per answer, then answer the first question."""
+    player_ids = [manager.join_session(session.access_code, f"P{i}")[1].id for i in range(len(answers))]
+    manager.start_session(session.session_id)
+    question = manager.advance_to_question(session.session_id)
+    for player_id, option in zip(player_ids, answers):
+        manager.submit_answer(session.session_id, player_id, question.id, option)
+    return player_ids, question
+
+
+def test_round_trip(store_factory, questions):
+    manager = LiveSessionManager(store_factory())
+    session = manager.create_session("Quiz", questions, "host")
+    player_ids, question = play(manager, session, "abab")
+
+    reader = LiveSessionManager(store_factory())
+    loaded = reader.get_session(session.session_id)
+    assert loaded.status == SessionStatus.QUESTION
+    assert set(loaded.players) == set(player_ids)
+    assert loaded.to_state() == manager.get_session(session.session_id).to_state()
+    assert reader.get_session_by_code(session.access_code).session_id == session.session_id
+
+
+def test_rollback_on_error(store_factory, questions):
+    manager = LiveSessionManager(store_factory())
+    session = manager.create_session("Quiz", questions, "host")
+    manager.join_session(session.access_code, "P")
+    before = manager.get_session(session.session_id).to_state()
+
+    if isinstance(manager.store, InMemorySessionStore):
+        pytest.skip("memory sessions are mutated in place")
+    with pytest.raises(RuntimeError):
+        with manager.store.transaction(session.session_id) as live:
+            live.quiz_title = "changed"
+            live.status = SessionStatus.ACTIVE
+            raise RuntimeError("boom")
+
+    assert manager.get_session(session.session_id).to_state() == before
+    assert LiveSessionManager(store_factory()).get_session(session.session_id).to_state() == before
+
+
+def test_stale_snapshot_catches_up(store_factory, questions):
+    first = LiveSessionManager(store_factory())
+    second = LiveSessionManager(store_factory())
+    session = first.create_session("Quiz", questions, "host")
+    p1 = first.join_session(session.access_code, "A")[1].id
+    assert second.get_session(session.session_id) is not None  # cached at this version
+    p2 = second.join_session(session.access_code, "B")[1].id
+
+    first.start_session(session.session_id)
+    question = second.advance_to_question(session.session_id)
+    first.submit_answer(session.session_id, p1, question.id, "a")
+    second.submit_answer(session.session_id, p2, question.id, "b")
+
+    for manager in (first, second):
+        assert manager.get_answer_progress(session.session_id, question.id) == {
+            "answeredCount": 2, "correctCount": 1, "totalPlayers": 2,
+        }
+        assert [e["playerId"] for e in manager.get_leaderboard(session.session_id)] == [p1, p2]
+    assert first.get_session(session.session_id).to_state() == second.get_session(session.session_id).to_state()
+
+    with pytest.raises(ValueError):
+        first.submit_answer(session.session_id, p2, question.id, "a")
+
+
+def test_duplicate_add_fails(store_factory, questions):
+    manager = LiveSessionManager(store_factory())
+    session = manager.create_session("Quiz", questions, "host")
+    with pytest.raises(ValueError):
+        manager.store.add(manager.get_session(session.session_id))
+    assert manager.store.session_ids() == [session.session_id]
+
+
+def test_delete_releases_code(store_factory, questions):
+    manager = LiveSessionManager(store_factory())
+    session = manager.create_session("Quiz", questions, "host")
+    assert manager.store.delete(session.session_id).session_id == session.session_id
+    assert manager.get_session(session.session_id) is None
+    assert manager.store.get_id_by_code(session.access_code) is None
+    assert manager.store.pop_free_code(0) == session.access_code
+    assert manager.store.delete(session.session_id) is None
+
+
+def test_malformed_questions_claim_no_code(store_factory, questions):
+    manager = LiveSessionManager(store_factory())
+    for missing in ("text", "options", "correct_option_id"):
+        broken = [{k: v for k, v in q.items() if k != missing} for q in questions]
+        with pytest.raises(KeyError):
+            manager.create_session("Quiz", broken, "host")
+    assert manager.codes.issued == 0
+    assert manager.store.session_ids() == []
+
+
+def test_failed_add_releases_code(store_factory, questions, monkeypatch):
+    manager = LiveSessionManager(store_factory())
+
+    def fail(session):
+        raise RuntimeError("store down")
+
+    monkeypatch.setattr(manager.store, "add", fail)
+    with pytest.raises(RuntimeError):
+        manager.create_session("Quiz", questions, "host")
+    code = manager.store.pop_free_code(0)
+    assert code is not None
+    assert manager.store.get_id_by_code(code) is None
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from provider_health import ProviderHealthRegistry, trips_breaker
+
+
+@pytest.fixture
+def health():
+    return ProviderHealthRegistry(failure_threshold=3, open_seconds=30)
+
+
+def circuit(health, key="k"):
+    return health.snapshot()["circuits"][health.circuit_id("groq", key)]
+
+
+@pytest.mark.parametrize("status, expected", [
+    (None, True), (500, True), (503, True), (408, True),
+    (400, False), (404, False), (413, False), (422, False), (200, False),
+])
+def test_trips_breaker(status, expected):
+    assert trips_breaker(status) is expected
+
+
+@pytest.mark.parametrize("status", [400, 413, 422])
+def test_request_errors_never_open_the_circuit(health, status):
+    for _ in range(10):
+        health.record_failure("groq", "k", status)
+    assert health.is_available("groq", "k")
+    assert circuit(health)["requestErrors"] == 10
+    assert circuit(health)["errorRate"] == 0
+
+
+@pytest.mark.parametrize("status", [None, 500, 502])
+def test_server_errors_open_after_threshold(health, status):
+    health.record_failure("groq", "k", status)
+    health.record_failure("groq", "k", status)
+    assert health.is_available("groq", "k")
+    health.record_failure("groq", "k", status)
+    assert not health.is_available("groq", "k")
+    assert circuit(health)["state"] == "open"
+
+
+def test_request_errors_do_not_reset_or_extend_a_failure_run(health):
+    health.record_failure("groq", "k", 503)
+    health.record_failure("groq", "k", 503)
+    health.record_failure("groq", "k", 400)
+    assert health.is_available("groq", "k")
+    health.record_failure("groq", "k", 503)
+    assert not health.is_available("groq", "k")
+
+
+def test_explicit_classification_overrides_status(health):
+    for _ in range(5):
+        health.record_failure("groq", "k", provider_fault=False)
+    assert health.is_available("groq", "k")
+
+
+def test_auth_and_rate_limit_open_immediately(health):
+    health.record_failure("groq", "auth", 401)
+    health.record_failure("groq", "quota", 429, retry_after=12)
+    assert not health.is_available("groq", "auth")
+    assert not health.is_available("groq", "quota")
+    assert circuit(health, "auth")["openForSeconds"] > 3000
+    assert 0 < circuit(health, "quota")["openForSeconds"] <= 12
+    assert "429" in circuit(health, "quota")["reason"]
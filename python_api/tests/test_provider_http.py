@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from provider_http import ProviderHTTPClient, ProviderHTTPError
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(0.5)
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/v1/chat"
+    server.shutdown()
+    server.server_close()
+
+
+def test_pool_exhaustion_is_a_retriable_network_error(server_url):
+    client = ProviderHTTPClient(pool_maxsize=1, pool_timeout=0.05)
+    first = threading.Thread(target=client.post_json, args=(server_url, {}, {}))
+    first.start()
+    time.sleep(0.1)  # the only connection is busy
+
+    start = time.monotonic()
+    with pytest.raises(ProviderHTTPError, match="Pool de connexions sature") as error:
+        client.post_json(server_url, {}, {})
+    assert time.monotonic() - start < 0.4
+    first.join()
+
+    assert error.value.status_code is None
+    assert client.get_metrics()["poolExhausted"] == 1
+    assert client.post_json(server_url, {}, {}) == {"ok": True}
+    client.close()
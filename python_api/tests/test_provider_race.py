@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+
+from provider_race import ProviderRace
+
+
+def test_sequential_runs_inline_and_falls_back():
+    caller = threading.current_thread()
+    seen = []
+
+    def call(provider):
+        seen.append((provider, threading.current_thread() is caller))
+        if provider == "a":
+            raise ValueError("down")
+        return f"quiz-{provider}"
+
+    race = ProviderRace()
+    provider, result, errors = race.run(["a", "b", "c"], call)
+
+    assert (provider, result) == ("b", "quiz-b")
+    assert errors == ["a: down"]
+    assert seen == [("a", True), ("b", True)]
+
+
+def test_sequential_checks_budget_before_each_attempt():
+    calls = []
+
+    def call(provider):
+        calls.append(provider)
+        time.sleep(0.05)
+        raise ValueError("slow failure")
+
+    race = ProviderRace()
+    with pytest.raises(ValueError, match="budget"):
+        race.run(["a", "b", "c"], call, budget=0.03)
+    assert calls == ["a"]
+    assert race.get_metrics()["budgetExhausted"] == 1
+
+
+def test_hedge_wins_when_preferred_provider_stalls():
+    release = threading.Event()
+
+    def call(provider):
+        if provider == "slow":
+            release.wait(2)
+        return provider
+
+    race = ProviderRace(hedge_delay=0.05)
+    try:
+        provider, result, errors = race.run(["slow", "fast"], call, hedged=True)
+    finally:
+        release.set()
+
+    assert provider == "fast" and errors == []
+    metrics = race.get_metrics()
+    assert metrics["hedgesLaunched"] == 1
+    assert metrics["hedgeWins"] == 1
+
+
+def test_hedged_failure_launches_next_immediately():
+    def call(provider):
+        if provider == "a":
+            raise ValueError("bad quiz")
+        return provider
+
+    race = ProviderRace(hedge_delay=5)
+    start = time.monotonic()
+    provider, _, errors = race.run(["a", "b"], call, hedged=True)
+
+    assert provider == "b" and errors == ["a: bad quiz"]
+    assert time.monotonic() - start < 1
+    assert race.get_metrics()["hedgesLaunched"] == 0
+
+
+def test_hedged_races_do_not_share_threads():
+    # Concurrent races each get their own pool: no attempt queues behind another race
+    release = threading.Event()
+    started = []
+
+    def call(provider):
+        started.append(provider)
+        release.wait(2)
+        return provider
+
+    race = ProviderRace(hedge_delay=10)
+    threads = [
+        threading.Thread(target=race.run, args=([f"p{i}", f"q{i}"], call), kwargs={"hedged": True})
+        for i in range(20)
+    ]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 2
+    while len(started) < 20 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(started) == 20
+
+
+def test_hedged_all_failures_raise():
+    def call(provider):
+        raise ValueError(f"{provider} down")
+
+    with pytest.raises(ValueError, match="a: a down .* b: b down"):
+        ProviderRace().run(["a", "b"], call, hedged=True)
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+app_module = pytest.importorskip("app")
+
+
+class FakeBank:
+    def __init__(self, questions):
+        self.questions = questions
+        self.added = []
+
+    def search(self, text, difficulty, limit):
+        return self.questions[:limit]
+
+    def add(self, questions, text, origin):
+        self.added.extend(questions)
+
+
+def bank_question(text):
+    return {"text": text, "options": [
+        {"text": "Oui", "isCorrect": True},
+        {"text": "Non", "isCorrect": False},
+    ]}
+
+
+def params(num_questions):
+    return {
+        "text": "Cours de test", "num_questions": num_questions, "difficulty": "medium",
+        "model_type": "auto", "api_key": "", "additional_info": None,
+        "race_options": {}, "bypass_cache": False,
+    }
+
+
+def providers_down(*args, **kwargs):
+    raise ValueError("Service IA indisponible: groq: 503")
+
+
+def test_bank_questions_survive_provider_failure(monkeypatch):
+    bank = FakeBank([bank_question("Paris est-elle en France ?"), bank_question("L'eau bout-elle a 100 C ?")])
+    monkeypatch.setattr(app_module, "question_bank", bank)
+    monkeypatch.setattr(app_module, "run_quiz_generation", providers_down)
+
+    result = app_module.generate_with_question_bank(params(5))
+
+    assert result["partial"] is True
+    assert result["reused"] == 2
+    assert result["provider"] == "question-bank"
+    assert [q["text"] for q in result["questions"]] == ["Paris est-elle en France ?", "L'eau bout-elle a 100 C ?"]
+    assert "2 questions sur 5" in result["warning"]
+
+
+def test_provider_failure_without_bank_questions_raises(monkeypatch):
+    monkeypatch.setattr(app_module, "question_bank", FakeBank([]))
+    monkeypatch.setattr(app_module, "run_quiz_generation", providers_down)
+
+    with pytest.raises(ValueError, match="indisponible"):
+        app_module.generate_with_question_bank(params(5))
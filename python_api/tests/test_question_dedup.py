@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+import question_dedup
+from chunked_generation import chunk_density
+from question_bank import extract_terms
+from question_dedup import NearDuplicateFilter, NearDuplicateIndex, normalize_for_matching
+
+
+def question(text, options):
+    return {"text": text, "options": [{"text": option} for option in options]}
+
+
+HTTP = question("Que signifie HTTP ?", ["HyperText Transfer Protocol", "High Transfer", "Home Tool", "Hot Text"])
+HTTPS = question("Que signifie HTTPS ?", ["HyperText Transfer Protocol Secure", "High Transfer", "Home Tool", "Hot Text"])
+CAPITAL_AR = question("ما هي عاصمة فرنسا؟", ["باريس", "روما", "مدريد", "برلين"])
+CAPITAL_AR_VOWELLED = question("ما هي عاصمةُ فرنسا ؟", ["باريس", "روما", "مدريد", "برلين"])
+NOVEL_AR = question("من كتب رواية البؤساء؟", ["فيكتور هوغو", "بلزاك", "زولا", "فلوبير"])
+
+
+def test_normalization_keeps_non_latin_letters():
+    assert normalize_for_matching("Élève, ça va ?") == "eleve ca va"
+    assert normalize_for_matching("ما هي عاصمةُ فرنسا ؟") == "ما هي عاصمة فرنسا"
+
+
+@pytest.mark.skipif(not question_dedup.NUMPY_AVAILABLE, reason="NumPy not installed")
+def test_short_stems_need_an_exact_match():
+    dedup = NearDuplicateFilter()
+    assert dedup.duplicate_indices([HTTP, HTTPS]) == []
+    assert dedup.duplicate_indices([HTTP, question("Que signifie HTTP?", ["Hot Text", "Home Tool"])]) == [1]
+    index = NearDuplicateIndex(dedup)
+    assert [index.add(q) for q in (HTTP, HTTPS)] == [True, True]
+
+
+@pytest.mark.skipif(not question_dedup.NUMPY_AVAILABLE, reason="NumPy not installed")
+def test_arabic_questions_are_deduplicated():
+    dedup = NearDuplicateFilter()
+    assert dedup.duplicate_indices([CAPITAL_AR, CAPITAL_AR_VOWELLED, NOVEL_AR]) == [1]
+    index = NearDuplicateIndex(dedup)
+    assert [index.add(q) for q in (CAPITAL_AR, CAPITAL_AR_VOWELLED, NOVEL_AR)] == [True, False, True]
+
+
+def test_fallback_never_drops_empty_fingerprints(monkeypatch):
+    monkeypatch.setattr(question_dedup, "NUMPY_AVAILABLE", False)
+    blank = [question("?", ["a", "b"]), question("!", ["c", "d"])]
+    dedup = NearDuplicateFilter()
+    assert dedup.duplicate_indices(blank + [CAPITAL_AR, NOVEL_AR, CAPITAL_AR]) == [4]
+    index = NearDuplicateIndex(dedup)
+    assert [index.add(q) for q in blank] == [True, True]
+
+
+def test_arabic_terms_and_density():
+    assert extract_terms("ما هي عاصمة فرنسا") != []
+    assert chunk_density("عاصمة فرنسا هي باريس وتقع على نهر السين") > 1
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Extraction de texte des fichiers deposes (PDF, DOCX, TXT).
+
+Les pages PDF sont extraites a la demande (generateur) et l'extraction
+s'arrete des que le budget de caracteres est atteint: un PDF de 300 pages
+dont seules les 40 premieres seront envoyees au modele ne coute que ces
+40 pages. Pour les gros PDF, des plages de pages peuvent etre extraites en
+parallele dans un pool de processus (spawn), consommees dans l'ordre avec
+la meme sortie anticipee.
+
+Chaque extraction rapporte le temps passe par page.
+"""
+
+import dataclasses
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import docx
+from pypdf import PdfReader
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ExtractionResult:
+    text: str
+    pages_total: int = 0
+    pages_extracted: int = 0
+    page_offsets: List[int] = field(default_factory=list)  # debut de chaque page dans ``text``
+    page_timings_ms: List[float] = field(default_factory=list)
+    truncated: bool = False
+    elapsed_ms: float = 0.0
+    cached: bool = False  # relu depuis le cache d'extraction, sans analyse du fichier
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Forme JSON pour le cache d'extraction."""
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ExtractionResult":
+        names = {f.name for f in dataclasses.fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in names})
+
+    def to_stats(self):
+        return {
+            "pagesTotal": self.pages_total,
+            "pagesExtracted": self.pages_extracted,
+            "truncated": self.truncated,
+            "extractionMs": round(self.elapsed_ms, 1),
+            "pageTimingsMs": [round(ms, 1) for ms in self.page_timings_ms],
+            "cached": self.cached,
+        }
+
+
+def content_digest(data: bytes) -> str:
+    """Empreinte BLAKE2 du contenu depose (cle du cache d'extraction)."""
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def iter_pdf_pages(reader: PdfReader, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[int, str, float]]:
+    """Genere (index, texte, secondes) page par page, sans extraire les suivantes d'avance."""
+    stop = len(reader.pages) if stop is None else min(stop, len(reader.pages))
+    for index in range(start, stop):
+        page_start = time.perf_counter()
+        text = reader.pages[index].extract_text() or ""
+        yield index, text, time.perf_counter() - page_start
+
+
+def _extract_page_range(path: str, start: int, stop: int) -> List[Tuple[int, str, float]]:
+    # Execute dans un processus du pool: fonction de module (picklable). Le
+    # PDF est lu depuis un fichier temporaire plutot que copie a chaque tache.
+    return list(iter_pdf_pages(PdfReader(path), start, stop))
+
+
+class TextExtractor:
+    """Extraction bornee par un budget de caracteres, pool de processus optionnel pour les PDF."""
+
+    def __init__(self, max_chars: int = 120000, process_workers: int = 0,
+                 parallel_min_pages: int = 40, pages_per_task: int = 10):
+        self.max_chars = max_chars
+        self.process_workers = process_workers
+        self.parallel_min_pages = parallel_min_pages
+        self.pages_per_task = pages_per_task
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: pas de fork d'un processus serveur multi-thread
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.process_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def extract(self, data: bytes, extension: str) -> ExtractionResult:
+        start = time.perf_counter()
+        if extension == ".pdf":
+            result = self._extract_pdf(data)
+        elif extension == ".docx":
+            result = self._extract_docx(data)
+        elif extension == ".txt":
+            text = data.decode("utf-8", errors="ignore")
+            result = ExtractionResult(text=text[:self.max_chars], truncated=len(text) > self.max_chars)
+        else:
+            raise ValueError(f"Extension non supportee: {extension}")
+        result.elapsed_ms = (time.perf_counter() - start) * 1000
+        return result
+
+    def _extract_pdf(self, data: bytes) -> ExtractionResult:
+        reader = PdfReader(io.BytesIO(data))
+        pages_total = len(reader.pages)
+        if self.process_workers > 0 and pages_total >= self.parallel_min_pages:
+            pages = self._iter_pdf_pages_parallel(data, pages_total)
+        else:
+            pages = iter_pdf_pages(reader)
+
+        parts: List[str] = []
+        offsets: List[int] = []
+        timings: List[float] = []
+        size = 0
+        truncated = False
+        for _, page_text, seconds in pages:
+            offsets.append(size)
+            timings.append(seconds * 1000)
+            parts.append(page_text)
+            size += len(page_text) + 1
+            if size >= self.max_chars:
+                truncated = len(offsets) < pages_total
+                break
+        pages.close()  # annule les plages de pages encore en attente
+
+        text = "\n".join(parts)
+        return ExtractionResult(
+            text=text[:self.max_chars],
+            pages_total=pages_total,
+            pages_extracted=len(offsets),
+            page_offsets=offsets,
+            page_timings_ms=timings,
+            truncated=truncated or len(text) > self.max_chars,
+        )
+
+    def _iter_pdf_pages_parallel(self, data: bytes, pages_total: int) -> Iterator[Tuple[int, str, float]]:
+        """Plages de pages dans le pool, au plus ``process_workers`` en avance sur la lecture."""
+        pool = self._get_pool()
+        ranges = [(start, min(start + self.pages_per_task, pages_total))
+                  for start in range(0, pages_total, self.pages_per_task)]
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as handle:
+            handle.write(data)
+            path = handle.name
+        pending = []
+        try:
+            for start, stop in ranges:
+                pending.append(pool.submit(_extract_page_range, path, start, stop))
+                if len(pending) >= self.process_workers:
+                    yield from pending.pop(0).result()
+            for future in pending:
+                yield from future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+            # Les taches deja lancees gardent le fichier ouvert: suppression sans attendre
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def _extract_docx(self, data: bytes) -> ExtractionResult:
+        document = docx.Document(io.BytesIO(data))
+        parts = []
+        size = 0
+        truncated = False
+        for paragraph in document.paragraphs:
+            if not paragraph.text:
+                continue
+            parts.append(paragraph.text)
+            size += len(paragraph.text) + 1
+            if size >= self.max_chars:
+                truncated = True
+                break
+        text = "\n".join(parts)
+        return ExtractionResult(text=text[:self.max_chars], truncated=truncated)